@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# Filename: bench_frame_pattern.py
+"""
+Measures the per-probe cost of building a frame's path and of reading the
+frame back from a file name, with sequence_scan.FramePattern and with the
+old proxy2file helpers, which re-parsed the name on every call. Only the
+%04d and #### tokens are compared, as those were all the old helpers handled;
+the other tokens are timed with FramePattern alone.
+
+Example:
+    python benchmarks/bench_frame_pattern.py
+    python benchmarks/bench_frame_pattern.py --calls 500000
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sequence_scan
+
+DIRECTORY = '/mnt/projects/show/sh0010/comp/v012'
+NAMES = [
+    'sh0010_comp_v012.%04d.exr',
+    'sh0010_comp_v012.####.exr',
+    'sh0010_comp_v012.%d.exr',
+    'sh0010_comp_v012.@@@@.exr',
+    'sh0010_comp_v012.$F4.exr',
+    'sh0010_diffuse.<UDIM>.tx',
+]
+
+
+def legacy_get_frame_pattern(basename):
+    """
+    The old FileScanner._get_frame_pattern.
+    """
+    if '%' in basename and 'd' in basename:
+        pattern_parts = re.split(r'(%\d*d)', basename)
+        if len(pattern_parts) >= 3:
+            start_pattern = pattern_parts[0]
+            end_pattern = ''.join(pattern_parts[2:])
+            regex_pattern = f"^{re.escape(start_pattern)}(\\d+){re.escape(end_pattern)}$"
+            return start_pattern, end_pattern, re.compile(regex_pattern)
+    else:
+        hash_match = re.search(r'(#+)', basename)
+        if hash_match:
+            hash_str = hash_match.group(1)
+            pattern_parts = basename.split(hash_str, 1)
+            if len(pattern_parts) == 2:
+                regex_pattern = f"^{re.escape(pattern_parts[0])}(\\d+){re.escape(pattern_parts[1])}$"
+                return pattern_parts[0], pattern_parts[1], re.compile(regex_pattern)
+    return None
+
+
+def legacy_format(basename, directory, frame):
+    """
+    The old FileScanner._format_path_with_frame.
+    """
+    if '%' in basename and 'd' in basename:
+        return os.path.join(directory, basename % frame)
+    hash_match = re.search(r'(#+)', basename)
+    if hash_match:
+        hash_str = hash_match.group(1)
+        return os.path.join(directory, basename.replace(hash_str, str(frame).zfill(len(hash_str))))
+    return os.path.join(directory, basename)
+
+
+def legacy_match(basename, name):
+    match = legacy_get_frame_pattern(basename)[2].match(name)
+    return int(match.group(1)) if match else None
+
+
+def time_calls(function, arguments):
+    start = time.perf_counter()
+    for argument in arguments:
+        function(argument)
+    return (time.perf_counter() - start) / len(arguments) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark frame pattern formatting and matching.')
+    parser.add_argument('--calls', type=int, default=200000, help='calls per measurement')
+    args = parser.parse_args()
+
+    frames = range(1001, 1001 + args.calls)
+    print(f"{'pattern':<28} {'legacy fmt ns':>14} {'fmt ns':>8} {'legacy match ns':>16} {'match ns':>9}")
+    for basename in NAMES:
+        path_pattern = sequence_scan.FramePattern.parse(os.path.join(DIRECTORY, basename))
+        pattern = sequence_scan.FramePattern.parse(basename)
+        names = [pattern.format(frame) for frame in frames]
+        assert all(pattern.match(name) == frame for name, frame in zip(names[:1000], frames))
+
+        format_ns = time_calls(path_pattern.format, frames)
+        match_ns = time_calls(pattern.match, names)
+        if '%' in basename or '#' in basename:
+            legacy_format_ns = time_calls(lambda frame: legacy_format(basename, DIRECTORY, frame), frames)
+            legacy_match_ns = time_calls(lambda name: legacy_match(basename, name), names)
+            legacy = f"{legacy_format_ns:>14.0f} {format_ns:>8.0f} {legacy_match_ns:>16.0f}"
+        else:
+            legacy = f"{'-':>14} {format_ns:>8.0f} {'-':>16}"
+        print(f"{basename:<28} {legacy} {match_ns:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
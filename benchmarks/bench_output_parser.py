@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# Filename: bench_output_parser.py
+"""
+Compares render_engine.RenderOutputParser with the old
+re.search(r'Writing.*?(\d+)', line) frame extraction on a corpus of Nuke
+render logs, for accuracy and lines per second.
+
+The expected frame for every "Writing" line is taken from the preceding
+"Frame N (i of n)" line, so any real log captured with those lines can be
+added to the corpus. corpus.json maps each log to its Write file pattern.
+
+Example:
+    python benchmarks/bench_output_parser.py
+    python benchmarks/bench_output_parser.py --logs /path/to/logs --repeat 200
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import render_engine
+
+DEFAULT_LOGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'render_logs')
+LEGACY_RE = re.compile(r'Writing.*?(\d+)')
+
+
+def legacy_parse(line):
+    if 'Writing' in line:
+        match = LEGACY_RE.search(line)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def load_corpus(directory):
+    """
+    Returns a list of (name, write_pattern, lines) for every log in directory.
+    """
+    manifest_path = os.path.join(directory, 'corpus.json')
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as handle:
+            manifest = json.load(handle)
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.log'):
+            with open(os.path.join(directory, name)) as handle:
+                corpus.append((name, manifest.get(name), handle.read().splitlines()))
+    return corpus
+
+
+def expected_frames(lines):
+    """
+    Yields (line, expected_frame) for every Writing line preceded by a Frame line.
+    """
+    current = None
+    for line in lines:
+        match = render_engine.FRAME_LINE_RE.match(line)
+        if match:
+            current = int(match.group(1))
+        elif 'Writing' in line and current is not None:
+            yield line, current
+
+
+def time_lines(parse, lines, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            parse(line)
+    elapsed = time.perf_counter() - start
+    return len(lines) * repeat / elapsed if elapsed else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the render output line parser.')
+    parser.add_argument('--logs', default=DEFAULT_LOGS, help='directory of .log files and corpus.json')
+    parser.add_argument('--repeat', type=int, default=100, help='passes over each log for timing')
+    args = parser.parse_args()
+
+    print(f"{'log':<40} {'lines':>6} {'legacy ok':>10} {'parser ok':>10} {'legacy l/s':>12} {'parser l/s':>12}")
+    for name, pattern, lines in load_corpus(args.logs):
+        output_parser = render_engine.RenderOutputParser(pattern)
+
+        def new_parse(line):
+            event = output_parser.parse(line)
+            return event[1] if event and event[0] == render_engine.FRAME_WRITTEN else None
+
+        checks = list(expected_frames(lines))
+        legacy_ok = sum(1 for line, frame in checks if legacy_parse(line) == frame)
+        parser_ok = sum(1 for line, frame in checks if new_parse(line) == frame)
+        legacy_rate = time_lines(legacy_parse, lines, args.repeat)
+        parser_rate = time_lines(output_parser.parse, lines, args.repeat)
+        print(f"{name:<40} {len(lines):>6} {legacy_ok:>4}/{len(checks):<5} {parser_ok:>4}/{len(checks):<5} "
+              f"{legacy_rate:>12.0f} {parser_rate:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
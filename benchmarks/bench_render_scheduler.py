@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# Filename: bench_render_scheduler.py
+"""
+Benchmarks the render panel scheduler (render_engine.RenderWorker) against
+fake_nuke.py, so no Nuke licence is needed.
+
+For every frame count / worker count combination it reports:
+    wall       total wall-clock time
+    overhead   wall time minus the ideal time (frames * frame_time / workers)
+    signals/s  progress callbacks delivered per second
+    gap p99    99th percentile gap between consecutive progress callbacks
+    tail       time between the median worker finishing and the last one
+    peak mem   peak Python allocations in the scheduling process (tracemalloc)
+
+Example:
+    python benchmarks/bench_render_scheduler.py --frames 1000,10000 --workers 1,8,64
+    python benchmarks/bench_render_scheduler.py --mode batch --batch-size 50 --frame-time 0.01 --json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import render_engine
+
+FAKE_NUKE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_nuke.py')
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def run_case(frame_count, worker_count, mode, batch_size, frame_time, first_frame=1001):
+    """
+    Renders frame_count fake frames with worker_count workers and returns the metrics.
+    """
+    all_frames = list(range(first_frame, first_frame + frame_count))
+    signal_times = []
+    signal_lock = threading.Lock()
+    finish_times = []
+    states = []
+
+    def on_progress(frame, total, time_per_frame):
+        with signal_lock:
+            signal_times.append(time.perf_counter())
+
+    remaining_frames = None
+    remaining_frames_lock = None
+    if mode == 'batch':
+        remaining_frames = all_frames.copy()
+        remaining_frames_lock = threading.Lock()
+        frames_per_worker = [None] * worker_count
+    else:
+        frames_per_worker = [[] for _ in range(worker_count)]
+        for idx, frame in enumerate(all_frames):
+            frames_per_worker[idx % worker_count].append(frame)
+
+    workers = [
+        render_engine.RenderWorker(
+            [sys.executable, FAKE_NUKE], 'benchmark.nk', 'Write1', frames_per_worker[idx], idx + 1,
+            batch_render=mode == 'batch', batch_size=batch_size,
+            remaining_frames=remaining_frames, remaining_frames_lock=remaining_frames_lock,
+            on_progress=on_progress
+        )
+        for idx in range(worker_count)
+    ]
+
+    def run_worker(worker):
+        state, _ = worker.run()
+        with signal_lock:
+            finish_times.append(time.perf_counter())
+            states.append(state)
+
+    os.environ['FAKE_NUKE_FRAME_TIME'] = str(frame_time)
+    tracemalloc.start()
+    start = time.perf_counter()
+    threads = [threading.Thread(target=run_worker, args=(worker,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ideal = frame_count * frame_time / worker_count
+    gaps = [b - a for a, b in zip(signal_times, signal_times[1:])]
+    finish_offsets = sorted(t - start for t in finish_times)
+    return {
+        'frames': frame_count,
+        'workers': worker_count,
+        'mode': mode,
+        'wall': wall,
+        'overhead': wall - ideal,
+        'overhead_per_frame_ms': (wall - ideal) * 1000.0 / frame_count,
+        'signals': len(signal_times),
+        'signals_per_second': len(signal_times) / wall if wall else 0.0,
+        'gap_p99_ms': percentile(gaps, 0.99) * 1000.0,
+        'tail': finish_offsets[-1] - percentile(finish_offsets, 0.5) if finish_offsets else 0.0,
+        'peak_memory_kb': peak_memory / 1024.0,
+        'all_finished': all(state == render_engine.RENDER_FINISHED for state in states),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the render panel scheduler against fake Nuke.')
+    parser.add_argument('--frames', default='1000,10000,100000',
+                        help='comma separated frame counts (default: 1000,10000,100000)')
+    parser.add_argument('--workers', default='1,4,16,64',
+                        help='comma separated worker counts (default: 1,4,16,64)')
+    parser.add_argument('--mode', choices=('split', 'batch'), default='split',
+                        help='static split like the panel default, or shared batch queue')
+    parser.add_argument('--batch-size', type=int, default=10)
+    parser.add_argument('--frame-time', type=float, default=0.0,
+                        help='fake seconds per frame (default 0: measure pure overhead)')
+    parser.add_argument('--json', action='store_true', help='print results as JSON lines')
+    args = parser.parse_args()
+
+    if not args.json:
+        print(f"{'frames':>8} {'workers':>7} {'wall s':>9} {'overhead s':>10} {'ms/frame':>9} "
+              f"{'signals/s':>10} {'gap p99 ms':>10} {'tail s':>8} {'peak KB':>9}")
+    for frame_count in [int(value) for value in args.frames.split(',')]:
+        for worker_count in [int(value) for value in args.workers.split(',')]:
+            result = run_case(frame_count, worker_count, args.mode, args.batch_size, args.frame_time)
+            if args.json:
+                print(json.dumps(result))
+            else:
+                print(f"{result['frames']:>8} {result['workers']:>7} {result['wall']:>9.2f} "
+                      f"{result['overhead']:>10.2f} {result['overhead_per_frame_ms']:>9.3f} "
+                      f"{result['signals_per_second']:>10.0f} {result['gap_p99_ms']:>10.2f} "
+                      f"{result['tail']:>8.2f} {result['peak_memory_kb']:>9.0f}"
+                      + ('' if result['all_finished'] else '  (worker failed)'))
+            sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
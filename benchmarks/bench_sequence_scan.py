@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# Filename: bench_sequence_scan.py
+"""
+Compares sequence_scan.DirectoryIndex with the old proxy2file _fast_scan
+(list the prefix matches, sort them and sample 100 names above 1000 files)
+on a directory of empty frame files, for accuracy and time. "index s"
+lists the directory and finds one pattern; "shared s" is one more pattern
+found in an index that is already listed, as for every further Read or
+proxy in the same directory.
+
+The generated directory holds an unpadded sequence and a %04d sequence whose
+frames run past 9999, so the lexical sort order the old scan relied on is
+not numeric order for either of them.
+
+Example:
+    python benchmarks/bench_sequence_scan.py
+    python benchmarks/bench_sequence_scan.py --files 200000 --repeat 5 --keep /tmp/seq_bench
+"""
+
+import os
+import re
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sequence_scan
+
+PADDED = 'sh0010_comp_v012.%04d.exr'
+UNPADDED = 'sh0010_comp_v012_mask.%d.png'
+
+
+def legacy_scan(directory, basename):
+    """
+    The sort-and-sample range detection proxy2file used before the directory index.
+    """
+    prefix, suffix = re.split(r'%\d*d', basename)
+    frame_pattern = re.compile(f"^{re.escape(prefix)}(\\d+){re.escape(suffix)}$")
+    matching_files = [entry.name for entry in os.scandir(directory)
+                      if entry.is_file() and entry.name.startswith(prefix)]
+    if not matching_files:
+        return None, None
+    matching_files.sort()
+    if len(matching_files) > 1000:
+        step = max(1, len(matching_files) // 100)
+        indices = list(range(0, len(matching_files), step)) + [len(matching_files) - 1]
+    else:
+        indices = range(len(matching_files))
+    frames = []
+    for index in indices:
+        match = frame_pattern.match(matching_files[index])
+        if match:
+            frames.append(int(match.group(1)))
+    return (min(frames), max(frames)) if frames else (None, None)
+
+
+def index_scan(directory, basename):
+    prefix, suffix = re.split(r'%\d*d', basename)
+    frames = sequence_scan.DirectoryIndex(directory).frames(prefix, suffix)
+    return frames.first, frames.last
+
+
+def shared_index_scan(index, basename):
+    """
+    A pattern query against an index already listed for another Read.
+    """
+    prefix, suffix = re.split(r'%\d*d', basename)
+    index.frame_sets.clear()
+    frames = index.frames(prefix, suffix)
+    return frames.first, frames.last
+
+
+def build_directory(directory, count):
+    """
+    Creates count frame files split over the two sequences, with a gap in each.
+    Returns {basename: (first, last)}.
+    """
+    os.makedirs(directory, exist_ok=True)
+    padded_count = count * 9 // 10
+    expected = {}
+    for basename, first, frames in ((PADDED, 1001, padded_count), (UNPADDED, 1, count - padded_count)):
+        last = first + frames  # One frame in the middle is left out
+        skip = first + frames // 2
+        for frame in range(first, last + 1):
+            if frame != skip:
+                open(os.path.join(directory, basename % frame), 'w').close()
+        expected[basename] = (first, last)
+    return expected
+
+
+def time_scan(scan, directory, basename, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = scan(directory, basename)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark sequence range detection.')
+    parser.add_argument('--files', type=int, default=200000, help='frame files to create')
+    parser.add_argument('--repeat', type=int, default=3, help='timed scans per method (best is shown)')
+    parser.add_argument('--keep', help='create the files in this directory and keep them for the next run')
+    args = parser.parse_args()
+
+    directory = args.keep or tempfile.mkdtemp(prefix='seq_bench_')
+    try:
+        start = time.perf_counter()
+        expected = build_directory(directory, args.files)
+        print(f"Created {args.files} files in {directory} in {time.perf_counter() - start:.1f}s")
+        index = sequence_scan.DirectoryIndex(directory)
+        print(f"{'pattern':<32} {'expected':>15} {'legacy':>15} {'legacy s':>9} {'index':>15} {'index s':>9} "
+              f"{'shared s':>9}")
+        for basename, (first, last) in expected.items():
+            legacy, legacy_time = time_scan(legacy_scan, directory, basename, args.repeat)
+            indexed, index_time = time_scan(index_scan, directory, basename, args.repeat)
+            _, shared_time = time_scan(shared_index_scan, index, basename, args.repeat)
+            print(f"{basename:<32} {f'{first}-{last}':>15} {f'{legacy[0]}-{legacy[1]}':>15} {legacy_time:>9.3f} "
+                  f"{f'{indexed[0]}-{indexed[1]}':>15} {index_time:>9.3f} {shared_time:>9.3f}")
+    finally:
+        if not args.keep:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# Filename: fake_nuke.py
+"""
+Stand-in for the Nuke executable so the render panel, render_engine and the
+benchmarks can run without a Nuke licence.
+
+Accepts the same arguments the panel passes to Nuke:
+
+    fake_nuke.py -V [level] -x [-p] [-m 4G] [-c 2G] [-Pf profile.xml] -F 1-10 [-F 12] -X Write1[,Write2] script.nk
+
+and prints Nuke-like output for every frame:
+
+    Frame 1001 (1 of 100)
+    Writing /renders/sh0010/v012/sh0010_comp_v012.1001.exr took 2.31 seconds
+
+Behaviour is configured with environment variables, since the command line is
+fixed by whatever launches the render:
+
+    FAKE_NUKE_FRAME_TIME   seconds per frame (default 0)
+    FAKE_NUKE_JITTER       +/- random fraction of the frame time (default 0)
+    FAKE_NUKE_SEED         random seed (default: pid)
+    FAKE_NUKE_CRASH_FRAMES comma separated frames that crash the process (exit 1)
+    FAKE_NUKE_CRASH_RATE   probability of crashing on any frame (default 0)
+    FAKE_NUKE_HANG_FRAMES  comma separated frames where the process hangs silently
+    FAKE_NUKE_HANG_RATE    probability of hanging on any frame (default 0)
+    FAKE_NUKE_OUTPUT       output pattern, %04d or #### style
+                           (default /tmp/fake_nuke/sh0010_comp_v012.%04d.exr);
+                           "<write>" is replaced by the Write node name
+    FAKE_NUKE_WRITE_FILES  if "1", actually create the output files
+    FAKE_NUKE_QUIET        if "1", print nothing on stdout, like a -V level
+                           that swallows the frame lines
+
+With -Pf a performance profile in Nuke's XML layout is written when the
+process exits, splitting each frame's time over a few fake nodes.
+"""
+
+import os
+import re
+import sys
+import time
+import random
+from xml.sax.saxutils import quoteattr
+
+
+DEFAULT_OUTPUT = os.path.join('/tmp', 'fake_nuke', 'sh0010_comp_v012.%04d.exr')
+# (name, class, share of the frame time, memory in MB) for the -Pf profile
+PROFILE_NODES = [
+    ('Read1', 'Read', 0.2, 512),
+    ('Grade1', 'Grade', 0.05, 64),
+    ('ZDefocus1', 'ZDefocus2', 0.6, 2048),
+    ('Merge1', 'Merge2', 0.1, 128),
+]
+FRAME_RANGE_RE = re.compile(r'^(-?\d+)(?:-(-?\d+))?(?:x(\d+))?$')
+
+
+def parse_frame_range(text):
+    """
+    Parses a Nuke -F argument: "5", "1-10", "-5--1" or "1-10x2".
+    """
+    match = FRAME_RANGE_RE.match(text.strip())
+    if not match:
+        raise ValueError(f'Invalid frame range: {text}')
+    first = int(match.group(1))
+    last = int(match.group(2)) if match.group(2) is not None else first
+    step = int(match.group(3) or 1)
+    return list(range(first, last + 1, step))
+
+
+def parse_args(argv):
+    """
+    Parses the subset of the Nuke command line used by the render panel.
+    """
+    options = {'frames': [], 'writes': [], 'script': None, 'proxy': False,
+               'max_ram': None, 'cache_size': None, 'profile': None}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == '-V':
+            # Optional verbosity level
+            if i + 1 < len(argv) and argv[i + 1].isdigit():
+                i += 1
+        elif arg in ('-x', '-t', '-i', '-f'):
+            pass
+        elif arg == '-p':
+            options['proxy'] = True
+        elif arg == '-m':
+            i += 1
+            options['max_ram'] = argv[i]
+        elif arg == '-c':
+            i += 1
+            options['cache_size'] = argv[i]
+        elif arg == '-F':
+            i += 1
+            options['frames'].extend(parse_frame_range(argv[i]))
+        elif arg == '-X':
+            i += 1
+            options['writes'].extend(name for name in argv[i].split(',') if name)
+        elif arg == '-Pf':
+            i += 1
+            options['profile'] = argv[i]
+        else:
+            options['script'] = arg
+        i += 1
+    return options
+
+
+def env_frames(name):
+    value = os.environ.get(name, '')
+    return set(int(frame) for frame in value.split(',') if frame.strip())
+
+
+def format_output(pattern, frame):
+    """
+    Expands a %0Nd or #### output pattern for a frame.
+    """
+    if '%' in pattern:
+        return pattern % frame
+    start = pattern.find('#')
+    if start < 0:
+        return pattern
+    end = start
+    while end < len(pattern) and pattern[end] == '#':
+        end += 1
+    return pattern[:start] + str(frame).zfill(end - start) + pattern[end:]
+
+
+def write_profile(path, frame_times, writes):
+    """
+    Writes a performance profile for the rendered frames, times in microseconds.
+    """
+    nodes = PROFILE_NODES + [(write, 'Write', 0.05, 32) for write in writes]
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<PerformanceProfile>']
+    for frame, duration in frame_times:
+        lines.append(f'  <Frame value="{frame}">')
+        for name, node_class, share, memory in nodes:
+            wall = int(duration * share * 1e6)
+            lines.append(f'    <Node name={quoteattr(name)} class={quoteattr(node_class)}>')
+            lines.append(f'      <callCount>{1 + int(share * 100)}</callCount>')
+            lines.append(f'      <timeTakenWall>{wall}</timeTakenWall>')
+            lines.append(f'      <timeTakenCPU>{wall * 4}</timeTakenCPU>')
+            lines.append(f'      <memory>{memory * 1024 * 1024}</memory>')
+            lines.append('    </Node>')
+        lines.append('  </Frame>')
+    lines.append('</PerformanceProfile>')
+    with open(path, 'w') as handle:
+        handle.write('\n'.join(lines) + '\n')
+
+
+def main(argv=None):
+    options = parse_args(sys.argv[1:] if argv is None else argv)
+    if not options['frames']:
+        print('ERROR: no frame range given (-F)', file=sys.stderr)
+        return 1
+
+    frame_time = float(os.environ.get('FAKE_NUKE_FRAME_TIME', '0'))
+    jitter = float(os.environ.get('FAKE_NUKE_JITTER', '0'))
+    rng = random.Random(int(os.environ.get('FAKE_NUKE_SEED', os.getpid())))
+    crash_frames = env_frames('FAKE_NUKE_CRASH_FRAMES')
+    crash_rate = float(os.environ.get('FAKE_NUKE_CRASH_RATE', '0'))
+    hang_frames = env_frames('FAKE_NUKE_HANG_FRAMES')
+    hang_rate = float(os.environ.get('FAKE_NUKE_HANG_RATE', '0'))
+    output = os.environ.get('FAKE_NUKE_OUTPUT', DEFAULT_OUTPUT)
+    write_files = os.environ.get('FAKE_NUKE_WRITE_FILES') == '1'
+    quiet = os.environ.get('FAKE_NUKE_QUIET') == '1'
+    writes = options['writes'] or ['Write1']
+
+    frame_times = []
+    total = len(options['frames'])
+    try:
+        for index, frame in enumerate(options['frames']):
+            if not quiet:
+                print(f'Frame {frame} ({index + 1} of {total})', flush=True)
+
+            if frame in hang_frames or (hang_rate and rng.random() < hang_rate):
+                # Stay alive without printing anything, like a stuck Nuke child
+                while True:
+                    time.sleep(3600)
+
+            duration = frame_time
+            if jitter:
+                duration = max(0.0, frame_time * (1.0 + rng.uniform(-jitter, jitter)))
+            if duration:
+                time.sleep(duration)
+
+            if frame in crash_frames or (crash_rate and rng.random() < crash_rate):
+                print(f'ERROR: {writes[0]}: Segmentation fault while rendering frame {frame}', file=sys.stderr, flush=True)
+                return 1
+
+            for write in writes:
+                path = format_output(output.replace('<write>', write), frame)
+                if write_files:
+                    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                    with open(path, 'wb') as handle:
+                        handle.write(b'\0' * 16)
+                if not quiet:
+                    print(f'Writing {path} took {duration:.2f} seconds', flush=True)
+            frame_times.append((frame, duration))
+    finally:
+        if options['profile']:
+            write_profile(options['profile'], frame_times, writes)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
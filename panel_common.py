@@ -0,0 +1,160 @@
+# Filename: panel_common.py
+"""
+Helpers shared by the Render Progress Panel and the Precomp Extractor:
+upstream node walks, per-frame fingerprints of everything upstream of a
+Write, and the collapsible group widget both panels are laid out with.
+
+Importing this module registers no panels or menus, so either panel can
+use it without pulling in the other.
+"""
+
+import hashlib
+
+import nuke
+from PySide6 import QtWidgets, QtCore
+
+# Knobs that only affect the node graph UI, never the rendered pixels
+UI_ONLY_KNOBS = {
+    'xpos', 'ypos', 'selected', 'label', 'note_font', 'note_font_size', 'note_font_color',
+    'tile_color', 'gl_color', 'hide_input', 'postage_stamp', 'postage_stamp_frame',
+    'bookmark', 'icon', 'indicators', 'cached', 'dope_sheet', 'help', 'onCreate',
+    'panel', 'updateUI', 'autolabel', 'knobChanged', 'lifetimeStart', 'lifetimeEnd',
+}
+
+
+def upstream_nodes(node):
+    """
+    Returns every node the given node depends on (inputs, hidden inputs and
+    expression links), including the contents of Groups, plus the node itself.
+    """
+    what = nuke.INPUTS | nuke.HIDDEN_INPUTS | nuke.EXPRESSIONS
+    seen = {}
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        name = current.fullName()
+        if name in seen:
+            continue
+        seen[name] = current
+        stack.extend(current.dependencies(what))
+        if isinstance(current, nuke.Group):
+            stack.extend(current.nodes())
+    return list(seen.values())
+
+
+def _roto_frame_state(knob, frame):
+    """
+    Describes the Roto/RotoPaint shapes visible at a frame, so a newly keyed
+    shape only changes the fingerprint of the frames it lives on.
+    """
+    import nuke.rotopaint as rp
+    parts = []
+    stack = [knob.rootLayer]
+    while stack:
+        layer = stack.pop()
+        for element in layer:
+            if isinstance(element, rp.Layer):
+                stack.append(element)
+                continue
+            attributes = element.getAttributes()
+            lifetime_type = int(attributes.getValue(frame, 'ltt'))
+            start = attributes.getValue(frame, 'ltn')
+            end = attributes.getValue(frame, 'ltm')
+            # 0 all frames, 1 start to frame, 2 single frame, 3 frame to end, 4 range
+            visible = (
+                lifetime_type == 0
+                or (lifetime_type == 1 and frame <= end)
+                or (lifetime_type == 2 and frame == start)
+                or (lifetime_type == 3 and frame >= start)
+                or (lifetime_type == 4 and start <= frame <= end)
+            )
+            if not visible:
+                continue
+            points = []
+            for point in element:
+                try:
+                    position = point.center.getPosition(frame)
+                    points.append((round(position.x, 4), round(position.y, 4)))
+                except AttributeError:
+                    pass
+            parts.append((element.name, attributes.getValue(frame, 'opc'), points))
+    return repr(parts)
+
+
+def compute_frame_fingerprints(write_node, frames):
+    """
+    Fingerprints the knob values and animation curves of everything upstream
+    of a Write node. Returns {frame: hex digest}; static knobs are hashed once,
+    animated and expression knobs are evaluated per frame.
+    """
+    static_hash = hashlib.sha1()
+    frame_knobs = []
+    roto_knobs = []
+    for node in sorted(upstream_nodes(write_node), key=lambda n: n.fullName()):
+        static_hash.update(f"{node.fullName()} {node.Class()}\n".encode('utf-8'))
+        for name, knob in sorted(node.knobs().items()):
+            if name in UI_ONLY_KNOBS:
+                continue
+            if name == 'curves' and node.Class() in ('Roto', 'RotoPaint'):
+                roto_knobs.append((node.fullName(), knob))
+                continue
+            is_animated = getattr(knob, 'isAnimated', None)
+            has_expression = getattr(knob, 'hasExpression', None)
+            if (is_animated and is_animated()) or (has_expression and has_expression()):
+                frame_knobs.append((node.fullName(), name, knob))
+            else:
+                static_hash.update(f"{name} {knob.toScript()}\n".encode('utf-8'))
+    static_digest = static_hash.hexdigest()
+
+    fingerprints = {}
+    for frame in frames:
+        frame_hash = hashlib.sha1(static_digest.encode('utf-8'))
+        for node_name, name, knob in frame_knobs:
+            try:
+                value = knob.getValueAt(frame) if hasattr(knob, 'getValueAt') else knob.evaluate(frame)
+            except Exception:
+                value = knob.toScript()
+            frame_hash.update(f"{node_name}.{name} {value!r}\n".encode('utf-8'))
+        for node_name, knob in roto_knobs:
+            try:
+                state = _roto_frame_state(knob, frame)
+            except Exception:
+                state = knob.toScript()
+            frame_hash.update(f"{node_name}.curves {state}\n".encode('utf-8'))
+        fingerprints[frame] = frame_hash.hexdigest()
+    return fingerprints
+
+
+class CollapsibleWidget(QtWidgets.QWidget):
+    """
+    A custom widget that can be collapsed or expanded.
+    """
+    def __init__(self, title='', parent=None):
+        super(CollapsibleWidget, self).__init__(parent)
+        self.toggle_button = QtWidgets.QToolButton(text=title, checkable=True, checked=False)
+        self.toggle_button.setStyleSheet("QToolButton { border: none; }")
+        self.toggle_button.setToolButtonStyle(QtCore.Qt.ToolButtonTextBesideIcon)
+        self.toggle_button.setArrowType(QtCore.Qt.RightArrow)
+        self.toggle_button.setChecked(False)
+
+        self.content_widget = QtWidgets.QWidget()
+        self.content_layout = QtWidgets.QVBoxLayout(self.content_widget)
+        self.content_widget.setVisible(False)
+
+        self.main_layout = QtWidgets.QVBoxLayout(self)
+        self.main_layout.addWidget(self.toggle_button)
+        self.main_layout.addWidget(self.content_widget)
+        self.main_layout.setContentsMargins(0, 0, 0, 0)
+        self.main_layout.setSpacing(0)
+
+        self.toggle_button.toggled.connect(self.on_toggled)
+
+    def on_toggled(self, checked):
+        self.content_widget.setVisible(checked)
+        if checked:
+            self.toggle_button.setArrowType(QtCore.Qt.DownArrow)
+        else:
+            self.toggle_button.setArrowType(QtCore.Qt.RightArrow)
+
+    def add_widget(self, widget):
+        self.content_layout.addWidget(widget)
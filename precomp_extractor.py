@@ -0,0 +1,411 @@
+# Filename: precomp_extractor.py
+"""
+Precomp Extractor panel, used beside the Render Progress Panel.
+
+Finds upstream branches worth rendering once instead of on every render:
+branches that feed several enabled Writes, and branches with no image
+sequence input whose animation only spans a few frames of the range. Their
+cost per frame comes from the node profiles the Render Progress Panel stores
+beside the script when "Profile Nodes" is on.
+
+Extracting a branch adds a disabled precomp Write behind it, queues that Write
+as a background job and swaps a Read of the precomp files in for the branch.
+The branch stays in the script, so the Read is marked stale as soon as a knob
+or curve upstream changes its fingerprint.
+"""
+
+import os
+import logging
+
+import nuke
+import nukescripts
+from PySide6 import QtWidgets
+
+import render_engine
+import render_queue
+import sequence_scan
+from panel_common import CollapsibleWidget, upstream_nodes, compute_frame_fingerprints
+
+PRECOMP_DIR = 'precomp'
+WRITE_PREFIX = 'PrecompWrite_'
+READ_PREFIX = 'PrecompRead_'
+# Knobs added to the Read linking it back to the branch it replaces
+SOURCE_KNOB = 'precomp_source'
+WRITE_KNOB = 'precomp_write'
+
+# A branch whose animation needs at most this share of the range is worth holding
+NARROW_FRACTION = 0.25
+
+# Nodes that are never the last node of a branch worth extracting
+SKIP_CLASSES = {
+    'Read', 'DeepRead', 'Write', 'DeepWrite', 'Dot', 'Viewer', 'BackdropNode', 'StickyNote',
+    'Constant', 'CheckerBoard2', 'ColorBars', 'ColorWheel', 'NoOp', 'Camera2', 'Camera3', 'Axis2', 'Axis3',
+}
+
+
+def _top_level(node):
+    return '.' not in node.fullName()
+
+
+def _varies_per_frame(node):
+    """
+    True for nodes reading a different file per frame (image sequences,
+    cameras and geometry read from sequences).
+    """
+    knob = node.knobs().get('file')
+    if knob is None or ('disable' in node.knobs() and node['disable'].value()):
+        return False
+    if sequence_scan.FramePattern.parse(knob.value() or '') is None:
+        return False
+    if 'first' in node.knobs() and 'last' in node.knobs():
+        return node['first'].value() != node['last'].value()
+    return True
+
+
+def animated_span(fingerprints):
+    """
+    Returns (first, last) of the frames that must be rendered so holding the
+    first and last frame reproduces every frame, or None for no frames.
+    A branch that never changes returns its first frame twice.
+    """
+    frames = sorted(fingerprints)
+    if not frames:
+        return None
+    changes = [frame for previous, frame in zip(frames, frames[1:])
+               if fingerprints[frame] != fingerprints[previous]]
+    if not changes:
+        return frames[0], frames[0]
+    first = frames[frames.index(changes[0]) - 1]
+    return first, changes[-1]
+
+
+def branch_cost(profile, nodes):
+    """
+    Returns the profiled wall seconds per frame of the given nodes, or None if
+    none of them were profiled.
+    """
+    total = None
+    for node in nodes:
+        stats = profile.get(node.fullName())
+        if stats and stats.get('frames'):
+            total = (total or 0.0) + stats['wall'] / stats['frames']
+    return total
+
+
+def precomp_path(node):
+    """
+    Returns the precomp file pattern for a branch, under precomp/ next to the script.
+    """
+    script_dir = os.path.dirname(nuke.root().name())
+    return os.path.join(script_dir, PRECOMP_DIR, node.name(), f'{node.name()}.%04d.exr').replace('\\', '/')
+
+
+def find_candidates(frames):
+    """
+    Returns candidate branches of the enabled Writes as dicts with node, writes,
+    nodes, span, cost (seconds per frame or None) and saving (seconds per
+    render of all Writes, or None), most expensive first.
+    """
+    writes = [write for write in nuke.allNodes('Write')
+              if not write['disable'].value() and not write.name().startswith(WRITE_PREFIX)]
+    feeds = {}  # node name -> names of the Writes it feeds
+    upstream = {}  # node name -> its upstream nodes
+    nodes = {}
+    for write in writes:
+        for node in upstream_nodes(write):
+            if node is not write and _top_level(node):
+                feeds.setdefault(node.fullName(), set()).add(write.name())
+                nodes[node.fullName()] = node
+    varying = set()
+    for name, node in nodes.items():
+        upstream[name] = upstream_nodes(node)
+        if any(_varies_per_frame(other) for other in upstream[name]):
+            varying.add(name)
+
+    script_path = nuke.root().name()
+    profile = render_engine.load_node_profile(os.path.dirname(script_path), os.path.basename(script_path))
+    what = nuke.INPUTS | nuke.HIDDEN_INPUTS
+    candidates = []
+    for name, node in nodes.items():
+        if node.Class() in SKIP_CLASSES or len(upstream[name]) < 2:
+            continue
+        dependents = [other for other in node.dependent(what, forceEvaluate=False)
+                      if other.fullName() in nodes]
+        # Only the last node before the branch splits or starts varying per frame
+        shared = len(feeds[name]) > 1 and all(feeds[other.fullName()] != feeds[name] for other in dependents)
+        static_end = name not in varying and (
+            not dependents or any(other.fullName() in varying for other in dependents))
+        span = None
+        if static_end:
+            span = animated_span(compute_frame_fingerprints(node, frames))
+            if span and span[1] - span[0] + 1 > len(frames) * NARROW_FRACTION:
+                span = None
+        if not shared and span is None:
+            continue
+        cost = branch_cost(profile, upstream[name])
+        rendered = span[1] - span[0] + 1 if span else len(frames)
+        saving = None
+        if cost is not None:
+            saving = cost * (len(frames) * len(feeds[name]) - rendered)
+        candidates.append({
+            'node': node,
+            'writes': sorted(feeds[name]),
+            'nodes': len(upstream[name]),
+            'span': span,
+            'cost': cost,
+            'saving': saving,
+        })
+    candidates.sort(key=lambda candidate: (candidate['saving'] is None, -(candidate['saving'] or 0)))
+    return candidates
+
+
+def _fingerprint_location(node, frame):
+    """
+    Returns (directory, key) of the precomp fingerprints, shared by the Write and the Read.
+    """
+    filename = nuke.callbacks.filenameFilter(node['file'].evaluate(frame))
+    return os.path.dirname(filename), os.path.basename(node['file'].value())
+
+
+def queue_precomp(write, source, frames):
+    """
+    Saves the script and queues the precomp Write's frames with the branch
+    fingerprints. The Write is only enabled in the queued copy of the script,
+    so no other render recomputes the branch. Returns the job id.
+    """
+    directory, key = _fingerprint_location(write, frames[0])
+    fingerprints = compute_frame_fingerprints(source, frames)
+    nuke.scriptSave()
+    job_id = render_queue.submit_job(
+        nuke.root().name(), write.name(), frames,
+        nuke_executable=nuke.EXE_PATH,
+        output_pattern=write['file'].value(),
+        fingerprints=(directory, key, fingerprints),
+        enable_writes=[write.name()],
+    )
+    render_queue.ensure_daemon(render_queue.python_command(nuke.EXE_PATH))
+    return job_id
+
+
+def extract_precomp(candidate, frames):
+    """
+    Adds the precomp Write and the Read replacing the candidate branch, then
+    queues the precomp render. Returns (read, job_id).
+    """
+    node = candidate['node']
+    first, last = candidate['span'] or (frames[0], frames[-1])
+    path = precomp_path(node)
+    what = nuke.INPUTS | nuke.HIDDEN_INPUTS
+    dependents = node.dependent(what, forceEvaluate=False)
+    nuke.Undo.begin('Extract Precomp')
+    try:
+        write = nuke.nodes.Write(
+            file=path, file_type='exr', channels='all', raw=True, create_directories=True,
+            name=WRITE_PREFIX + node.name(), disable=True,
+        )
+        write.setInput(0, node)
+        write.setXYpos(node.xpos() - 110, node.ypos() + 60)
+        read = nuke.nodes.Read(
+            file=path, first=first, last=last, origfirst=first, origlast=last,
+            before='hold', after='hold', raw=True, on_error='black',
+            name=READ_PREFIX + node.name(),
+        )
+        read.setXYpos(node.xpos() + 110, node.ypos() + 60)
+        for knob_name, value in ((SOURCE_KNOB, node.name()), (WRITE_KNOB, write.name())):
+            knob = nuke.String_Knob(knob_name, knob_name.replace('_', ' '))
+            read.addKnob(knob)
+            knob.setValue(value)
+        for dependent in dependents:
+            for index in range(dependent.inputs()):
+                if dependent.input(index) is not None and dependent.input(index).fullName() == node.fullName():
+                    dependent.setInput(index, read)
+    finally:
+        nuke.Undo.end()
+    job_id = queue_precomp(write, node, list(range(first, last + 1)))
+    return read, job_id
+
+
+def precomp_status(read, frames):
+    """
+    Compares the branch behind a precomp Read with the fingerprints stored when
+    it rendered. Returns (state, stale frames) where state is 'current',
+    'stale', 'not rendered', 'range changed' or 'source missing'.
+    """
+    source = nuke.toNode(read[SOURCE_KNOB].value())
+    if source is None:
+        return 'source missing', []
+    first, last = int(read['first'].value()), int(read['last'].value())
+    directory, key = _fingerprint_location(read, first)
+    stored = render_engine.load_fingerprints(directory, key)
+    rendered = list(range(first, last + 1))
+    if not any(frame in stored for frame in rendered):
+        return 'not rendered', rendered
+    current = compute_frame_fingerprints(source, sorted(set(frames) | set(rendered)))
+    stale = render_engine.changed_frames(rendered, current, stored)
+    # Held frames outside the rendered range must still match the frame they hold
+    for frame in frames:
+        if (frame < first and current[frame] != stored.get(first)) or (frame > last and current[frame] != stored.get(last)):
+            return 'range changed', stale
+    return ('stale' if stale else 'current'), stale
+
+
+class PrecompExtractorPanel(QtWidgets.QWidget):
+    """
+    Lists branches worth precomputing and the precomp Reads already in the script.
+    """
+
+    def __init__(self, parent=None):
+        super(PrecompExtractorPanel, self).__init__(parent)
+        self.setWindowTitle('Precomp Extractor')
+        self.candidates = []
+        self.init_ui()
+
+    def init_ui(self):
+        self.layout = QtWidgets.QVBoxLayout(self)
+
+        hbox_buttons = QtWidgets.QHBoxLayout()
+        self.analyze_button = QtWidgets.QPushButton('Analyze Script')
+        self.extract_button = QtWidgets.QPushButton('Precomp Selected')
+        hbox_buttons.addWidget(self.analyze_button)
+        hbox_buttons.addWidget(self.extract_button)
+        self.layout.addLayout(hbox_buttons)
+
+        self.candidate_tree = QtWidgets.QTreeWidget()
+        self.candidate_tree.setHeaderLabels(['Node', 'Feeds', 'Nodes', 'Animated', 'Cost/Frame', 'Saving/Render'])
+        self.candidate_tree.setRootIsDecorated(False)
+        self.layout.addWidget(self.candidate_tree)
+
+        # Precomp Reads already swapped in (collapsible)
+        self.collapsible_precomp_group = CollapsibleWidget(title='Show Precomps')
+        self.precomp_tree = QtWidgets.QTreeWidget()
+        self.precomp_tree.setHeaderLabels(['Read', 'Source', 'Frames', 'State'])
+        self.precomp_tree.setRootIsDecorated(False)
+        self.check_button = QtWidgets.QPushButton('Check Staleness')
+        self.rerender_button = QtWidgets.QPushButton('Re-render Stale')
+        self.collapsible_precomp_group.add_widget(self.precomp_tree)
+        self.collapsible_precomp_group.add_widget(self.check_button)
+        self.collapsible_precomp_group.add_widget(self.rerender_button)
+        self.layout.addWidget(self.collapsible_precomp_group)
+
+        self.status_label = QtWidgets.QLabel('')
+        self.layout.addWidget(self.status_label)
+
+        self.analyze_button.clicked.connect(self.analyze)
+        self.extract_button.clicked.connect(self.extract_selected)
+        self.check_button.clicked.connect(self.check_precomps)
+        self.rerender_button.clicked.connect(self.rerender_stale)
+
+    def script_frames(self):
+        root = nuke.root()
+        return list(range(int(root['first_frame'].value()), int(root['last_frame'].value()) + 1))
+
+    def analyze(self):
+        """
+        Finds candidate branches and lists them, most time saved first.
+        """
+        self.candidates = find_candidates(self.script_frames())
+        self.candidate_tree.clear()
+        for candidate in self.candidates:
+            span = candidate['span']
+            self.candidate_tree.addTopLevelItem(QtWidgets.QTreeWidgetItem([
+                candidate['node'].name(),
+                ', '.join(candidate['writes']),
+                str(candidate['nodes']),
+                f"{span[0]}-{span[1]}" if span else 'all frames',
+                f"{candidate['cost']:.2f}s" if candidate['cost'] is not None else 'not profiled',
+                f"{candidate['saving']:.0f}s" if candidate['saving'] is not None else '',
+            ]))
+        for column in range(self.candidate_tree.columnCount()):
+            self.candidate_tree.resizeColumnToContents(column)
+        if any(candidate['cost'] is None for candidate in self.candidates):
+            self.status_label.setText(
+                f"{len(self.candidates)} candidates. Render with \"Profile Nodes\" on to estimate their cost.")
+        else:
+            self.status_label.setText(f"{len(self.candidates)} candidates.")
+        self.check_precomps()
+
+    def extract_selected(self):
+        """
+        Offers to precomp the selected branch and swap a Read in for it.
+        """
+        item = self.candidate_tree.currentItem()
+        if item is None:
+            nuke.message("Select a branch to precomp.")
+            return
+        candidate = self.candidates[self.candidate_tree.indexOfTopLevelItem(item)]
+        frames = self.script_frames()
+        span = candidate['span'] or (frames[0], frames[-1])
+        if not nuke.ask(f"Render {candidate['node'].name()} once for frames {span[0]}-{span[1]} to\n"
+                        f"{precomp_path(candidate['node'])}\n"
+                        f"and read it back into {', '.join(candidate['writes'])}?"):
+            return
+        try:
+            read, job_id = extract_precomp(candidate, frames)
+        except Exception as e:
+            nuke.message(f"Could not extract precomp:\n{e}")
+            logging.error(f"Could not extract precomp for {candidate['node'].name()}: {e}")
+            return
+        message = f"Queued job {job_id} for {read.name()}."
+        self.status_label.setText(message)
+        logging.info(message)
+        self.analyze()
+
+    def precomp_reads(self):
+        return [node for node in nuke.allNodes('Read') if SOURCE_KNOB in node.knobs()]
+
+    def check_precomps(self):
+        """
+        Lists the precomp Reads with their staleness.
+        """
+        frames = self.script_frames()
+        self.precomp_tree.clear()
+        for read in self.precomp_reads():
+            state, stale = precomp_status(read, frames)
+            if stale and state == 'stale':
+                state = f"stale ({len(stale)} frames)"
+            self.precomp_tree.addTopLevelItem(QtWidgets.QTreeWidgetItem([
+                read.name(),
+                read[SOURCE_KNOB].value(),
+                f"{int(read['first'].value())}-{int(read['last'].value())}",
+                state,
+            ]))
+        for column in range(self.precomp_tree.columnCount()):
+            self.precomp_tree.resizeColumnToContents(column)
+
+    def rerender_stale(self):
+        """
+        Queues the stale frames of every precomp. Precomps whose animated range
+        moved are extracted again from their source branch.
+        """
+        frames = self.script_frames()
+        queued = []
+        for read in self.precomp_reads():
+            state, stale = precomp_status(read, frames)
+            write = nuke.toNode(read[WRITE_KNOB].value())
+            if state in ('current', 'source missing') or write is None:
+                continue
+            if state == 'range changed':
+                source = nuke.toNode(read[SOURCE_KNOB].value())
+                span = animated_span(compute_frame_fingerprints(source, frames)) or (frames[0], frames[-1])
+                for knob in ('first', 'origfirst'):
+                    read[knob].setValue(span[0])
+                for knob in ('last', 'origlast'):
+                    read[knob].setValue(span[1])
+                stale = list(range(span[0], span[1] + 1))
+            try:
+                queued.append(queue_precomp(write, nuke.toNode(read[SOURCE_KNOB].value()), stale))
+            except Exception as e:
+                nuke.message(f"Could not queue {write.name()}:\n{e}")
+                logging.error(f"Could not queue {write.name()}: {e}")
+        self.status_label.setText(f"Queued {len(queued)} precomp jobs." if queued else "No stale precomps.")
+        self.check_precomps()
+
+
+# Register the panel to make it dockable
+def precomp_extractor_panel():
+    return PrecompExtractorPanel()
+
+nukescripts.registerWidgetAsPanel('precomp_extractor.PrecompExtractorPanel', 'Precomp Extractor', 'uk.co.thefoundry.PrecompExtractorPanel')
+
+# Add menu item to open the panel
+nuke.menu('Pane').addCommand('Precomp Extractor', lambda: nukescripts.panels.restorePanel('uk.co.thefoundry.PrecompExtractorPanel'))
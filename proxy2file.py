@@ -1,418 +1,73 @@
 import nuke
 import nukescripts
 from PySide6 import QtWidgets, QtCore
-import os
-import re
-import glob
-import threading
+import concurrent.futures
 
-# Global cache to avoid redundant scans
-FRAME_RANGE_CACHE = {}
+import sequence_scan
+
+# Ranges persisted under ~/.nuke, reused while their directory is unchanged
+FRAME_RANGE_CACHE = sequence_scan.RangeCache()
+
+# Scanned directories kept indexed between operations, updated as frames land
+DIRECTORY_WATCHER = sequence_scan.DirectoryWatcher()
+
+# Nodes scanned at the same time, and how often scan progress is redrawn (10 Hz)
+SCAN_WORKERS = 8
+SCAN_REFRESH_MS = 100
+
+# Read 'on_error' values offered for Reads with missing frames
+MISSING_FRAMES_MODES = ['error', 'black', 'checkerboard', 'nearest frame']
 
 class FileScanner(QtCore.QObject):
+    """Runs a SequenceScanner on a pool thread; its signals reach the panel queued."""
     progress_updated = QtCore.Signal(int, str)
     scan_complete = QtCore.Signal(int, int)
+    scan_empty = QtCore.Signal()
+    scan_failed = QtCore.Signal(str)
     
-    def __init__(self, path):
+    def __init__(self, path, session=None, seeds=()):
         super(FileScanner, self).__init__()
         self.path = path
+        # Frames likely to exist, tried first if the directory has to be probed
+        self.seeds = seeds
         self.running = False
+        # Present frames of the last scan, or None if the range was probed
+        self.frame_set = None
         # Use global cache
         self._cache = FRAME_RANGE_CACHE
+        # Directory listings shared with the other scanners of the same operation
+        self.session = session or sequence_scan.ScanSession()
+        # The Nuke-free scan this object relays as signals
+        self._scanner = sequence_scan.SequenceScanner(path, self.session, self._cache, seeds,
+                                                      on_progress=self.progress_updated.emit)
         
     def scan(self):
-        """Fast scan directory to determine frame range of sequence."""
+        """Scan the sequence and emit its frame range, or scan_empty if no frame is found."""
         self.running = True
-        directory = os.path.dirname(self.path)
-        basename = os.path.basename(self.path)
-        
-        # Check cache first
-        cache_key = f"{directory}:{basename}"
-        if cache_key in self._cache:
-            first, last = self._cache[cache_key]
-            self.scan_complete.emit(first, last)
-            self.running = False
-            return
-
-        # Check if this is a sequence
-        sequence_pattern = re.search(r'(%\d*d|#+)', basename)
-        if not sequence_pattern:
-            self.scan_complete.emit(1, 1)
-            self.running = False
-            return
-
-        self.progress_updated.emit(0, "Analyzing file pattern...")
-        
-        # Skip inference and go directly to full scan methods
-        try:
-            # Fast access scan - only check first and last files by sorted order
-            first, last = self._fast_scan(directory, basename)
-            if first is not None and last is not None:
-                self._cache[cache_key] = (first, last)
-                self.scan_complete.emit(first, last)
-                self.running = False
-                return
-        except Exception as e:
-            self.progress_updated.emit(40, f"Fast scan failed, trying full scan: {str(e)}")
-            
-        # Final fallback - use traditional scan but with optimizations
         try:
-            first, last = self._traditional_scan(directory, basename)
-            if first is not None and last is not None:
-                self._cache[cache_key] = (first, last)
-                self.scan_complete.emit(first, last)
-                self.running = False
-                return
+            result = self._scanner.scan()
         except Exception as e:
-            self.progress_updated.emit(90, f"Full scan failed: {str(e)}")
-            
-        # Default if all methods fail
-        self.scan_complete.emit(1, 1)
+            self.running = False
+            self.scan_failed.emit(str(e))
+            return
+        self.frame_set = result.frame_set
         self.running = False
-    
-    def _infer_frame_range(self, directory, basename):
-        """Try to infer frame range directly from context without scanning files."""
-        # Check common frame patterns for VFX sequences (1001-1100, etc.)
-        common_ranges = [(1, 100), (1001, 1100), (0, 100), (101, 200)]
-        pattern_matches = self._get_frame_pattern(basename)
-        if not pattern_matches:
-            return None, None
-            
-        start_pattern, end_pattern, frame_pattern = pattern_matches
-        
-        self.progress_updated.emit(10, "Checking common frame ranges...")
-        
-        # Check if any common ranges exist without scanning the whole directory
-        for first, last in common_ranges:
-            # Check if first frame exists
-            first_path = self._format_path_with_frame(basename, directory, first)
-            if os.path.exists(first_path):
-                # Check if last frame exists
-                last_path = self._format_path_with_frame(basename, directory, last)
-                if os.path.exists(last_path):
-                    return first, last
-                    
-        return None, None
-    
-    def _fast_scan(self, directory, basename):
-        """Fast scan using os.scandir and sorting optimization to find true range."""
-        pattern_matches = self._get_frame_pattern(basename)
-        if not pattern_matches:
-            return None, None
-            
-        start_pattern, end_pattern, frame_pattern = pattern_matches
-        
-        # Create partial pattern to match with scandir
-        # This is much faster than glob on network drives
-        self.progress_updated.emit(20, "Fast scanning directory...")
-        
-        # Only check if directory exists and is accessible
-        if not os.path.exists(directory):
-            return None, None
-            
-        # Quick scan to check frames
-        try:
-            # Only get filenames that start with our prefix
-            matching_files = []
-            file_count = 0
-            self.progress_updated.emit(25, "Listing files in directory...")
-            
-            for entry in os.scandir(directory):
-                if not self.running:
-                    return None, None
-                
-                if file_count % 1000 == 0:
-                    self.progress_updated.emit(25 + min(25, file_count // 1000), 
-                                              f"Examining files: {file_count} found...")
-                
-                if entry.is_file() and entry.name.startswith(start_pattern):
-                    matching_files.append(entry.name)
-                    file_count += 1
-                    
-            # Exit early if no files found
-            if not matching_files:
-                return None, None
-                
-            # Sort filenames (much faster than globbing everything)
-            self.progress_updated.emit(50, f"Sorting {len(matching_files)} files...")
-            matching_files.sort()
-            
-            # Process all matching files to extract frame numbers
-            frames = []
-            min_frame = 99999999
-            max_frame = -1
-            
-            # Sample approach to save time with huge sequences
-            if len(matching_files) > 1000:
-                self.progress_updated.emit(60, "Large sequence detected, sampling frames...")
-                # For very large sequences, sample files from start, middle, and end
-                sample_size = 100
-                step = max(1, len(matching_files) // sample_size)
-                sample_indices = list(range(0, len(matching_files), step))
-                # Always include first and last files
-                if len(matching_files)-1 not in sample_indices:
-                    sample_indices.append(len(matching_files)-1)
-                if 0 not in sample_indices:
-                    sample_indices.insert(0, 0)
-                
-                # Process samples
-                for i, idx in enumerate(sample_indices):
-                    if not self.running:
-                        return None, None
-                    
-                    self.progress_updated.emit(60 + (i * 20) // len(sample_indices), 
-                                              f"Processing file {i+1} of {len(sample_indices)}...")
-                    
-                    filename = matching_files[idx]
-                    match = frame_pattern.match(filename)
-                    if match:
-                        try:
-                            frame = int(match.group(1))
-                            min_frame = min(min_frame, frame)
-                            max_frame = max(max_frame, frame)
-                        except:
-                            pass
-                            
-                # Ensure we check boundary frames directly for accuracy
-                self.progress_updated.emit(80, "Verifying frame boundaries...")
-                
-                # Verify first frame
-                first_file = matching_files[0]
-                match = frame_pattern.match(first_file)
-                if match:
-                    try:
-                        frame = int(match.group(1))
-                        min_frame = min(min_frame, frame)
-                    except:
-                        pass
-                
-                # Verify last frame
-                last_file = matching_files[-1]
-                match = frame_pattern.match(last_file)
-                if match:
-                    try:
-                        frame = int(match.group(1))
-                        max_frame = max(max_frame, frame)
-                    except:
-                        pass
-                
-                if min_frame < 99999999 and max_frame > -1:
-                    self.progress_updated.emit(90, f"Found range: {min_frame}-{max_frame}")
-                    return min_frame, max_frame
-            else:
-                # For smaller sequences, process all files
-                self.progress_updated.emit(60, "Processing all frames...")
-                
-                for i, filename in enumerate(matching_files):
-                    if i % 100 == 0:
-                        progress = 60 + (i * 30) // len(matching_files)
-                        self.progress_updated.emit(progress, f"Processing file {i+1} of {len(matching_files)}...")
-                    
-                    match = frame_pattern.match(filename)
-                    if match:
-                        try:
-                            frame = int(match.group(1))
-                            frames.append(frame)
-                        except:
-                            pass
-                
-                if frames:
-                    min_frame = min(frames)
-                    max_frame = max(frames)
-                    self.progress_updated.emit(90, f"Found range: {min_frame}-{max_frame}")
-                    return min_frame, max_frame
-                
-        except Exception as e:
-            self.progress_updated.emit(85, f"Error in fast scan: {str(e)}")
-            
-        return None, None
-        
-    def _traditional_scan(self, directory, basename):
-        """Traditional scan with optimizations for speed and handling large frame ranges."""
-        self.progress_updated.emit(50, "Performing detailed scan...")
-        
-        pattern_matches = self._get_frame_pattern(basename)
-        if not pattern_matches:
-            return None, None
-            
-        start_pattern, end_pattern, frame_pattern = pattern_matches
-        
-        frames = []
-        try:
-            # Use a set for faster lookups
-            frame_set = set()
-            
-            # Algorithm: check files with a binary search approach
-            # Start with common frames, then extend outward
-            common_frames = [1, 1001, 0, 101, 10001, 100001]  # Add higher frame numbers
-            
-            # Check common frames first
-            self.progress_updated.emit(55, "Checking common frame numbers...")
-            for frame in common_frames:
-                test_path = self._format_path_with_frame(basename, directory, frame)
-                if os.path.exists(test_path):
-                    frame_set.add(frame)
-            
-            if frame_set:
-                # We found at least one frame, now check boundaries
-                min_frame = min(frame_set)
-                max_frame = max(frame_set)
-                
-                # Check lower bounds with exponential backoff
-                self.progress_updated.emit(60, "Searching for first frame...")
-                step = 1
-                while True:
-                    if not self.running:
-                        return None, None
-                        
-                    test_frame = min_frame - step
-                    if test_frame < 0:
-                        break
-                        
-                    test_path = self._format_path_with_frame(basename, directory, test_frame)
-                    if os.path.exists(test_path):
-                        frame_set.add(test_frame)
-                        min_frame = test_frame
-                    else:
-                        # Try one more step, then break if not found
-                        last_chance = test_frame - 1
-                        if last_chance >= 0:
-                            test_path = self._format_path_with_frame(basename, directory, last_chance)
-                            if os.path.exists(test_path):
-                                frame_set.add(last_chance)
-                                min_frame = last_chance
-                        break
-                    
-                    step *= 2
-                
-                # Check upper bounds with exponential increase up to 150000
-                self.progress_updated.emit(70, "Searching for last frame...")
-                step = 1
-                max_possible_frame = 150000  # Set max frame limit
-                
-                while max_frame < max_possible_frame:
-                    if not self.running:
-                        return None, None
-                        
-                    test_frame = max_frame + step
-                    if test_frame > max_possible_frame:
-                        break
-                        
-                    test_path = self._format_path_with_frame(basename, directory, test_frame)
-                    if os.path.exists(test_path):
-                        frame_set.add(test_frame)
-                        max_frame = test_frame
-                        self.progress_updated.emit(70, f"Found frame {max_frame}...")
-                    else:
-                        # Binary search to find the exact last frame
-                        lower = max_frame + 1
-                        upper = test_frame - 1
-                        
-                        # Only do binary search if gap is significant
-                        if upper - lower > 10:
-                            self.progress_updated.emit(80, f"Narrowing down last frame between {lower}-{upper}...")
-                            while lower <= upper:
-                                if not self.running:
-                                    return None, None
-                                    
-                                mid = (lower + upper) // 2
-                                test_path = self._format_path_with_frame(basename, directory, mid)
-                                if os.path.exists(test_path):
-                                    frame_set.add(mid)
-                                    max_frame = max(max_frame, mid)
-                                    lower = mid + 1
-                                else:
-                                    upper = mid - 1
-                        
-                        # Linear search for the last few frames
-                        self.progress_updated.emit(85, "Final check for last frame...")
-                        for frame in range(max_frame + 1, max_frame + 20):
-                            test_path = self._format_path_with_frame(basename, directory, frame)
-                            if os.path.exists(test_path):
-                                frame_set.add(frame)
-                                max_frame = frame
-                            else:
-                                break
-                                
-                        break
-                    
-                    # Use exponential step to find upper bound faster
-                    step *= 2
-                
-                frames = list(frame_set)
-                
-            if frames:
-                self.progress_updated.emit(95, f"Found range: {min(frames)}-{max(frames)}")
-                return min(frames), max(frames)
-                
-        except Exception as e:
-            self.progress_updated.emit(95, f"Error in traditional scan: {str(e)}")
-        
-        return None, None
-    
-    def _get_frame_pattern(self, basename):
-        """Parse filename to get frame pattern parts."""
-        try:
-            if '%' in basename and 'd' in basename:
-                # %04d notation
-                pattern_parts = re.split(r'(%\d*d)', basename)
-                if len(pattern_parts) >= 3:
-                    start_pattern = pattern_parts[0]
-                    end_pattern = ''.join(pattern_parts[2:])
-                    # Escape for regex use
-                    regex_pattern = f"^{re.escape(start_pattern)}(\\d+){re.escape(end_pattern)}$"
-                    frame_pattern = re.compile(regex_pattern)
-                    return start_pattern, end_pattern, frame_pattern
-            else:
-                # #### notation
-                hash_match = re.search(r'(#+)', basename)
-                if hash_match:
-                    hash_str = hash_match.group(1)
-                    pattern_parts = basename.split(hash_str, 1)
-                    if len(pattern_parts) == 2:
-                        start_pattern = pattern_parts[0]
-                        end_pattern = pattern_parts[1]
-                        # Escape for regex use
-                        regex_pattern = f"^{re.escape(start_pattern)}(\\d+){re.escape(end_pattern)}$"
-                        frame_pattern = re.compile(regex_pattern)
-                        return start_pattern, end_pattern, frame_pattern
-                        
-        except Exception as e:
-            pass
-            
-        return None
-        
-    def _format_path_with_frame(self, basename, directory, frame):
-        """Format path with frame number."""
-        if '%' in basename and 'd' in basename:
-            try:
-                frame_path = basename % frame
-                return os.path.join(directory, frame_path)
-            except:
-                pass
+        if result.first is None:
+            self.scan_empty.emit()
         else:
-            # #### format
-            hash_match = re.search(r'(#+)', basename)
-            if hash_match:
-                hash_str = hash_match.group(1)
-                hash_len = len(hash_str)
-                frame_str = str(frame).zfill(hash_len)
-                frame_path = basename.replace(hash_str, frame_str)
-                return os.path.join(directory, frame_path)
-                
-        # If no formatting possible, just return as is
-        return os.path.join(directory, basename)
+            self.scan_complete.emit(result.first, result.last)
     
     def stop(self):
         self.running = False
+        self._scanner.stop()
 
 
 class FileProxySwitcherPanel(QtWidgets.QWidget):
     def __init__(self, parent=None):
         super(FileProxySwitcherPanel, self).__init__(parent)
         
-        # Shared scanner cache
-        self.scanner_cache = {}
+        # Directory listings shared by every scan of the current operation
+        self.scan_session = None
         
         # Create layout
         self.main_layout = QtWidgets.QVBoxLayout()
@@ -454,6 +109,27 @@ class FileProxySwitcherPanel(QtWidgets.QWidget):
         
         self.main_layout.addWidget(range_group)
         
+        # Missing frames found by the scan, per Read
+        missing_group = QtWidgets.QGroupBox("Missing Frames")
+        missing_layout = QtWidgets.QVBoxLayout()
+        missing_group.setLayout(missing_layout)
+        
+        missing_mode_layout = QtWidgets.QHBoxLayout()
+        self.set_missing_frames_checkbox = QtWidgets.QCheckBox("Set Missing Frames on Reads with gaps:")
+        self.missing_frames_combo = QtWidgets.QComboBox()
+        self.missing_frames_combo.addItems(MISSING_FRAMES_MODES)
+        self.missing_frames_combo.setCurrentText('nearest frame')
+        missing_mode_layout.addWidget(self.set_missing_frames_checkbox)
+        missing_mode_layout.addWidget(self.missing_frames_combo)
+        missing_layout.addLayout(missing_mode_layout)
+        
+        self.missing_frames_report = QtWidgets.QPlainTextEdit()
+        self.missing_frames_report.setReadOnly(True)
+        self.missing_frames_report.setMaximumHeight(120)
+        missing_layout.addWidget(self.missing_frames_report)
+        
+        self.main_layout.addWidget(missing_group)
+        
         # Progress section
         progress_group = QtWidgets.QGroupBox("Progress")
         progress_layout = QtWidgets.QVBoxLayout()
@@ -489,12 +165,18 @@ class FileProxySwitcherPanel(QtWidgets.QWidget):
         # Add stretch to keep UI compact
         self.main_layout.addStretch()
         
-        # Initialize scanner and thread
-        self.scanner = None
-        self.scanner_thread = None
+        # Initialize scanners and their pool
+        self.scan_jobs = []  # (read_node, FileScanner)
+        self.scan_index = {}  # FileScanner -> index in scan_jobs
+        self.scan_results = {}  # index -> (first, last, frame_set), or None if the scan failed
+        self.scan_progress = {}  # index -> latest percent of a running scan
+        self.scan_message = ""
+        self.scan_executor = None
+        # Scanner signals only record state; this timer draws it at most 10 times a second
+        self.scan_timer = QtCore.QTimer(self)
+        self.scan_timer.timeout.connect(self.refresh_scan_progress)
         self.current_operation = None
         self.current_read_nodes = []
-        self.current_node_index = 0
         
         # Set fixed width for better appearance in dockable panel
         self.setMinimumWidth(300)
@@ -516,6 +198,10 @@ class FileProxySwitcherPanel(QtWidgets.QWidget):
         # Begin undo command
         nuke.Undo.begin("File/Proxy Switcher")
         
+        # Each directory is listed once for all nodes, file and proxy paths alike
+        self.scan_session = sequence_scan.ScanSession(DIRECTORY_WATCHER)
+        self.missing_frames_report.clear()
+        
         # Determine operation
         if self.file_to_proxy_radio.isChecked():
             self.current_operation = "file_to_proxy"
@@ -528,37 +214,22 @@ class FileProxySwitcherPanel(QtWidgets.QWidget):
         
         # Execute operation
         try:
-            # First phase - copy operations (fast)
-            if self.current_operation == "file_to_proxy":
-                for i, read_node in enumerate(self.current_read_nodes):
-                    progress = int((i / len(self.current_read_nodes)) * 100)
-                    self.progress_bar.setValue(progress)
-                    self.status_label.setText(f"Copying file to proxy: node {i+1} of {len(self.current_read_nodes)}")
-                    QtWidgets.QApplication.instance().processEvents(QtCore.QEventLoop.ExcludeUserInputEvents)
-                    self.copy_file_to_proxy(read_node)
-            
-            elif self.current_operation == "proxy_to_file":
-                for i, read_node in enumerate(self.current_read_nodes):
-                    progress = int((i / len(self.current_read_nodes)) * 100)
-                    self.progress_bar.setValue(progress)
-                    self.status_label.setText(f"Copying proxy to file: node {i+1} of {len(self.current_read_nodes)}")
-                    QtWidgets.QApplication.instance().processEvents(QtCore.QEventLoop.ExcludeUserInputEvents)
-                    self.copy_proxy_to_file(read_node)
-                    
-            elif self.current_operation == "swap_file_proxy":
-                for i, read_node in enumerate(self.current_read_nodes):
-                    progress = int((i / len(self.current_read_nodes)) * 100)
-                    self.progress_bar.setValue(progress)
-                    self.status_label.setText(f"Swapping file and proxy: node {i+1} of {len(self.current_read_nodes)}")
-                    QtWidgets.QApplication.instance().processEvents(QtCore.QEventLoop.ExcludeUserInputEvents)
-                    self.swap_file_and_proxy(read_node)
+            # First phase - copy operations (fast knob changes, so no event processing in between)
+            copy_operations = {
+                "file_to_proxy": ("Copying file to proxy", self.copy_file_to_proxy),
+                "proxy_to_file": ("Copying proxy to file", self.copy_proxy_to_file),
+                "swap_file_proxy": ("Swapping file and proxy", self.swap_file_and_proxy),
+            }
+            if self.current_operation in copy_operations:
+                label, copy = copy_operations[self.current_operation]
+                self.status_label.setText(f"{label} on {len(self.current_read_nodes)} nodes...")
+                for read_node in self.current_read_nodes:
+                    copy(read_node)
             
             # Second phase - handle frame range updates (can be slow)
             if (not self.keep_original_range_radio.isChecked() or 
                 self.current_operation == "update_range"):
-                # Start with first node
-                self.current_node_index = 0
-                self.process_next_node_range()
+                self.process_node_ranges()
             else:
                 # No range updates needed
                 self.finish_operation()
@@ -588,129 +259,166 @@ class FileProxySwitcherPanel(QtWidgets.QWidget):
         read_node['file'].fromScript(proxy_script)
         read_node['proxy'].fromScript(file_script)
     
-    def process_next_node_range(self):
-        """Process frame range for the current node and move to next."""
-        # Apply a small pause to prevent UI freezing
-        QtCore.QTimer.singleShot(1, self._continue_processing)
-        
-    def _continue_processing(self):
-        """Continue processing after a brief pause for UI updates."""
-        if self.current_node_index >= len(self.current_read_nodes):
-            # All nodes processed
+    def process_node_ranges(self):
+        """Scan the frame ranges of all selected nodes concurrently."""
+        if self.use_file_range_radio.isChecked():
+            knob_name = 'file'
+        elif self.use_proxy_range_radio.isChecked():
+            knob_name = 'proxy'
+        else:
             self.finish_operation()
             return
         
-        # Get current node
-        read_node = self.current_read_nodes[self.current_node_index]
-        node_name = read_node.name()
-        
-        # Update progress
-        node_progress = int((self.current_node_index / len(self.current_read_nodes)) * 100)
-        self.progress_bar.setValue(node_progress)
+        # Knob values are read here, on the main thread; nodes without a path are skipped
+        self.scan_jobs = []
+        for read_node in self.current_read_nodes:
+            path = read_node[knob_name].value()
+            if path:
+                seeds = (int(read_node['first'].value()), int(read_node['last'].value()))
+                self.scan_jobs.append((read_node, FileScanner(path, self.scan_session, seeds)))
+        if not self.scan_jobs:
+            self.finish_operation()
+            return
         
-        # Choose which range to update
-        if self.use_file_range_radio.isChecked():
-            file_path = read_node['file'].value()
-            if not file_path:
-                # Skip to next node
-                self.current_node_index += 1
-                self.process_next_node_range()
-                return
-                
-            self.status_label.setText(f"Scanning file range for {node_name} ({self.current_node_index+1}/{len(self.current_read_nodes)})")
-            self.execute_button.setEnabled(False)
-            self.cancel_button.setEnabled(True)
-            
-            # Create scanner for this file
-            self.scanner = FileScanner(file_path)
-            self.scanner.progress_updated.connect(self.update_scan_progress)
-            self.scanner.scan_complete.connect(self.file_range_complete)
-            
-            # Start scanner in a thread
-            self.scanner_thread = threading.Thread(target=self.scanner.scan)
-            self.scanner_thread.daemon = True
-            self.scanner_thread.start()
-            
-        elif self.use_proxy_range_radio.isChecked():
-            proxy_path = read_node['proxy'].value()
-            if not proxy_path:
-                # Skip to next node
-                self.current_node_index += 1
-                self.process_next_node_range()
-                return
-                
-            self.status_label.setText(f"Scanning proxy range for {node_name} ({self.current_node_index+1}/{len(self.current_read_nodes)})")
-            self.execute_button.setEnabled(False)
-            self.cancel_button.setEnabled(True)
-            
-            # Create scanner for this file
-            self.scanner = FileScanner(proxy_path)
-            self.scanner.progress_updated.connect(self.update_scan_progress)
-            self.scanner.scan_complete.connect(self.proxy_range_complete)
-            
-            # Start scanner in a thread
-            self.scanner_thread = threading.Thread(target=self.scanner.scan)
-            self.scanner_thread.daemon = True
-            self.scanner_thread.start()
-        else:
-            # Skip to next node
-            self.current_node_index += 1
-            self.process_next_node_range()
+        self.status_label.setText(f"Scanning {knob_name} ranges of {len(self.scan_jobs)} nodes...")
+        self.execute_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        
+        # Scanners belong to this thread, so their signals from pool threads are queued here
+        self.scan_index = {}
+        self.scan_results = {}
+        self.scan_progress = {}
+        self.scan_message = ""
+        for index, (_, scanner) in enumerate(self.scan_jobs):
+            self.scan_index[scanner] = index
+            scanner.progress_updated.connect(self.scanner_progress, QtCore.Qt.QueuedConnection)
+            scanner.scan_complete.connect(self.scanner_complete, QtCore.Qt.QueuedConnection)
+            scanner.scan_empty.connect(self.scanner_empty, QtCore.Qt.QueuedConnection)
+            scanner.scan_failed.connect(self.scanner_failed, QtCore.Qt.QueuedConnection)
+        
+        self.scan_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(SCAN_WORKERS, len(self.scan_jobs)), thread_name_prefix='proxy2file_scan')
+        for _, scanner in self.scan_jobs:
+            self.scan_executor.submit(scanner.scan)
+        self.scan_timer.start(SCAN_REFRESH_MS)
     
-    def update_scan_progress(self, progress, status):
-        """Update progress bar and status for current scan."""
-        # Calculate progress as a combination of node progress and scan progress
-        node_weight = self.current_node_index / len(self.current_read_nodes)
-        scan_weight = 1.0 / len(self.current_read_nodes)
-        total_progress = int((node_weight + (progress/100.0) * scan_weight) * 100)
-        
-        self.progress_bar.setValue(total_progress)
-        self.status_label.setText(status)
-        
-        # Process events to keep UI responsive, but don't process too many
-        # This technique prevents UI freezing while avoiding excessive event processing
-        QtWidgets.QApplication.instance().processEvents(QtCore.QEventLoop.ExcludeUserInputEvents)
+    @QtCore.Slot(int, str)
+    def scanner_progress(self, percent, message):
+        """Record a scanner's progress; refresh_scan_progress draws it."""
+        index = self.scan_index.get(self.sender())
+        if index is not None and index not in self.scan_results:
+            self.scan_progress[index] = percent
+            self.scan_message = message
     
-    def file_range_complete(self, first, last):
-        if self.current_node_index < len(self.current_read_nodes):
-            read_node = self.current_read_nodes[self.current_node_index]
-            
-            # Set the frame range on the node
-            read_node['first'].setValue(first)
-            read_node['last'].setValue(last)
-            read_node['origfirst'].setValue(first)
-            read_node['origlast'].setValue(last)
-            
-            # Update progress status
-            self.status_label.setText(f"Set range {first}-{last} on {read_node.name()}")
-            
-            # Move to next node
-            self.current_node_index += 1
-            self.process_next_node_range()
+    @QtCore.Slot(int, int)
+    def scanner_complete(self, first, last):
+        scanner = self.sender()
+        index = self.scan_index.get(scanner)
+        if index is not None:
+            self.scanner_done(index, (first, last, scanner.frame_set))
     
-    def proxy_range_complete(self, first, last):
-        if self.current_node_index < len(self.current_read_nodes):
-            read_node = self.current_read_nodes[self.current_node_index]
-            
-            # Set the frame range on the node
+    @QtCore.Slot()
+    def scanner_empty(self):
+        """No frame of the sequence exists; recorded as a range of None."""
+        index = self.scan_index.get(self.sender())
+        if index is not None:
+            self.scanner_done(index, (None, None, None))
+    
+    @QtCore.Slot(str)
+    def scanner_failed(self, message):
+        index = self.scan_index.get(self.sender())
+        if index is not None:
+            self.scan_message = f"Scan failed: {message}"
+            self.scanner_done(index, None)
+    
+    def scanner_done(self, index, result):
+        """Store one node's result; apply all ranges once every scan is done."""
+        self.scan_results[index] = result
+        self.scan_progress.pop(index, None)
+        if len(self.scan_results) == len(self.scan_jobs):
+            self.scan_timer.stop()
+            self.scan_executor.shutdown(wait=False)
+            self.apply_scan_results()
+    
+    def refresh_scan_progress(self):
+        """Show overall progress, counting each running scan by its own percent."""
+        total = len(self.scan_jobs)
+        if not total:
+            return
+        done = len(self.scan_results)
+        self.progress_bar.setValue(int((done * 100 + sum(self.scan_progress.values())) / total))
+        message = f" - {self.scan_message}" if self.scan_message else ""
+        self.status_label.setText(f"Scanned {done} of {total} nodes{message}")
+    
+    def clear_scan_jobs(self):
+        for _, scanner in self.scan_jobs:
+            scanner.progress_updated.disconnect(self.scanner_progress)
+            scanner.scan_complete.disconnect(self.scanner_complete)
+            scanner.scan_empty.disconnect(self.scanner_empty)
+            scanner.scan_failed.disconnect(self.scanner_failed)
+        self.scan_jobs = []
+        self.scan_index = {}
+        self.scan_results = {}
+        self.scan_progress = {}
+        self.scan_message = ""
+    
+    def apply_scan_results(self):
+        """Set first/last/origfirst/origlast on every scanned node in one batch,
+        and report the frames missing from each sequence."""
+        updated = 0
+        incomplete = 0
+        empty = 0
+        report = []
+        missing_mode = (self.missing_frames_combo.currentText()
+                        if self.set_missing_frames_checkbox.isChecked() else None)
+        for index, (read_node, scanner) in enumerate(self.scan_jobs):
+            result = self.scan_results.get(index)
+            if result is None:
+                continue
+            first, last, frame_set = result
+            if first is None:
+                # Keep the node's range rather than guessing one
+                empty += 1
+                report.append(f"{read_node.name()}: no frames found, range left unchanged")
+                continue
             read_node['first'].setValue(first)
             read_node['last'].setValue(last)
             read_node['origfirst'].setValue(first)
             read_node['origlast'].setValue(last)
+            updated += 1
             
-            # Update progress status
-            self.status_label.setText(f"Set range {first}-{last} on {read_node.name()}")
-            
-            # Move to next node
-            self.current_node_index += 1
-            self.process_next_node_range()
+            # Gaps come from the same listing as the range; probed ranges have none
+            if frame_set is None:
+                report.append(f"{read_node.name()}: {first}-{last}, gaps not checked")
+                continue
+            gaps = frame_set.gaps()
+            if not gaps:
+                continue
+            incomplete += 1
+            report.append(f"{read_node.name()}: {frame_set.missing_count()} missing "
+                          f"({sequence_scan.format_ranges(gaps)})")
+            if missing_mode and 'on_error' in read_node.knobs():
+                read_node['on_error'].setValue(missing_mode)
+        self.missing_frames_report.setPlainText('\n'.join(report) or "No missing frames")
+        self.clear_scan_jobs()
+        self.finish_operation()
+        status = f"Set frame ranges on {updated} nodes, {incomplete} with missing frames"
+        if empty:
+            status += f", {empty} with no frames found"
+        self.status_label.setText(status)
     
     def cancel_operation(self):
-        if self.scanner:
-            self.scanner.stop()
+        self.scan_timer.stop()
+        for _, scanner in self.scan_jobs:
+            scanner.stop()
+        if self.scan_executor:
+            self.scan_executor.shutdown(wait=False, cancel_futures=True)
+        # Signals still queued from running scanners are ignored from here on
+        self.clear_scan_jobs()
         
         # Clean up
         nuke.Undo.end()
+        self.scan_session = None
         self.reset_progress()
         self.execute_button.setEnabled(True)
         self.cancel_button.setEnabled(False)
@@ -718,6 +426,7 @@ class FileProxySwitcherPanel(QtWidgets.QWidget):
     def finish_operation(self):
         # End undo command
         nuke.Undo.end()
+        self.scan_session = None
         
         # Update UI
         self.progress_bar.setValue(100)
@@ -0,0 +1,1501 @@
+# Filename: render_engine.py
+"""
+Nuke-free core of the Render Progress Panel.
+
+Everything in here runs without a Nuke licence or a Qt binding so the same
+command construction and process monitoring can be driven from the panel,
+from command-line tools and from the benchmarks in ``benchmarks/``.
+"""
+
+import os
+import re
+import sys
+import json
+import errno
+import select
+import signal
+import struct
+import subprocess
+import threading
+import time
+import queue
+import logging
+import concurrent.futures
+import ctypes
+import ctypes.util
+import xml.etree.ElementTree as ElementTree
+
+import sequence_scan
+
+# psutil is optional; only process throttling and pausing on Windows need it
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Result states returned by RenderWorker.run()
+RENDER_FINISHED = 'finished'
+RENDER_STOPPED = 'stopped'
+RENDER_FAILED = 'failed'
+
+# How long the monitor loop blocks waiting for process output
+POLL_INTERVAL = 0.1
+
+# Hang watchdog: a worker is hung when no frame finishes within HANG_FACTOR
+# times its running per-frame estimate (never less than HANG_MIN_TIMEOUT).
+# Until a process finishes its first frame the script load counts too, so
+# HANG_STARTUP_TIMEOUT applies instead. A frame that hangs more than
+# MAX_HANG_RESTARTS times is skipped; the worker renders the rest and then fails.
+HANG_FACTOR = 5.0
+HANG_MIN_TIMEOUT = 120.0
+HANG_STARTUP_TIMEOUT = 600.0
+MAX_HANG_RESTARTS = 2
+
+# Workstation throttling: artist input within the last THROTTLE_INTERVAL (or a
+# watched process using more than THROTTLE_BUSY_CPU percent of a core) means the
+# artist is working; after THROTTLE_IDLE_SECONDS without it the workers get full
+# speed back.
+THROTTLE_INTERVAL = 1.0
+THROTTLE_BUSY_CPU = 25.0
+THROTTLE_IDLE_SECONDS = 5.0
+THROTTLE_NICE = 10
+
+# Seconds between directory listings when output files are watched without inotify
+WATCH_INTERVAL = 1.0
+# inotify events for a file closed after writing, or renamed into place
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0x00000800
+INOTIFY_EVENT = struct.Struct('iIII')
+
+# Events returned by RenderOutputParser.parse()
+FRAME_STARTED = 'started'
+FRAME_WRITTEN = 'written'
+
+# Per-frame upstream fingerprints are stored next to the rendered files
+FINGERPRINT_FILE = '.render_fingerprints.json'
+
+# Per-node profile totals of past renders are stored next to the script
+NODE_PROFILE_FILE = '.render_node_profile.json'
+
+# Nuke render output: "Frame 1001 (1 of 100)" and "Writing /path/file.1001.exr took 2.31 seconds"
+FRAME_LINE_RE = re.compile(r'^\s*Frame\s+(-?\d+)\s+\((\d+)\s+of\s+(\d+)\)')
+
+
+def frames_to_frame_ranges(frames):
+    """
+    Converts a list of frames into a list of contiguous frame ranges.
+    For example, [1,2,3,5,6,7,9] becomes ['1-3', '5-7', '9']
+    """
+    if not frames:
+        return []
+    frames = sorted(set(frames))
+    ranges = []
+    start = prev = frames[0]
+    for frame in frames[1:]:
+        if frame == prev + 1:
+            prev = frame
+        else:
+            if start == prev:
+                ranges.append(f"{start}")
+            else:
+                ranges.append(f"{start}-{prev}")
+            start = prev = frame
+    # Add the last range
+    if start == prev:
+        ranges.append(f"{start}")
+    else:
+        ranges.append(f"{start}-{prev}")
+    return ranges
+
+
+def frame_ranges_to_frames(frame_ranges):
+    """
+    Expands ['1-3', '5', '-2--1'] back into a list of frames.
+    """
+    frames = []
+    for frame_range in frame_ranges:
+        match = re.match(r'^(-?\d+)(?:-(-?\d+))?$', str(frame_range).strip())
+        if not match:
+            raise ValueError(f"Invalid frame range: {frame_range}")
+        first = int(match.group(1))
+        last = int(match.group(2)) if match.group(2) is not None else first
+        frames.extend(range(first, last + 1))
+    return frames
+
+
+def build_render_command(nuke_executable, script_path, write_node_name, frame_ranges,
+                         max_ram=None, cache_size=None, proxy=False, profile_path=None):
+    """
+    Builds the Nuke command line used to render a list of frame ranges.
+    nuke_executable may be a path or a list (e.g. [python, fake_nuke.py]).
+    write_node_name may be a list of Writes to render in the same process.
+    proxy renders in proxy mode (-p), writing to the Writes' proxy paths.
+    profile_path enables Nuke's performance profile output (-Pf) to that XML file.
+    """
+    if isinstance(nuke_executable, (list, tuple)):
+        cmd = list(nuke_executable)
+    else:
+        cmd = [nuke_executable]
+    cmd.extend([
+        '-V',            # Suppress Nuke version banner
+        '-x',            # Render mode
+    ])
+    if proxy:
+        cmd.append('-p')  # Proxy mode
+    if profile_path:
+        cmd.extend(['-Pf', profile_path])  # Per-node performance profile
+
+    # Add -m and -c options if specified
+    if max_ram:
+        cmd.extend(['-m', max_ram])
+    if cache_size:
+        cmd.extend(['-c', cache_size])
+
+    # Add frame ranges
+    for frame_range in frame_ranges:
+        cmd.extend(['-F', frame_range])
+
+    if isinstance(write_node_name, (list, tuple)):
+        write_node_name = ','.join(write_node_name)
+    cmd.extend([
+        '-X',
+        write_node_name,
+        script_path
+    ])
+    return cmd
+
+
+def sequence_key(path):
+    """
+    Normalises a file sequence path so a Read and a Write pointing at the same
+    files compare equal: #### becomes %04d and separators and case follow the OS.
+    """
+    path = re.sub(r'#+', lambda match: f'%0{len(match.group(0))}d' if len(match.group(0)) > 1 else '%d',
+                  path.strip())
+    return os.path.normcase(os.path.normpath(path.replace('\\', '/')))
+
+
+def _profile_number(element, names):
+    """
+    Returns the first numeric child element (or attribute) of element matching
+    one of the lower-case names, or 0.
+    """
+    for child in element:
+        if child.tag.lower() in names:
+            try:
+                return float(child.text or 0)
+            except ValueError:
+                return 0.0
+    for key, value in element.attrib.items():
+        if key.lower() in names:
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 0.0
+
+
+def parse_performance_profile(path):
+    """
+    Parses a Nuke -Pf performance profile into per-node totals:
+    {node: {'class', 'frames', 'calls', 'wall', 'cpu', 'memory_peak', 'memory_total'}}.
+
+    The profile has a Frame element per rendered frame holding a Node element
+    (name and class attributes) per node, with callCount, timeTakenWall and
+    timeTakenCPU in microseconds and memory in bytes. Files cut short by a
+    killed process return whatever parsed, or {}.
+    """
+    try:
+        root = ElementTree.parse(path).getroot()
+    except (ElementTree.ParseError, OSError) as e:
+        logging.warning(f"Could not read performance profile {path}: {e}")
+        return {}
+    nodes = {}
+    for element in root.iter():
+        if element.tag.lower() != 'node' or 'name' not in element.attrib:
+            continue
+        stats = nodes.setdefault(element.attrib['name'], {
+            'class': element.attrib.get('class', ''), 'frames': 0, 'calls': 0,
+            'wall': 0.0, 'cpu': 0.0, 'memory_peak': 0, 'memory_total': 0,
+        })
+        memory = int(_profile_number(element, ('memory', 'memoryused', 'memoryusage')))
+        stats['frames'] += 1
+        stats['calls'] += int(_profile_number(element, ('callcount', 'calls')))
+        stats['wall'] += _profile_number(element, ('timetakenwall', 'walltime')) / 1e6
+        stats['cpu'] += _profile_number(element, ('timetakencpu', 'cputime')) / 1e6
+        stats['memory_peak'] = max(stats['memory_peak'], memory)
+        stats['memory_total'] += memory
+    return nodes
+
+
+def merge_profiles(profiles):
+    """
+    Merges per-node totals from several profiles (workers and batches) into one.
+    """
+    merged = {}
+    for profile in profiles:
+        for name, stats in profile.items():
+            total = merged.get(name)
+            if total is None:
+                merged[name] = dict(stats)
+                continue
+            for key in ('frames', 'calls', 'wall', 'cpu', 'memory_total'):
+                total[key] += stats[key]
+            total['memory_peak'] = max(total['memory_peak'], stats['memory_peak'])
+    return merged
+
+
+def hot_nodes(profile, count=15):
+    """
+    Returns the count nodes with the most wall time, each as a dict with the
+    totals plus 'name', 'avg_wall' and 'avg_memory' per profiled frame.
+    """
+    rows = []
+    for name, stats in profile.items():
+        frames = stats['frames'] or 1
+        rows.append(dict(stats, name=name, avg_wall=stats['wall'] / frames,
+                         avg_memory=stats['memory_total'] / frames))
+    rows.sort(key=lambda row: row['wall'], reverse=True)
+    return rows[:count]
+
+
+def aggregate_profiles(paths, workers=8):
+    """
+    Parses profile files in parallel and merges them.
+    """
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        return merge_profiles(executor.map(parse_performance_profile, paths))
+
+
+def load_node_profile(directory, key):
+    """
+    Returns the stored per-node profile totals for one script in directory, or {}.
+    """
+    path = os.path.join(directory, NODE_PROFILE_FILE)
+    try:
+        with open(path) as handle:
+            return json.load(handle).get(key, {})
+    except (OSError, ValueError, AttributeError) as e:
+        if os.path.exists(path):
+            logging.warning(f"Could not read node profile from {path}: {e}")
+        return {}
+
+
+def save_node_profile(directory, key, profile):
+    """
+    Stores per-node profile totals for one script. Nodes in profile replace
+    their earlier totals; nodes it does not mention keep them.
+    """
+    path = os.path.join(directory, NODE_PROFILE_FILE)
+    data = {}
+    if os.path.exists(path):
+        try:
+            with open(path) as handle:
+                data = json.load(handle)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Replacing unreadable node profile file {path}: {e}")
+    stored = data.get(key, {})
+    stored.update(profile)
+    data[key] = stored
+    write_json_atomic(path, data)
+
+
+def write_json_atomic(path, data):
+    """
+    Writes JSON through a temporary file so readers never see a partial file.
+    """
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'w') as handle:
+        json.dump(data, handle)
+    os.replace(temp_path, path)
+
+
+def fingerprints_to_ranges(fingerprints):
+    """
+    Compresses {frame: fingerprint} into [[first, last, fingerprint], ...]
+    runs of consecutive frames sharing the same fingerprint.
+    """
+    ranges = []
+    for frame in sorted(fingerprints):
+        fingerprint = fingerprints[frame]
+        if ranges and ranges[-1][1] == frame - 1 and ranges[-1][2] == fingerprint:
+            ranges[-1][1] = frame
+        else:
+            ranges.append([frame, frame, fingerprint])
+    return ranges
+
+
+def ranges_to_fingerprints(ranges):
+    """
+    Expands the output of fingerprints_to_ranges() back into {frame: fingerprint}.
+    """
+    fingerprints = {}
+    for first, last, fingerprint in ranges:
+        for frame in range(int(first), int(last) + 1):
+            fingerprints[frame] = fingerprint
+    return fingerprints
+
+
+def load_fingerprints(directory, key):
+    """
+    Returns the stored {frame: fingerprint} for one output pattern in directory.
+    """
+    path = os.path.join(directory, FINGERPRINT_FILE)
+    try:
+        with open(path) as handle:
+            data = json.load(handle)
+        return ranges_to_fingerprints(data.get(key, []))
+    except (OSError, ValueError, TypeError) as e:
+        if os.path.exists(path):
+            logging.warning(f"Could not read fingerprints from {path}: {e}")
+        return {}
+
+
+def save_fingerprints(directory, key, fingerprints):
+    """
+    Merges {frame: fingerprint} into the stored fingerprints for key.
+    """
+    path = os.path.join(directory, FINGERPRINT_FILE)
+    data = {}
+    if os.path.exists(path):
+        try:
+            with open(path) as handle:
+                data = json.load(handle)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Replacing unreadable fingerprint file {path}: {e}")
+    merged = ranges_to_fingerprints(data.get(key, []))
+    merged.update(fingerprints)
+    data[key] = fingerprints_to_ranges(merged)
+    write_json_atomic(path, data)
+
+
+def changed_frames(frames, current, stored):
+    """
+    Returns the frames whose current fingerprint differs from the stored one.
+    """
+    return [frame for frame in frames if stored.get(frame) != current.get(frame)]
+
+
+def map_read_frame(frame, first, last, before='hold', after='hold'):
+    """
+    Maps a frame onto a Read's clip range using its before/after behaviour
+    (hold, loop, bounce, black). Returns None when the Read outputs black.
+    """
+    if first <= frame <= last:
+        return frame
+    mode = before if frame < first else after
+    length = last - first + 1
+    if mode == 'black':
+        return None
+    if mode == 'loop':
+        return first + (frame - first) % length
+    if mode == 'bounce' and length > 1:
+        period = 2 * (length - 1)
+        position = (frame - first) % period
+        return first + (position if position < length else period - position)
+    return first if frame < first else last
+
+
+def list_directories(directories, workers=16, timeout=10.0):
+    """
+    Lists several directories concurrently, one os.listdir per directory.
+    Returns {directory: set of names}; a missing directory maps to an empty
+    set and a directory that did not answer within timeout maps to None.
+    """
+    def listing(directory):
+        try:
+            return set(os.listdir(directory))
+        except FileNotFoundError:
+            return set()
+
+    results = {}
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(workers, len(directories))))
+    futures = {executor.submit(listing, directory): directory for directory in directories}
+    done, _ = concurrent.futures.wait(futures, timeout=timeout)
+    for future, directory in futures.items():
+        if future in done and future.exception() is None:
+            results[directory] = future.result()
+        else:
+            results[directory] = None
+    # Do not wait for listings stuck on an unresponsive file server
+    executor.shutdown(wait=False)
+    return results
+
+
+def check_input_availability(requirements, workers=16, timeout=10.0):
+    """
+    Checks that every required input file exists.
+    requirements is {label: {frame: path}}. Returns (missing, unchecked) where
+    missing is {label: sorted missing frames} and unchecked lists directories
+    that could not be listed within timeout.
+    """
+    directories = set()
+    for frame_paths in requirements.values():
+        for path in frame_paths.values():
+            directories.add(os.path.dirname(path))
+    listings = list_directories(sorted(directories), workers=workers, timeout=timeout)
+
+    missing = {}
+    for label, frame_paths in requirements.items():
+        absent = []
+        for frame, path in frame_paths.items():
+            names = listings.get(os.path.dirname(path))
+            if names is not None and os.path.basename(path) not in names:
+                absent.append(frame)
+        if absent:
+            missing[label] = sorted(absent)
+    unchecked = sorted(directory for directory, names in listings.items() if names is None)
+    return missing, unchecked
+
+
+class RenderOutputParser(object):
+    """
+    Extracts frame numbers from Nuke render output.
+
+    "Writing" lines are matched against the Write node's own file pattern so
+    digits in shot names, resolutions or versions ("sh0010", "12k", "v012")
+    are never mistaken for the frame. "Frame N (i of n)" lines report the
+    frame Nuke is starting on.
+    """
+
+    def __init__(self, output_pattern=None):
+        self.output_pattern = output_pattern
+        self.frame_re = self.compile_pattern(output_pattern)
+        self.path = None  # File of the last FRAME_WRITTEN line
+
+    @staticmethod
+    def compile_pattern(output_pattern):
+        """
+        Compiles a regex matching the basename of a Write file pattern with the
+        frame number captured, from the same frame tokens proxy2file scans for
+        (sequence_scan.FramePattern). Returns None if the pattern has no frame
+        token.
+        """
+        if not output_pattern:
+            return None
+        pattern = sequence_scan.FramePattern.parse(re.split(r'[\\/]', output_pattern)[-1])
+        return pattern.render_regex() if pattern else None
+
+    def matches(self, path):
+        """
+        Returns True if a rendered file path matches this Write's pattern.
+        """
+        basename = path.strip().rpartition('/')[2].rpartition('\\')[2]
+        return bool(self.frame_re and self.frame_re.match(basename))
+
+    def frame_from_path(self, path):
+        """
+        Returns the frame number of a rendered file path, or None if it does
+        not match the Write's pattern; digits elsewhere in the name are never
+        taken for the frame.
+        """
+        basename = path.strip().rpartition('/')[2].rpartition('\\')[2]
+        if self.frame_re:
+            match = self.frame_re.match(basename)
+            if match:
+                return int(match.group(1))
+        return None
+
+    def parse(self, line):
+        """
+        Parses one line of output. Returns (FRAME_STARTED, frame),
+        (FRAME_WRITTEN, frame_or_None) or None for any other line.
+        """
+        if 'Frame' in line:
+            match = FRAME_LINE_RE.match(line)
+            if match:
+                return FRAME_STARTED, int(match.group(1))
+        index = line.find('Writing ')
+        if index >= 0:
+            path = line[index + 8:].strip()
+            took = path.rfind(' took ')
+            if took >= 0:
+                path = path[:took]
+            self.path = path
+            return FRAME_WRITTEN, self.frame_from_path(path)
+        return None
+
+
+def _noop(*args):
+    pass
+
+
+class SpeculativeCoordinator(object):
+    """
+    Shared by all workers of one render to run backup copies of straggler
+    frames, MapReduce-style.
+
+    Workers report the frame they are on and every frame they finish. When a
+    worker runs out of work it asks for a backup: the in-flight frame on
+    another worker that has been running longest, if that is more than
+    `factor` times the median frame time. The first copy to finish wins and
+    the other process is killed; frames the killed process had not reached
+    yet are requeued for any idle worker.
+    """
+
+    def __init__(self, factor=2.0, min_samples=3):
+        self.factor = factor
+        self.min_samples = min_samples
+        self.lock = threading.Lock()
+        self.durations = []
+        self.completed = set()
+        self.in_flight = {}  # worker -> (frame, started)
+        self.backups = {}  # frame -> set of workers rendering it
+        self.requeued = []
+
+    def median_time(self):
+        durations = sorted(self.durations)
+        return durations[len(durations) // 2] if durations else None
+
+    def frame_started(self, worker, frame):
+        with self.lock:
+            self.in_flight[worker] = (frame, time.time())
+            self.backups.setdefault(frame, set()).add(worker)
+
+    def process_ended(self, worker, unfinished=()):
+        """
+        Drops the worker's in-flight frame and requeues the frames its process
+        never finished, in one step so idle workers never see the render as done
+        in between.
+        """
+        with self.lock:
+            frame, _ = self.in_flight.pop(worker, (None, None))
+            if frame is not None and frame in self.backups:
+                self.backups[frame].discard(worker)
+            self.requeued.extend(frame for frame in unfinished if frame not in self.completed)
+
+    def frame_finished(self, worker, frame, duration):
+        """
+        Records a finished frame. Returns False if another copy already won,
+        in which case the caller must not count it again.
+        """
+        with self.lock:
+            if frame in self.completed:
+                return False
+            self.completed.add(frame)
+            self.durations.append(duration)
+            losers = [other for other in self.backups.pop(frame, ()) if other is not worker]
+        for loser in losers:
+            loser.abandon(frame)
+        return True
+
+    def next_work(self, worker, batch_size):
+        """
+        Returns (frames, backup_info) for an idle worker: requeued frames first,
+        otherwise a straggler to duplicate, otherwise ([], None).
+        """
+        with self.lock:
+            if self.requeued:
+                frames = sorted(set(self.requeued))[:batch_size or len(self.requeued)]
+                self.requeued = [frame for frame in self.requeued if frame not in frames]
+                return frames, None
+            median = self.median_time()
+            if median is None or len(self.durations) < self.min_samples:
+                return [], None
+            now = time.time()
+            stragglers = [
+                (now - started, frame) for other, (frame, started) in self.in_flight.items()
+                if other is not worker and frame not in self.completed
+                and len(self.backups.get(frame, ())) < 2 and now - started > self.factor * median
+            ]
+            if not stragglers:
+                return [], None
+            elapsed, frame = max(stragglers)
+            return [frame], (elapsed, median)
+
+    def is_idle(self):
+        """
+        True when no frame is in flight and nothing is waiting to be requeued.
+        """
+        with self.lock:
+            return not self.in_flight and not self.requeued
+
+
+class PipelinedFrames(object):
+    """
+    Frames of a downstream Write released as soon as the upstream (precomp)
+    frames they read have been written, so the two renders overlap frame by
+    frame instead of running one after the other.
+
+    dependencies maps each downstream frame to the upstream frames it needs.
+    Upstream workers call upstream_done() per written frame and
+    producer_finished() when they exit; downstream workers pass this object
+    as their frame_source.
+    """
+
+    def __init__(self, dependencies, producers, upstream_done=()):
+        self.condition = threading.Condition()
+        self.pending = {frame: set(needed) for frame, needed in dependencies.items()}
+        self.ready = []
+        self.done = set()
+        self.producers = producers
+        self.upstream_done(*upstream_done)
+
+    def upstream_done(self, *frames):
+        with self.condition:
+            self.done.update(frames)
+            released = [frame for frame, needed in self.pending.items() if needed <= self.done]
+            for frame in released:
+                del self.pending[frame]
+            if released:
+                self.ready.extend(released)
+                self.ready.sort()
+                self.condition.notify_all()
+
+    def producer_finished(self):
+        with self.condition:
+            self.producers -= 1
+            self.condition.notify_all()
+
+    def requeue(self, frames):
+        with self.condition:
+            self.ready[:0] = frames
+            self.condition.notify_all()
+
+    def unreleased(self):
+        """
+        Downstream frames whose upstream frames were never written.
+        """
+        with self.condition:
+            return sorted(self.pending)
+
+    def take(self, count, is_running):
+        """
+        Waits for released frames and returns up to count of them; returns an
+        empty list once nothing more can be released or is_running() is False.
+        """
+        with self.condition:
+            while is_running():
+                if self.ready:
+                    count = count or len(self.ready)
+                    frames, self.ready = self.ready[:count], self.ready[count:]
+                    return frames
+                if not self.pending or self.producers <= 0:
+                    return []
+                self.condition.wait(POLL_INTERVAL)
+            return []
+
+
+class WorkstationThrottle(object):
+    """
+    Keeps an artist's foreground Nuke responsive while workers render in the
+    background.
+
+    Worker processes run at nice THROTTLE_NICE with low best-effort I/O
+    priority (below-normal priority class on Windows). While the artist is
+    active, their I/O drops to the idle class (idle priority class on
+    Windows) and all but keep_running workers are paused; once the artist has
+    been idle for idle_seconds, everything is restored. Lowering a nice value
+    needs privileges on POSIX, so CPU priority is only ever lowered there and
+    pausing does the rest.
+
+    Activity comes from input_idle(), the seconds since the artist last
+    touched the mouse or keyboard, when given. Otherwise the CPU use of
+    watch_pid is read; that must not be the process running the throttle,
+    whose own bookkeeping of the renders would keep it busy.
+
+    get_workers() returns the current RenderWorkers; processes started after
+    the throttle are picked up on the next poll.
+    """
+
+    def __init__(self, get_workers, input_idle=None, watch_pid=None, busy_cpu=THROTTLE_BUSY_CPU,
+                 idle_seconds=THROTTLE_IDLE_SECONDS, keep_running=1, interval=THROTTLE_INTERVAL,
+                 on_change=None):
+        if input_idle is None and watch_pid is None:
+            raise ValueError("WorkstationThrottle needs input_idle or watch_pid.")
+        self.get_workers = get_workers
+        self.input_idle = input_idle
+        self.watch_pid = watch_pid
+        self.busy_cpu = busy_cpu
+        self.idle_seconds = idle_seconds
+        self.keep_running = keep_running
+        self.interval = interval
+        self.on_change = on_change or _noop
+        self.interactive = False
+        self.last_busy = 0.0
+        self.paused = set()  # Workers paused by the throttle, never by the user
+        self.niced = set()  # Pids already at the base priority
+        self.io_levels = {}  # pid -> interactive flag the I/O priority was set for
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.watched = psutil.Process(watch_pid) if psutil and watch_pid else None
+
+    def start(self):
+        if psutil is None:
+            logging.warning("psutil is not installed; render throttling is disabled.")
+            return False
+        if self.watched:
+            self.watched.cpu_percent(None)  # The first reading is always 0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        """
+        Stops watching and gives every worker its full speed back.
+        """
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+        self.set_interactive(False)
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.poll()
+            except psutil.Error as e:
+                logging.warning(f"Render throttle stopped: {e}")
+                return
+
+    def is_busy(self):
+        """
+        Returns True if the artist worked since the last poll.
+        """
+        if self.input_idle:
+            return self.input_idle() < self.interval
+        return self.watched.cpu_percent(None) >= self.busy_cpu
+
+    def poll(self):
+        """
+        Reads the artist's activity and applies the matching state.
+        """
+        now = time.time()
+        if self.is_busy():
+            self.last_busy = now
+            if not self.interactive:
+                self.set_interactive(True)
+        elif self.interactive and now - self.last_busy >= self.idle_seconds:
+            self.set_interactive(False)
+        self.apply_priorities()
+
+    def set_interactive(self, interactive):
+        self.interactive = interactive
+        workers = [worker for worker in self.get_workers() if worker.is_running]
+        if interactive:
+            for worker in workers[self.keep_running:]:
+                if not worker.is_paused:
+                    try:
+                        worker.pause(reason='artist active')
+                    except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+                        # The batch process already exited or cannot be signalled
+                        logging.debug(f"Could not pause render process: {e}")
+                        continue
+                    self.paused.add(worker)
+        else:
+            for worker in list(self.paused):
+                # Workers the user paused meanwhile stay paused
+                if worker.is_paused and not worker.user_paused:
+                    try:
+                        worker.resume(reason='artist idle')
+                    except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+                        logging.debug(f"Could not resume render process: {e}")
+            self.paused.clear()
+        self.apply_priorities()
+        self.on_change(interactive, len(self.paused))
+
+    def apply_priorities(self):
+        """
+        Sets the base CPU priority on new worker processes and the I/O priority
+        matching the current state on all of them.
+        """
+        for worker in self.get_workers():
+            process = worker.process
+            if process is None or process.poll() is not None:
+                continue
+            try:
+                child = psutil.Process(process.pid)
+                if process.pid not in self.niced:
+                    child.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS if os.name == 'nt' else THROTTLE_NICE)
+                    self.niced.add(process.pid)
+                if self.io_levels.get(process.pid) == self.interactive:
+                    continue
+                if os.name == 'nt':
+                    child.nice(psutil.IDLE_PRIORITY_CLASS if self.interactive
+                               else psutil.BELOW_NORMAL_PRIORITY_CLASS)
+                elif hasattr(child, 'ionice'):
+                    if self.interactive:
+                        child.ionice(psutil.IOPRIO_CLASS_IDLE)
+                    else:
+                        child.ionice(psutil.IOPRIO_CLASS_BE, value=7)
+                self.io_levels[process.pid] = self.interactive
+            except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+                logging.debug(f"Could not change priority of render process {process.pid}: {e}")
+
+
+def output_directories(output_pattern):
+    """
+    Returns the directories of a Write file pattern, or of a {Write: pattern}
+    dict. Patterns with TCL expressions cannot be resolved here and are skipped.
+    """
+    patterns = output_pattern.values() if isinstance(output_pattern, dict) else [output_pattern]
+    return sorted({os.path.dirname(pattern) for pattern in patterns if pattern and '[' not in pattern})
+
+
+class OutputWatcher(object):
+    """
+    Reports files finished in a set of output directories, as a progress
+    source independent of Nuke's stdout.
+
+    On Linux, inotify reports each file as it is closed after writing or
+    renamed into place. Elsewhere, or if inotify cannot be set up, the
+    directories are listed every interval seconds and a new or rewritten
+    file is reported once its size and mtime hold still for one listing.
+    Directories that do not exist yet are picked up once they are created.
+
+    on_file(path) is called from the watcher thread.
+    """
+
+    def __init__(self, directories, on_file, interval=WATCH_INTERVAL):
+        self.directories = list(directories)
+        self.on_file = on_file
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.mode = None  # 'inotify' or 'listing' once started
+        self.libc = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        fd = self.inotify_init() if sys.platform.startswith('linux') else None
+        if fd is None:
+            self.mode = 'listing'
+            self.run_listing()
+            return
+        self.mode = 'inotify'
+        try:
+            self.run_inotify(fd)
+        finally:
+            os.close(fd)
+
+    def inotify_init(self):
+        """
+        Returns a non-blocking inotify file descriptor, or None.
+        """
+        try:
+            self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            fd = self.libc.inotify_init1(IN_NONBLOCK)
+        except (OSError, AttributeError) as e:
+            logging.info(f"inotify is not available ({e}); listing output directories instead.")
+            return None
+        if fd < 0:
+            logging.info(f"inotify_init1 failed ({os.strerror(ctypes.get_errno())}); listing output directories instead.")
+            return None
+        return fd
+
+    def run_inotify(self, fd):
+        watches = {}  # watch descriptor -> directory
+        pending = list(self.directories)
+        first_pass = True
+        while True:
+            # Events still queued when stop() is called are read once more
+            stopping = self.stop_event.is_set()
+            for directory in list(pending):
+                wd = self.libc.inotify_add_watch(fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO)
+                if wd >= 0:
+                    watches[wd] = directory
+                    pending.remove(directory)
+                    if not first_pass:
+                        # Created during the render: report what was written before the watch
+                        for path, _ in self.list_files(directory):
+                            self.on_file(path)
+                elif ctypes.get_errno() != errno.ENOENT:
+                    logging.warning(f"Cannot watch {directory}: {os.strerror(ctypes.get_errno())}")
+                    pending.remove(directory)
+            first_pass = False
+            readable, _, _ = select.select([fd], [], [], 0 if stopping else POLL_INTERVAL)
+            if readable:
+                self.read_events(fd, watches)
+            if stopping:
+                return
+
+    def read_events(self, fd, watches):
+        try:
+            data = os.read(fd, 65536)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if wd in watches and name:
+                self.on_file(os.path.join(watches[wd], os.fsdecode(name)))
+
+    @staticmethod
+    def list_files(directory):
+        """
+        Returns [(path, (size, mtime_ns))] for the files in directory.
+        """
+        try:
+            with os.scandir(directory) as entries:
+                files = []
+                for entry in entries:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        files.append((entry.path, (stat.st_size, stat.st_mtime_ns)))
+                return files
+        except OSError:
+            return []
+
+    def run_listing(self):
+        # Files already there before the render are only reported if rewritten
+        seen = {path: state for directory in self.directories for path, state in self.list_files(directory)}
+        changing = {}
+        while True:
+            # The process has exited by the time stop() is called, so every change is final
+            stopping = self.stop_event.wait(self.interval)
+            for directory in self.directories:
+                for path, state in self.list_files(directory):
+                    if seen.get(path) == state:
+                        continue
+                    if stopping or changing.get(path) == state:
+                        changing.pop(path, None)
+                        seen[path] = state
+                        self.on_file(path)
+                    else:
+                        changing[path] = state
+            if stopping:
+                return
+
+
+class RenderWorker(object):
+    """
+    Runs Nuke command-line render processes for one worker slot and reports
+    progress through plain callbacks.
+
+    Callbacks:
+        on_progress(current_frame, total_frames, time_per_frame)
+        on_log(message)
+        on_batch_started(total_frames)
+        on_error(message)  - fatal errors the user should see
+        on_hang(event)     - the watchdog killed a hung process; event is a dict
+                             with worker, frame, frames, waited, timeout, time,
+                             gave_up (the frame hung too often to retry) and
+                             dropped (frame ranges left unrendered on giving up)
+        on_write_progress(write_name, frame)
+                           - one Write of a multi-Write render wrote a frame
+
+    profile_dir, if given, makes every process write a -Pf performance profile
+    there; on_profile(path) is called with each file once its process exits.
+
+    frame_source, if given, is a PipelinedFrames the worker takes its batches
+    from instead of frames_to_render or remaining_frames.
+
+    watch_dirs, if given, are the output directories an OutputWatcher watches
+    while each process runs, so frames count as rendered when their files are
+    written even if the stdout lines are missing or unparseable.
+
+    write_node_name may be a list of Writes sharing upstream nodes; they are
+    rendered by one process with "-X W1,W2" and output_pattern is then a dict
+    of Write name to file pattern. A frame counts as rendered once every Write
+    has written it.
+    """
+
+    def __init__(self, nuke_executable, script_path, write_node_name, frames_to_render, worker_id,
+                 max_ram=None, cache_size=None, batch_render=False, batch_size=None,
+                 remaining_frames=None, remaining_frames_lock=None, output_pattern=None, coordinator=None,
+                 proxy=False, hang_factor=HANG_FACTOR, hang_min_timeout=HANG_MIN_TIMEOUT,
+                 hang_startup_timeout=HANG_STARTUP_TIMEOUT, max_hang_restarts=MAX_HANG_RESTARTS,
+                 on_progress=None, on_log=None, on_batch_started=None, on_error=None, on_hang=None,
+                 on_write_progress=None, frame_source=None, profile_dir=None, on_profile=None,
+                 watch_dirs=None):
+        self.nuke_executable = nuke_executable
+        self.script_path = script_path
+        self.write_node_name = write_node_name
+        self.frames_to_render = frames_to_render
+        self.worker_id = worker_id
+        self.max_ram = max_ram
+        self.cache_size = cache_size
+        self.batch_render = batch_render
+        self.batch_size = batch_size
+        self.remaining_frames = remaining_frames
+        self.remaining_frames_lock = remaining_frames_lock
+        self.write_names = list(write_node_name) if isinstance(write_node_name, (list, tuple)) else None
+        if self.write_names:
+            patterns = output_pattern or {}
+            self.write_parsers = [(name, RenderOutputParser(patterns.get(name))) for name in self.write_names]
+            self.parser = self.write_parsers[0][1]
+        else:
+            self.write_parsers = None
+            self.parser = RenderOutputParser(output_pattern)
+        self.written = {}  # frame -> Writes that wrote it, for multi-Write renders
+        self.coordinator = coordinator
+        self.proxy = proxy
+        self.profile_dir = profile_dir
+        self.profile_count = 0
+        self.frame_source = frame_source
+        self.watch_dirs = watch_dirs
+        self.hang_factor = hang_factor
+        self.hang_min_timeout = hang_min_timeout
+        self.hang_startup_timeout = hang_startup_timeout
+        self.max_hang_restarts = max_hang_restarts
+        self.on_progress = on_progress or _noop
+        self.on_log = on_log or _noop
+        self.on_batch_started = on_batch_started or _noop
+        self.on_error = on_error or _noop
+        self.on_hang = on_hang or _noop
+        self.on_write_progress = on_write_progress or _noop
+        self.on_profile = on_profile or _noop
+        self.process = None
+        self.is_running = False
+        self.is_paused = False
+        self.user_paused = False  # Paused by the user, so a throttle must not resume it
+        self.frames_rendered = 0
+        self.total_frames_rendered = 0
+        self.total_frames = 0 if batch_render else len(frames_to_render or [])
+        self.start_time = None
+        self.batch_start_time = None
+        self.current_frame = None
+        self.completed_frames = set()
+        self.batch_frames = []
+        self.batch_frame_set = set()
+        self.frame_started_at = None
+        self.abandoned = False
+        self.backup_work = False
+        self.frame_time_estimate = None  # Running average over this worker's frames
+        self.last_activity = None
+        self.hung = False
+        self.hang_frame = None  # Frame the watchdog last killed the process on
+        self.hang_counts = {}
+        self.hang_events = []
+        self.skipped_frames = []  # Frames given up on after max_hang_restarts
+
+    def stop(self):
+        """
+        Stops the render process.
+        """
+        self.is_running = False
+        if self.process and self.process.poll() is None:
+            if self.is_paused and os.name != 'nt':
+                # A stopped process cannot handle SIGTERM until it is continued
+                self.process.send_signal(signal.SIGCONT)
+            self.process.terminate()
+            logging.info("Render process terminated by user.")
+
+    def pause(self, reason=None):
+        """
+        Pauses the render process, for the user unless a throttle gives a reason.
+        """
+        if reason is None:
+            self.user_paused = True  # Also when a throttle paused it first
+        if self.process and self.is_running and not self.is_paused:
+            if os.name == 'nt':
+                # Windows does not support SIGSTOP, so we suspend the process
+                psutil.Process(self.process.pid).suspend()
+            else:
+                # Unix-like systems can use SIGSTOP
+                self.process.send_signal(signal.SIGSTOP)
+            self.is_paused = True
+            if reason:
+                logging.info(f"Render process throttled: {reason}.")
+            else:
+                logging.info("Render process paused by user.")
+
+    def resume(self, reason=None):
+        """
+        Resumes the render process. A throttle never resumes what the user paused.
+        """
+        if reason is None:
+            self.user_paused = False
+        elif self.user_paused:
+            return
+        if self.process and self.is_running and self.is_paused:
+            if os.name == 'nt':
+                psutil.Process(self.process.pid).resume()
+            else:
+                self.process.send_signal(signal.SIGCONT)
+            self.is_paused = False
+            self.last_activity = time.time()  # Time spent paused is not a hang
+            if reason:
+                logging.info(f"Render process unthrottled: {reason}.")
+            else:
+                logging.info("Render process resumed by user.")
+
+    def abandon(self, frame):
+        """
+        Kills the running process because another worker finished the frame
+        it was on first. Called from the winning worker's thread.
+        """
+        self.abandoned = True
+        if self.process and self.process.poll() is None:
+            if self.is_paused and os.name != 'nt':
+                self.process.send_signal(signal.SIGCONT)
+            self.process.terminate()
+        self.on_log(f"Frame {frame} finished first on another worker; stopping this copy.")
+
+    def hang_timeout(self):
+        """
+        Seconds without a finished frame after which the process counts as hung.
+        """
+        estimate = self.hang_factor * self.frame_time_estimate if self.frame_time_estimate else 0.0
+        if not self.completed_frames:
+            return max(self.hang_startup_timeout, estimate)
+        return max(self.hang_min_timeout, estimate)
+
+    def check_hang(self):
+        """
+        Kills the process if no frame finished within hang_timeout().
+        """
+        waited = time.time() - self.last_activity
+        timeout = self.hang_timeout()
+        if waited <= timeout:
+            return
+        unfinished = [frame for frame in self.batch_frames if frame not in self.completed_frames]
+        frame = unfinished[0] if unfinished else self.current_frame
+        self.hung = True
+        self.hang_frame = frame
+        self.hang_counts[frame] = self.hang_counts.get(frame, 0) + 1
+        gave_up = self.hang_counts[frame] > self.max_hang_restarts
+        event = {
+            'worker': self.worker_id,
+            'frame': frame,
+            'frames': frames_to_frame_ranges(unfinished),
+            'waited': round(waited, 1),
+            'timeout': round(timeout, 1),
+            'time': time.time(),
+            'gave_up': gave_up,
+            'dropped': frames_to_frame_ranges([frame]) if gave_up and frame is not None else [],
+        }
+        self.hang_events.append(event)
+        message = (f"Worker {self.worker_id} hung on frame {frame}: no frame finished in {waited:.1f}s "
+                   f"(limit {timeout:.1f}s). Killing the process.")
+        logging.warning(message)
+        self.on_log(message)
+        self.on_hang(event)
+        if self.process.poll() is None:
+            self.process.kill()
+
+    def requeue_frames(self, frames):
+        """
+        Puts frames back at the front of this worker's own work.
+        """
+        if self.frame_source:
+            self.frame_source.requeue(frames)
+        elif self.batch_render:
+            with self.remaining_frames_lock:
+                self.remaining_frames[:0] = frames
+        else:
+            self.frames_to_render = frames + (self.frames_to_render or [])
+
+    def next_frames(self):
+        """
+        Returns the frames for the next process launch, or an empty list when done.
+        """
+        if self.frame_source:
+            frames = self.frame_source.take(self.batch_size, lambda: self.is_running)
+        elif not self.batch_render:
+            frames, self.frames_to_render = self.frames_to_render, []
+        else:
+            with self.remaining_frames_lock:
+                frames = self.remaining_frames[:self.batch_size]
+                del self.remaining_frames[:self.batch_size]
+        if frames or not self.coordinator:
+            return frames or []
+
+        # Out of work: pick up requeued frames or back up a straggler until the render is done
+        while self.is_running:
+            frames, backup = self.coordinator.next_work(self, self.batch_size)
+            if frames:
+                self.backup_work = True
+                if backup:
+                    elapsed, median = backup
+                    self.on_log(f"Launching backup of straggler frame {frames[0]} "
+                                f"(running {elapsed:.1f}s, median {median:.1f}s).")
+                return frames
+            if self.coordinator.is_idle():
+                return []
+            time.sleep(POLL_INTERVAL)
+        return []
+
+    def run(self):
+        """
+        Renders every frame assigned to this worker.
+        Returns a (state, total_duration) tuple where state is one of
+        RENDER_FINISHED, RENDER_STOPPED or RENDER_FAILED.
+        """
+        self.is_running = True
+        self.start_time = time.time()
+        self.frames_rendered = 0
+        self.total_frames_rendered = 0
+        self.skipped_frames = []
+
+        if not self.batch_render and not self.frames_to_render and not self.coordinator and not self.frame_source:
+            self.on_log("No frames to render. Skipping.")
+            self.is_running = False
+            return RENDER_FINISHED, 0.0
+
+        while self.is_running:
+            if self.is_paused:
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            frames = self.next_frames()
+            if not frames:
+                break
+            if self.batch_render or self.backup_work or self.frame_source:
+                self.on_batch_started(len(frames))
+            self.total_frames = len(frames)
+            self.frames_rendered = 0  # Reset for new batch
+
+            state = self.render_frames(frames)
+            if state != RENDER_FINISHED:
+                self.is_running = False
+                return state, time.time() - self.start_time
+            logging.info("Batch completed.")
+
+        total_duration = time.time() - self.start_time
+        if not self.is_running:
+            # stop() was called between batches
+            return RENDER_STOPPED, total_duration
+        self.is_running = False
+        if self.skipped_frames:
+            error_msg = (f"Worker {self.worker_id} gave up on frames "
+                         f"{', '.join(frames_to_frame_ranges(self.skipped_frames))} after repeated hangs; "
+                         f"they were not rendered.")
+            logging.error(error_msg)
+            self.on_error(error_msg)
+            return RENDER_FAILED, total_duration
+        logging.info(f"Worker {self.worker_id} completed all batches in {total_duration:.2f}s.")
+        return RENDER_FINISHED, total_duration
+
+    def render_frames(self, frames):
+        """
+        Launches one Nuke process for the given frames and monitors it to completion.
+        """
+        self.batch_start_time = time.time()
+        self.current_frame = None
+        self.completed_frames = set()
+        self.batch_frame_set = set(frames)
+        self.batch_frames = sorted(self.batch_frame_set)
+        self.frame_started_at = self.batch_start_time
+        self.last_activity = self.batch_start_time
+        self.abandoned = False
+        self.hung = False
+        profile_path = None
+        if self.profile_dir:
+            self.profile_count += 1
+            profile_path = os.path.join(self.profile_dir, f'worker{self.worker_id:02d}_{self.profile_count:04d}.xml')
+        cmd = build_render_command(
+            self.nuke_executable, self.script_path, self.write_node_name,
+            frames_to_frame_ranges(frames), max_ram=self.max_ram, cache_size=self.cache_size, proxy=self.proxy,
+            profile_path=profile_path
+        )
+        logging.info(f"Command: {' '.join(cmd)}")
+        self.on_log(f"Executing command: {' '.join(cmd)}")
+
+        try:
+            self.process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+                universal_newlines=True
+            )
+        except Exception as e:
+            error_msg = f"Failed to start render process:\n{e}"
+            logging.error(error_msg)
+            self.on_error(error_msg)
+            return RENDER_STOPPED
+        if self.coordinator:
+            self.coordinator.frame_started(self, self.batch_frames[0])
+
+        # Both streams feed one queue so the loop can block instead of polling
+        output_queue = queue.Queue()
+        readers = [
+            threading.Thread(target=self.read_stream, args=(self.process.stdout, 'stdout', output_queue)),
+            threading.Thread(target=self.read_stream, args=(self.process.stderr, 'stderr', output_queue)),
+        ]
+        for reader in readers:
+            reader.daemon = True
+            reader.start()
+        watcher = None
+        if self.watch_dirs:
+            watcher = OutputWatcher(self.watch_dirs, lambda path: output_queue.put(('watch', path)))
+            watcher.start()
+
+        open_streams = len(readers)
+        while self.is_running and open_streams:
+            if self.is_paused:
+                time.sleep(POLL_INTERVAL)
+                continue
+            if not self.hung:
+                self.check_hang()
+            try:
+                source, line = output_queue.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if source == 'watch':
+                self.output_file_done(line)
+            elif line is None:
+                open_streams -= 1
+            elif source == 'stdout':
+                self.handle_stdout_line(line)
+            else:
+                self.handle_stderr_line(line)
+
+        for reader in readers:
+            reader.join()
+        self.process.wait()
+        if watcher:
+            watcher.stop()
+            # Files closed just before the process exited
+            while self.is_running and not output_queue.empty():
+                source, line = output_queue.get()
+                if source == 'watch':
+                    self.output_file_done(line)
+        if profile_path and os.path.exists(profile_path):
+            self.on_profile(profile_path)
+        unfinished = [frame for frame in self.batch_frames if frame not in self.completed_frames]
+        if self.hung and self.is_running:
+            frame = self.hang_frame
+            if self.hang_counts.get(frame, 0) > self.max_hang_restarts:
+                # Give up on the frame only; the rest of the batch is restarted as usual
+                unfinished = [other for other in unfinished if other != frame]
+                self.skipped_frames.append(frame)
+                message = (f"Frame {frame} hung {self.hang_counts[frame]} times. "
+                           f"Worker {self.worker_id} skips it and carries on with the rest.")
+                logging.error(message)
+                self.on_log(message)
+            if unfinished:
+                self.on_log(f"Restarting worker {self.worker_id} with frames "
+                            f"{', '.join(frames_to_frame_ranges(unfinished))}.")
+                if not self.coordinator:
+                    self.requeue_frames(unfinished)
+        if self.coordinator:
+            # Hand back the frames of a hung process, or of an abandoned one whose frame another worker won
+            requeue = (self.abandoned or self.hung) and self.is_running
+            self.coordinator.process_ended(self, unfinished if requeue else ())
+        if (self.abandoned or self.hung) and self.is_running:
+            return RENDER_FINISHED
+        if not self.is_running:
+            logging.info(f"Render process was terminated by the user. Return code: {self.process.returncode}")
+            return RENDER_STOPPED
+        if self.process.returncode != 0:
+            error_msg = f"Render process failed with return code {self.process.returncode}."
+            logging.error(error_msg)
+            self.on_error(error_msg)
+            return RENDER_FAILED
+        # Nuke exits cleanly only once every requested frame is written, so frames
+        # whose lines were suppressed by the -V level or not matched count now
+        for frame in self.batch_frames:
+            self.frame_done(frame)
+        return RENDER_FINISHED
+
+    def handle_stdout_line(self, line):
+        """
+        Parses one line of Nuke stdout and reports rendered frames.
+        """
+        self.on_log(line.strip())
+        event = self.parser.parse(line)
+        if not event:
+            return
+        kind, frame = event
+        if kind == FRAME_STARTED:
+            # Nuke moved on, so the previous frame is done even if its
+            # "Writing" line was suppressed by the verbosity level
+            if self.current_frame is not None and self.current_frame != frame:
+                self.frame_done(self.current_frame)
+            self.current_frame = frame
+        elif self.write_parsers:
+            self.write_done(self.parser.path)
+        elif frame is not None:
+            # A path that does not match the Write's pattern is dropped; its
+            # frame still counts at the next "Frame N" line, or with the rest
+            # of the batch when Nuke exits cleanly
+            self.frame_done(frame)
+
+    def output_file_done(self, path):
+        """
+        Handles a file the OutputWatcher saw written. Other workers share the
+        output directories, so only this batch's frames count.
+        """
+        parsers = self.write_parsers or [(None, self.parser)]
+        for _, parser in parsers:
+            if not parser.matches(path):
+                continue
+            frame = parser.frame_from_path(path)
+            if frame in self.batch_frame_set:
+                if self.write_parsers:
+                    self.write_done(path)
+                else:
+                    self.frame_done(frame)
+            return
+
+    def write_done(self, path):
+        """
+        Records one Write of a multi-Write render writing a frame; the frame is
+        done once all of them have.
+        """
+        match = next(((name, parser) for name, parser in self.write_parsers if parser.matches(path)), None)
+        if match is None:
+            return
+        name, parser = match
+        frame = parser.frame_from_path(path)
+        if frame is None:
+            return
+        written = self.written.setdefault(frame, set())
+        if name in written:
+            return
+        written.add(name)
+        self.on_write_progress(name, frame)
+        if len(written) == len(self.write_parsers):
+            del self.written[frame]
+            self.frame_done(frame)
+
+    def frame_done(self, frame):
+        """
+        Counts a frame as rendered once, however many lines report it.
+        """
+        if frame is None or frame in self.completed_frames:
+            return
+        self.completed_frames.add(frame)
+        now = time.time()
+        self.last_activity = now
+        duration = now - self.frame_started_at
+        if self.frame_time_estimate is None:
+            self.frame_time_estimate = duration
+        else:
+            self.frame_time_estimate += 0.2 * (duration - self.frame_time_estimate)
+        self.frame_started_at = now
+        if self.coordinator:
+            first = self.coordinator.frame_finished(self, frame, duration)
+            pending = [f for f in self.batch_frames if f not in self.completed_frames]
+            if pending and not self.abandoned:
+                self.coordinator.frame_started(self, pending[0])
+            if not first:
+                return
+        elapsed_time = now - self.batch_start_time
+        self.frames_rendered += 1
+        self.total_frames_rendered += 1
+        time_per_frame = elapsed_time / self.frames_rendered
+        self.on_progress(frame, self.total_frames, time_per_frame)
+
+    def handle_stderr_line(self, line):
+        """
+        Forwards one line of Nuke stderr to the log.
+        """
+        self.on_log(line.strip())
+        if 'Error' in line or 'ERROR' in line:
+            logging.error(line.strip())
+
+    def read_stream(self, stream, source, output_queue):
+        """
+        Reads lines from a stream and puts them into a queue, then a None sentinel.
+        """
+        for line in iter(stream.readline, ''):
+            output_queue.put((source, line))
+        stream.close()
+        output_queue.put((source, None))
@@ -3,17 +3,20 @@
 import nuke
 import nukescripts
 import threading
-import subprocess
 import time
-import re
 import os
-import sys
 import multiprocessing
 import logging
+import tempfile
 from PySide6 import QtWidgets, QtCore, QtGui
 from threading import Lock
 from PySide6.QtCore import QSettings
 
+import render_engine
+import render_queue
+import tile_render
+from panel_common import CollapsibleWidget, upstream_nodes, compute_frame_fingerprints
+
 # Attempt to import psutil for system information
 try:
     import psutil
@@ -21,9 +24,6 @@ except ImportError:
     psutil = None
     logging.warning('psutil module not found. System RAM information will not be available.')
 
-# Import signal module
-import signal
-
 # Set up logging
 log_file = os.path.join(os.path.expanduser('~'), '.nuke', 'render_progress_panel.log')
 logging.basicConfig(
@@ -33,6 +33,216 @@ logging.basicConfig(
     level=logging.INFO
 )
 
+def shared_upstream_writes(write_node):
+    """
+    Returns the other enabled Write nodes that share upstream nodes with
+    write_node, so one Nuke process can render them all from the same cache.
+    """
+    own = {node.fullName() for node in upstream_nodes(write_node) if node.Class() != 'Write'}
+    shared = []
+    for other in nuke.allNodes('Write'):
+        if other is write_node or other.name() == write_node.name() or other['disable'].value():
+            continue
+        upstream = {node.fullName() for node in upstream_nodes(other) if node.Class() != 'Write'}
+        if own & upstream:
+            shared.append(other)
+    return shared
+
+
+def precomp_writes(write_node):
+    """
+    Returns (read, write) pairs for Reads upstream of write_node that read the
+    files another enabled Write in the script renders.
+    """
+    writes = {}
+    for other in nuke.allNodes('Write'):
+        if other.name() != write_node.name() and not other['disable'].value():
+            writes[render_engine.sequence_key(nuke.filename(other) or '')] = other
+    pairs = []
+    for node in upstream_nodes(write_node):
+        if node.Class() == 'Read' and not node['disable'].value():
+            write = writes.get(render_engine.sequence_key(nuke.filename(node) or ''))
+            if write is not None:
+                pairs.append((node, write))
+    return pairs
+
+
+def read_time_transforms(write_node, read):
+    """
+    Walks the graph upstream of a Write once and returns how its frames map to
+    the frames it pulls from read, one entry per distinct path: ('offset', n)
+    pulls frame - n, ('hold', n) always pulls frame n and ('all',) the Read's
+    full range. Follows the same nodes as collect_read_requirements.
+    """
+    what = nuke.INPUTS | nuke.HIDDEN_INPUTS
+    target = read.fullName()
+    transforms = set()
+    visited = set()
+    stack = [(write_node, ('offset', 0))]
+    while stack:
+        node, transform = stack.pop()
+        key = (node.fullName(), transform)
+        if key in visited:
+            continue
+        visited.add(key)
+
+        disabled = 'disable' in node.knobs() and node['disable'].value()
+        if node.Class() == 'Read' and not disabled:
+            if node.fullName() == target:
+                transforms.add(transform)
+            continue
+
+        input_transform = transform
+        if not disabled and transform[0] != 'all':
+            if node.Class() == 'TimeOffset':
+                offset = int(node['time_offset'].value())
+                input_transform = (transform[0], transform[1] + offset if transform[0] == 'offset'
+                                   else transform[1] - offset)
+            elif node.Class() == 'FrameHold':
+                input_transform = ('hold', int(node['first_frame'].value()))
+            elif node.Class() in RETIME_CLASSES:
+                input_transform = ('all',)
+        for dependency in node.dependencies(what):
+            stack.append((dependency, input_transform))
+        if isinstance(node, nuke.Group):
+            for inner in node.nodes():
+                if inner.Class() == 'Read':
+                    stack.append((inner, input_transform))
+    return transforms
+
+
+def pipeline_dependencies(write_node, frames, read, precomp_write):
+    """
+    Returns {frame: set of precomp frames} for the frames of write_node that
+    pull files from read, which reads precomp_write's output. The graph is
+    walked once; only the Read's file knob is evaluated per frame.
+    """
+    parser = render_engine.RenderOutputParser(precomp_write['file'].value())
+    transforms = read_time_transforms(write_node, read)
+    full_range = range(int(read['first'].value()), int(read['last'].value()) + 1)
+    precomp_frames = {}  # Read file frame -> precomp frame, evaluated once each
+
+    def precomp_frame(clip_frame):
+        if clip_frame not in precomp_frames:
+            path = nuke.callbacks.filenameFilter(read['file'].evaluate(clip_frame))
+            precomp_frames[clip_frame] = parser.frame_from_path(path)
+        return precomp_frames[clip_frame]
+
+    dependencies = {}
+    for frame in frames:
+        clip_frames = set()
+        for transform in transforms:
+            clip_frame = 'all'
+            if transform[0] != 'all':
+                clip_frame = _read_clip_frame(read, frame - transform[1] if transform[0] == 'offset'
+                                              else transform[1])
+            if clip_frame == 'all':
+                clip_frames.update(full_range)
+            elif clip_frame is not None:
+                clip_frames.add(clip_frame)
+        needed = {precomp_frame(clip_frame) for clip_frame in clip_frames}
+        needed.discard(None)
+        dependencies[frame] = needed
+    return dependencies
+
+
+# Nodes that change which input frame is pulled in ways the pre-flight walk does not model
+RETIME_CLASSES = {'Retime', 'OFlow2', 'OFlow', 'Kronos', 'TimeWarp', 'FrameBlend', 'TimeEcho', 'VectorGenerator'}
+
+
+def _read_clip_frame(read, frame):
+    """
+    Maps a script frame to the file frame a Read loads, following its
+    frame mode and before/after settings. Returns None for black frames and
+    'all' when the mapping is an arbitrary expression.
+    """
+    first = int(read['first'].value())
+    last = int(read['last'].value())
+    mode = read['frame_mode'].value() if 'frame_mode' in read.knobs() else ''
+    frame_value = read['frame'].value().strip() if 'frame' in read.knobs() else ''
+    if frame_value:
+        try:
+            amount = int(float(frame_value))
+        except ValueError:
+            return 'all'
+        if mode == 'start at':
+            frame = frame - amount + first
+        elif mode == 'offset':
+            frame = frame - amount
+        else:
+            return 'all'
+    return render_engine.map_read_frame(frame, first, last, read['before'].value(), read['after'].value())
+
+
+def collect_read_requirements(write_node, frames):
+    """
+    Walks the graph upstream of a Write and returns {label: {file_frame: path}}
+    for every enabled Read, limited to the frames the render actually pulls.
+    TimeOffset and FrameHold are followed; other retimes fall back to the
+    Read's full range.
+    """
+    what = nuke.INPUTS | nuke.HIDDEN_INPUTS
+    needed = {}  # Read full name -> (read, set of frames or None for full range)
+    visited = {}
+    stack = [(write_node, frozenset(frames))]
+    while stack:
+        node, node_frames = stack.pop()
+        seen = visited.setdefault(node.fullName(), set())
+        if node_frames is not None:
+            node_frames = node_frames - seen
+            if not node_frames:
+                continue
+            seen.update(node_frames)
+        elif 'all' in seen:
+            continue
+        else:
+            seen.add('all')
+
+        disabled = 'disable' in node.knobs() and node['disable'].value()
+        if node.Class() == 'Read' and not disabled:
+            read, frame_set = needed.setdefault(node.fullName(), (node, set()))
+            if node_frames is None:
+                needed[node.fullName()] = (node, None)
+            elif frame_set is not None:
+                frame_set.update(node_frames)
+            continue
+
+        input_frames = node_frames
+        if not disabled and node_frames is not None:
+            if node.Class() == 'TimeOffset':
+                offset = int(node['time_offset'].value())
+                input_frames = frozenset(frame - offset for frame in node_frames)
+            elif node.Class() == 'FrameHold':
+                input_frames = frozenset([int(node['first_frame'].value())])
+            elif node.Class() in RETIME_CLASSES:
+                input_frames = None
+        for dependency in node.dependencies(what):
+            stack.append((dependency, input_frames))
+        if isinstance(node, nuke.Group):
+            for inner in node.nodes():
+                if inner.Class() == 'Read':
+                    stack.append((inner, input_frames))
+
+    requirements = {}
+    for name, (read, frame_set) in needed.items():
+        if frame_set is None:
+            clip_frames = set(range(int(read['first'].value()), int(read['last'].value()) + 1))
+        else:
+            clip_frames = set()
+            for frame in frame_set:
+                clip_frame = _read_clip_frame(read, frame)
+                if clip_frame == 'all':
+                    clip_frames = set(range(int(read['first'].value()), int(read['last'].value()) + 1))
+                    break
+                if clip_frame is not None:
+                    clip_frames.add(clip_frame)
+        label = f"{name} ({read['file'].value()})"
+        requirements[label] = {
+            frame: nuke.callbacks.filenameFilter(read['file'].evaluate(frame)) for frame in sorted(clip_frames)
+        }
+    return requirements
+
+
 class RenderProgressPanel(QtWidgets.QWidget):
     """
     A panel for managing and monitoring multi-threaded rendering of Write nodes in Nuke.
@@ -47,6 +257,18 @@ class RenderProgressPanel(QtWidgets.QWidget):
         self.threads = []
         self.is_rendering = False
         self.progress_lock = Lock()
+        self.frame_fingerprints = None
+        self.completed_frames = set()
+        self.tile_render = None  # Band scripts and phase of a tile-split render
+        self.pipeline = None  # Precomp Write pipelined into the selected Write
+        self.render_pass = None  # 'proxy' or 'full' in a two-pass render
+        self.profile_dir = None  # -Pf profiles of the current render
+        self.throttle = None  # render_engine.WorkstationThrottle while yielding to the artist
+        self.artist_activity = None  # ArtistActivityFilter feeding the throttle
+        self.hang_events = []  # Watchdog kills of the current render, for the final report
+        self.full_pass = None
+        self.pass_start_time = time.time()
+        self.write_progress = {}  # Write name -> frames written, for multi-Write renders
         self.settings = QSettings('YourCompanyName', 'RenderProgressPanel')
         self.init_ui()
 
@@ -110,6 +332,9 @@ class RenderProgressPanel(QtWidgets.QWidget):
 
         self.custom_frame_range_checkbox = QtWidgets.QCheckBox("Frame Range")
         self.overwrite_checkbox = QtWidgets.QCheckBox("Overwrite")
+        self.changed_only_checkbox = QtWidgets.QCheckBox("Only Changed Frames")
+        self.changed_only_checkbox.setToolTip(
+            "Re-render only frames whose upstream knobs or animation changed since the last render")
         self.start_frame_spinbox = QtWidgets.QSpinBox()
         self.start_frame_spinbox.setMinimum(-99999)
         self.start_frame_spinbox.setMaximum(99999)
@@ -122,6 +347,7 @@ class RenderProgressPanel(QtWidgets.QWidget):
         # Adjust sizes and spacing
         self.custom_frame_range_checkbox.setSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
         self.overwrite_checkbox.setSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
+        self.changed_only_checkbox.setSizePolicy(QtWidgets.QSizePolicy.Fixed, QtWidgets.QSizePolicy.Fixed)
         self.start_frame_spinbox.setMaximumWidth(80)
         self.end_frame_spinbox.setMaximumWidth(80)
 
@@ -135,6 +361,7 @@ class RenderProgressPanel(QtWidgets.QWidget):
         # First line: Frame Range and Overwrite checkboxes
         frame_range_layout_1.addWidget(self.custom_frame_range_checkbox)
         frame_range_layout_1.addWidget(self.overwrite_checkbox)
+        frame_range_layout_1.addWidget(self.changed_only_checkbox)
         frame_range_layout_1.addStretch()
 
         # Second line: First and Last frame inputs
@@ -144,6 +371,15 @@ class RenderProgressPanel(QtWidgets.QWidget):
         frame_range_layout_2.addWidget(self.end_frame_spinbox)
         frame_range_layout_2.addStretch()
 
+        # Third line: pre-flight check of upstream Read files
+        frame_range_layout_3 = QtWidgets.QHBoxLayout()
+        self.preflight_checkbox = QtWidgets.QCheckBox("Pre-flight Input Check")
+        self.preflight_checkbox.setToolTip(
+            "Before rendering, check that every Read upstream of the Write has the frames it needs")
+        self.preflight_checkbox.setChecked(self.settings.value('preflight_check', defaultValue=True, type=bool))
+        frame_range_layout_3.addWidget(self.preflight_checkbox)
+        frame_range_layout_3.addStretch()
+
         # Add separator line
         separator = QtWidgets.QFrame()
         separator.setFrameShape(QtWidgets.QFrame.HLine)
@@ -153,6 +389,7 @@ class RenderProgressPanel(QtWidgets.QWidget):
         frame_range_layout.addWidget(frames_title)
         frame_range_layout.addLayout(frame_range_layout_1)
         frame_range_layout.addLayout(frame_range_layout_2)
+        frame_range_layout.addLayout(frame_range_layout_3)
         frame_range_layout.addWidget(separator)
 
         # Add the main layout to the parent layout
@@ -173,6 +410,18 @@ class RenderProgressPanel(QtWidgets.QWidget):
         batch_options_layout.addWidget(self.batch_render_checkbox)
         batch_options_layout.addWidget(self.batch_size_label)
         batch_options_layout.addWidget(self.batch_size_spinbox)
+        self.speculative_checkbox = QtWidgets.QCheckBox("Speculative Backups")
+        self.speculative_checkbox.setToolTip(
+            "When instances go idle, re-launch frames running over twice the median frame time "
+            "on them and keep whichever copy finishes first.")
+        self.speculative_checkbox.setChecked(self.settings.value('speculative_backups', defaultValue=False, type=bool))
+        batch_options_layout.addWidget(self.speculative_checkbox)
+        self.throttle_checkbox = QtWidgets.QCheckBox("Yield to Artist")
+        self.throttle_checkbox.setToolTip(
+            "Run instances at low priority and pause all but one while you work in this Nuke session, "
+            "restoring full speed once there has been no mouse or keyboard input for a few seconds.")
+        self.throttle_checkbox.setChecked(self.settings.value('yield_to_artist', defaultValue=False, type=bool))
+        batch_options_layout.addWidget(self.throttle_checkbox)
         batch_options_layout.addStretch()
 
         # Create separator line
@@ -210,6 +459,52 @@ class RenderProgressPanel(QtWidgets.QWidget):
         hbox_threads.addStretch()
         self.layout.addLayout(hbox_threads)
 
+        # Tile-split rendering for frames too big for one instance's RAM
+        hbox_tiles = QtWidgets.QHBoxLayout()
+        self.tile_bands_label = QtWidgets.QLabel('Tile Bands:')
+        self.tile_bands_spinbox = QtWidgets.QSpinBox()
+        self.tile_bands_spinbox.setMinimum(1)
+        self.tile_bands_spinbox.setMaximum(64)
+        self.tile_bands_spinbox.setValue(self.settings.value('tile_bands', defaultValue=1, type=int))
+        self.tile_bands_spinbox.setMaximumWidth(80)
+        self.tile_bands_spinbox.setToolTip(
+            "Render each frame as this many horizontal bands on different instances, then assemble them. "
+            "1 renders whole frames.")
+        hbox_tiles.addWidget(self.tile_bands_label)
+        hbox_tiles.addWidget(self.tile_bands_spinbox)
+        self.shared_writes_checkbox = QtWidgets.QCheckBox("Include Writes Sharing Upstream")
+        self.shared_writes_checkbox.setToolTip(
+            "Render every enabled Write fed by the same upstream nodes in the same Nuke processes (-X W1,W2), "
+            "so the shared tree is computed once per frame.")
+        self.shared_writes_checkbox.setChecked(self.settings.value('shared_writes', defaultValue=False, type=bool))
+        hbox_tiles.addWidget(self.shared_writes_checkbox)
+        self.pipeline_checkbox = QtWidgets.QCheckBox("Pipeline Precomps")
+        self.pipeline_checkbox.setToolTip(
+            "If a Read upstream of this Write reads another Write's output, render that precomp too and "
+            "start each frame of this Write as soon as the precomp frames it needs are on disk.")
+        self.pipeline_checkbox.setChecked(self.settings.value('pipeline_precomps', defaultValue=False, type=bool))
+        hbox_tiles.addWidget(self.pipeline_checkbox)
+        self.proxy_pass_checkbox = QtWidgets.QCheckBox("Proxy Pass First")
+        self.proxy_pass_checkbox.setToolTip(
+            "Render the whole range in proxy mode (-p) to the Write's proxy path first, "
+            "then re-render it at full resolution.")
+        self.proxy_pass_checkbox.setChecked(self.settings.value('proxy_pass', defaultValue=False, type=bool))
+        hbox_tiles.addWidget(self.proxy_pass_checkbox)
+        self.profile_checkbox = QtWidgets.QCheckBox("Profile Nodes")
+        self.profile_checkbox.setToolTip(
+            "Run every instance with Nuke's performance profile (-Pf) and list the slowest nodes "
+            "across all instances when the render ends.")
+        self.profile_checkbox.setChecked(self.settings.value('profile_nodes', defaultValue=False, type=bool))
+        hbox_tiles.addWidget(self.profile_checkbox)
+        self.watch_output_checkbox = QtWidgets.QCheckBox("Watch Output Files")
+        self.watch_output_checkbox.setToolTip(
+            "Also count frames as their files are written to the output directories (inotify on Linux, "
+            "directory listing elsewhere), for Nuke versions or -V levels whose output lines are not parsed.")
+        self.watch_output_checkbox.setChecked(self.settings.value('watch_output', defaultValue=False, type=bool))
+        hbox_tiles.addWidget(self.watch_output_checkbox)
+        hbox_tiles.addStretch()
+        self.layout.addLayout(hbox_tiles)
+
         # # Expose -m and -c variables
         hbox_memory = QtWidgets.QHBoxLayout()
         self.memory_label = QtWidgets.QLabel('Max Threads (-m):')
@@ -244,6 +539,15 @@ class RenderProgressPanel(QtWidgets.QWidget):
         hbox_cache.addStretch()
         self.layout.addLayout(hbox_cache)
 
+        # Proxy pass progress, shown above the full-res progress in two-pass renders
+        self.proxy_progress_bar = QtWidgets.QProgressBar()
+        self.proxy_progress_bar.setFormat('Proxy %p%')
+        self.proxy_progress_bar.hide()
+        self.layout.addWidget(self.proxy_progress_bar)
+        self.proxy_estimated_time_label = QtWidgets.QLabel()
+        self.proxy_estimated_time_label.hide()
+        self.layout.addWidget(self.proxy_estimated_time_label)
+
         # Overall progress bar
         self.overall_progress_bar = QtWidgets.QProgressBar()
         self.layout.addWidget(self.overall_progress_bar)
@@ -251,6 +555,10 @@ class RenderProgressPanel(QtWidgets.QWidget):
         # Overall estimated time remaining
         self.overall_estimated_time_label = QtWidgets.QLabel('Estimated time remaining: N/A')
         self.layout.addWidget(self.overall_estimated_time_label)
+        # Per-Write progress when several Writes render together
+        self.write_progress_label = QtWidgets.QLabel()
+        self.write_progress_label.hide()
+        self.layout.addWidget(self.write_progress_label)
 
         # Start, Pause, and Stop buttons
         hbox_buttons = QtWidgets.QHBoxLayout()
@@ -265,6 +573,21 @@ class RenderProgressPanel(QtWidgets.QWidget):
         hbox_buttons.addStretch()
         self.layout.addLayout(hbox_buttons)
 
+        # Background queue: jobs keep rendering after the panel or Nuke closes
+        hbox_queue = QtWidgets.QHBoxLayout()
+        self.queue_button = QtWidgets.QPushButton('Submit to Queue')
+        self.queue_button.setToolTip('Render in a background process that survives closing Nuke')
+        self.priority_label = QtWidgets.QLabel('Priority:')
+        self.priority_spinbox = QtWidgets.QSpinBox()
+        self.priority_spinbox.setRange(0, 100)
+        self.priority_spinbox.setValue(50)
+        self.priority_spinbox.setMaximumWidth(80)
+        hbox_queue.addWidget(self.queue_button)
+        hbox_queue.addWidget(self.priority_label)
+        hbox_queue.addWidget(self.priority_spinbox)
+        hbox_queue.addStretch()
+        self.layout.addLayout(hbox_queue)
+
         # Scroll Area for thread progress
         self.scroll_area = QtWidgets.QScrollArea()
         self.scroll_widget = QtWidgets.QWidget()
@@ -274,6 +597,24 @@ class RenderProgressPanel(QtWidgets.QWidget):
         self.scroll_area.setWidget(self.scroll_widget)
         self.layout.addWidget(self.scroll_area)
 
+        # Background jobs (collapsible)
+        self.collapsible_queue_group = CollapsibleWidget(title='Show Background Jobs')
+        self.queue_tree = QtWidgets.QTreeWidget()
+        self.queue_tree.setHeaderLabels(['Job', 'Write', 'State', 'Progress', 'ETA'])
+        self.queue_tree.setRootIsDecorated(False)
+        self.cancel_job_button = QtWidgets.QPushButton('Cancel Selected Job')
+        self.collapsible_queue_group.add_widget(self.queue_tree)
+        self.collapsible_queue_group.add_widget(self.cancel_job_button)
+        self.layout.addWidget(self.collapsible_queue_group)
+
+        # Slowest nodes from the performance profiles (collapsible)
+        self.collapsible_profile_group = CollapsibleWidget(title='Show Hot Nodes')
+        self.profile_tree = QtWidgets.QTreeWidget()
+        self.profile_tree.setHeaderLabels(['Node', 'Class', 'Total', 'Avg/Frame', 'CPU', 'Calls', 'Peak Mem', 'Avg Mem'])
+        self.profile_tree.setRootIsDecorated(False)
+        self.collapsible_profile_group.add_widget(self.profile_tree)
+        self.layout.addWidget(self.collapsible_profile_group)
+
         # Grouped Log Area (collapsible)
         self.collapsible_log_group = CollapsibleWidget(title='Show Errors and Frame Logs')
         self.grouped_log_text_edit = QtWidgets.QTextEdit()
@@ -285,6 +626,8 @@ class RenderProgressPanel(QtWidgets.QWidget):
         self.start_button.clicked.connect(self.start_render)
         self.pause_button.clicked.connect(self.pause_render)
         self.stop_button.clicked.connect(self.stop_render)
+        self.queue_button.clicked.connect(self.submit_to_queue)
+        self.cancel_job_button.clicked.connect(self.cancel_queue_job)
         self.write_node_combo.currentIndexChanged.connect(self.write_node_changed)
         self.custom_frame_range_checkbox.stateChanged.connect(self.custom_frame_range_toggled)
 
@@ -297,6 +640,15 @@ class RenderProgressPanel(QtWidgets.QWidget):
         self.write_node_timer.timeout.connect(self.populate_write_nodes)
         self.write_node_timer.start()
 
+        # Reattach to background jobs and keep their progress current
+        self.queue_timer = QtCore.QTimer()
+        self.queue_timer.setInterval(2000)
+        self.queue_timer.timeout.connect(self.refresh_queue_jobs)
+        self.queue_timer.start()
+        self.refresh_queue_jobs()
+        if self.queue_tree.topLevelItemCount():
+            self.collapsible_queue_group.toggle_button.setChecked(True)
+
         # Load saved settings
         self.load_settings()
 
@@ -350,16 +702,74 @@ class RenderProgressPanel(QtWidgets.QWidget):
             logging.error(f"Error evaluating filename for frame {frame}: {e}")
             return False
 
-    def start_render(self):
+    def fingerprint_location(self, frame):
         """
-        Initiates the rendering process.
+        Returns (directory, key) under which the Write's frame fingerprints are stored.
         """
-        if self.is_rendering:
-            nuke.message('Render is already in progress.')
+        filename = nuke.callbacks.filenameFilter(self.write_node['file'].evaluate(frame))
+        return os.path.dirname(filename), os.path.basename(self.write_node['file'].value())
+
+    def save_frame_fingerprints(self):
+        """
+        Stores the fingerprints of the frames that rendered successfully.
+        """
+        if not self.frame_fingerprints or not self.completed_frames:
             return
+        rendered = {frame: self.frame_fingerprints[frame]
+                    for frame in self.completed_frames if frame in self.frame_fingerprints}
+        try:
+            render_engine.save_fingerprints(self.fingerprint_dir, self.fingerprint_key, rendered)
+            logging.info(f"Saved fingerprints for {len(rendered)} frames in {self.fingerprint_dir}.")
+        except OSError as e:
+            logging.error(f"Could not save frame fingerprints: {e}")
+
+    def preflight_check(self, frames):
+        """
+        Checks that the Reads upstream of the Write have every frame the render needs.
+        Returns False if the user chose not to render with missing inputs.
+        """
+        start_time = time.time()
+        try:
+            requirements = collect_read_requirements(self.write_node, frames)
+            if self.pipeline_checkbox.isChecked():
+                # Precomps rendered in the same pipeline do not exist yet
+                for read, _ in precomp_writes(self.write_node):
+                    for label in [label for label in requirements if label.startswith(read.fullName() + ' (')]:
+                        del requirements[label]
+            missing, unchecked = render_engine.check_input_availability(requirements)
+        except Exception as e:
+            logging.error(f"Pre-flight check failed: {e}")
+            return True
+        file_count = sum(len(frame_paths) for frame_paths in requirements.values())
+        logging.info(f"Pre-flight checked {file_count} input files from {len(requirements)} Reads "
+                     f"in {time.time() - start_time:.2f}s.")
+
+        if not missing and not unchecked:
+            return True
+        lines = []
+        for label, frames_missing in sorted(missing.items()):
+            ranges = render_engine.frames_to_frame_ranges(frames_missing)
+            line = f"{label}: missing {len(frames_missing)} frames: {', '.join(ranges)}"
+            self.grouped_log_text_edit.append(f"Pre-flight: {line}")
+            logging.warning(f"Pre-flight: {line}")
+            if len(ranges) > 10:
+                line = f"{label}: missing {len(frames_missing)} frames: {', '.join(ranges[:10])}, ..."
+            lines.append(line)
+        for directory in unchecked:
+            line = f"Could not list {directory} in time"
+            self.grouped_log_text_edit.append(f"Pre-flight: {line}")
+            logging.warning(f"Pre-flight: {line}")
+            lines.append(line)
+        return nuke.ask("Missing input frames:\n\n" + "\n".join(lines) + "\n\nRender anyway?")
+
+    def prepare_frames(self):
+        """
+        Saves the script and works out which frames need rendering, applying the
+        overwrite, changed-frames and pre-flight options. Returns None to abort.
+        """
         if not self.write_node_combo.currentText():
             nuke.message('Please select a Write node.')
-            return
+            return None
 
         self.write_node = nuke.toNode(self.write_node_combo.currentText())
 
@@ -376,9 +786,48 @@ class RenderProgressPanel(QtWidgets.QWidget):
 
         if start_frame > end_frame:
             nuke.message('Start frame must be less than or equal to end frame.')
+            return None
+
+        # Prepare frames to render
+        all_frames = list(range(start_frame, end_frame + 1))  # Ensure this is the full range of frames
+
+        # Fingerprint the upstream graph so only frames that changed are re-rendered
+        self.frame_fingerprints = None
+        self.completed_frames = set()
+        if self.changed_only_checkbox.isChecked():
+            self.fingerprint_dir, self.fingerprint_key = self.fingerprint_location(start_frame)
+            self.frame_fingerprints = compute_frame_fingerprints(self.write_node, all_frames)
+            stored = render_engine.load_fingerprints(self.fingerprint_dir, self.fingerprint_key)
+            changed = set(render_engine.changed_frames(all_frames, self.frame_fingerprints, stored))
+            all_frames = [frame for frame in all_frames if frame in changed or not self.frame_exists(frame)]
+            logging.info(f"{len(changed)} frames changed since the last render of {self.write_node.name()}.")
+        # If overwrite is disabled, remove frames that have already been rendered
+        elif not self.overwrite_checkbox.isChecked():
+            all_frames = [frame for frame in all_frames if not self.frame_exists(frame)]
+
+        if not all_frames:
+            nuke.message('All frames have already been rendered. Nothing to do.')
+            return None
+
+        self.settings.setValue('preflight_check', self.preflight_checkbox.isChecked())
+        if self.preflight_checkbox.isChecked() and not self.preflight_check(all_frames):
+            return None
+        return all_frames
+
+    def start_render(self):
+        """
+        Initiates the rendering process.
+        """
+        if self.is_rendering:
+            nuke.message('Render is already in progress.')
+            return
+
+        all_frames = self.prepare_frames()
+        if not all_frames:
             return
 
         num_threads = self.threads_spinbox.value()
+        self.hang_events = []
 
         # Save settings
         self.settings.setValue('num_threads', num_threads)
@@ -391,21 +840,135 @@ class RenderProgressPanel(QtWidgets.QWidget):
         batch_render_enabled = self.batch_render_checkbox.isChecked()
         batch_size = self.batch_size_spinbox.value()
 
-        # Prepare frames to render
-        # At the start of the render, calculate the total number of frames
-        all_frames = list(range(start_frame, end_frame + 1))  # Ensure this is the full range of frames
-        self.total_frames_all = len(all_frames)  # This should be the total number of frames
+        self.total_frames_all = len(all_frames)  # Store the total number of frames to render
 
-        # If overwrite is disabled, remove frames that have already been rendered
-        if not self.overwrite_checkbox.isChecked():
-            all_frames = [frame for frame in all_frames if not self.frame_exists(frame)]
+        # One coordinator per render so idle instances can back up stragglers
+        self.settings.setValue('speculative_backups', self.speculative_checkbox.isChecked())
+        coordinator = render_engine.SpeculativeCoordinator() if self.speculative_checkbox.isChecked() else None
+
+        # Tile-split rendering replaces the frame split with per-band work
+        tile_bands = self.tile_bands_spinbox.value()
+        self.settings.setValue('tile_bands', tile_bands)
+        self.tile_render = None
+        stages_per_thread = None
+        if tile_bands > 1:
+            stages_per_thread = self.prepare_tile_render(all_frames, tile_bands, num_threads)
+            if not stages_per_thread:
+                return
+            num_threads = len(stages_per_thread)
+            batch_render_enabled = False
+            coordinator = None
+            self.total_frames_all = sum(len(stage[3]) for stages in stages_per_thread for stage in stages)
+
+        # Writes fed by the same upstream tree render in the same processes
+        self.settings.setValue('shared_writes', self.shared_writes_checkbox.isChecked())
+        shared_writes = None
+        if self.shared_writes_checkbox.isChecked() and not stages_per_thread:
+            shared_writes = shared_upstream_writes(self.write_node)
+            if shared_writes:
+                logging.info(f"Rendering {', '.join(node.name() for node in shared_writes)} "
+                             f"together with {self.write_node.name()}.")
+        self.write_progress = {}
+        if shared_writes:
+            self.write_progress = {node.name(): set() for node in [self.write_node] + shared_writes}
+        self.write_progress_label.setVisible(bool(shared_writes))
+        self.update_write_progress_label()
+
+        # Precomps read back by this Write render alongside it, frame by frame
+        self.settings.setValue('pipeline_precomps', self.pipeline_checkbox.isChecked())
+        self.pipeline = None
+        if self.pipeline_checkbox.isChecked() and not stages_per_thread:
+            self.pipeline = self.prepare_pipeline(all_frames, max(1, num_threads // 2))
+        if self.pipeline and num_threads == 1:
+            # A single instance cannot overlap the two; render the precomp frames first
+            stages_per_thread = [self.sequential_pipeline_stages(all_frames, shared_writes)]
+            batch_render_enabled = False
+            coordinator = None
+            self.pipeline = None
+
+        # Review pass: the whole range at proxy resolution first, then full resolution
+        self.settings.setValue('proxy_pass', self.proxy_pass_checkbox.isChecked())
+        self.render_pass = None
+        if self.proxy_pass_checkbox.isChecked() and not stages_per_thread and not self.pipeline:
+            missing_proxy = [node.name() for node in [self.write_node] + (shared_writes or [])
+                             if not node['proxy'].value()]
+            if missing_proxy:
+                nuke.message(f"No proxy file path set on {', '.join(missing_proxy)}.")
+                return
+            self.render_pass = 'proxy'
+            self.full_pass = {
+                'all_frames': all_frames, 'num_threads': num_threads, 'max_ram': max_ram,
+                'cache_size': cache_size, 'batch_render_enabled': batch_render_enabled,
+                'batch_size': batch_size, 'speculative': coordinator is not None, 'shared_writes': shared_writes,
+            }
+        self.proxy_progress_bar.setValue(0)
+        self.proxy_progress_bar.setVisible(self.render_pass == 'proxy')
+        self.proxy_estimated_time_label.setVisible(self.render_pass == 'proxy')
+        self.proxy_estimated_time_label.setText('Proxy pass: estimated time remaining: N/A')
 
-        if not all_frames:
-            nuke.message('All frames have already been rendered. Nothing to do.')
+        # Disable start button, enable pause and stop buttons
+        self.start_button.setEnabled(False)
+        self.pause_button.setEnabled(True)
+        self.stop_button.setEnabled(True)
+        self.threads_spinbox.setEnabled(False)
+        self.custom_frame_range_checkbox.setEnabled(False)
+        self.start_frame_spinbox.setEnabled(False)
+        self.end_frame_spinbox.setEnabled(False)
+        self.write_node_combo.setEnabled(False)
+        self.overwrite_checkbox.setEnabled(False)
+        self.preflight_checkbox.setEnabled(False)
+        self.changed_only_checkbox.setEnabled(False)
+        self.memory_lineedit.setEnabled(False)
+        self.cache_lineedit.setEnabled(False)
+        self.batch_render_checkbox.setEnabled(False)
+        self.batch_size_spinbox.setEnabled(False)
+        self.speculative_checkbox.setEnabled(False)
+        self.tile_bands_spinbox.setEnabled(False)
+        self.shared_writes_checkbox.setEnabled(False)
+        self.pipeline_checkbox.setEnabled(False)
+        self.proxy_pass_checkbox.setEnabled(False)
+        self.profile_checkbox.setEnabled(False)
+        self.watch_output_checkbox.setEnabled(False)
+        self.throttle_checkbox.setEnabled(False)
+        self.settings.setValue('watch_output', self.watch_output_checkbox.isChecked())
+
+        # Every process writes its profile here; they are merged when the render ends
+        self.settings.setValue('profile_nodes', self.profile_checkbox.isChecked())
+        self.profile_dir = None
+        if self.profile_checkbox.isChecked():
+            self.profile_dir = tempfile.mkdtemp(prefix=f'render_profile_{self.write_node.name()}_')
+            self.profile_tree.clear()
+
+        self.clear_render_threads()
+
+        # Watch the artist's input in this Nuke session and back the instances off while they work
+        self.settings.setValue('yield_to_artist', self.throttle_checkbox.isChecked())
+        self.throttle = None
+        if self.throttle_checkbox.isChecked():
+            self.artist_activity = ArtistActivityFilter()
+            QtWidgets.QApplication.instance().installEventFilter(self.artist_activity)
+            self.throttle = render_engine.WorkstationThrottle(
+                lambda: [rt.worker for rt in list(self.render_threads) if rt.worker],
+                input_idle=self.artist_activity.idle_seconds, on_change=self.throttle_changed)
+            if not self.throttle.start():
+                self.throttle = None
+
+        if self.pipeline:
+            self.start_pipelined_threads(num_threads, max_ram, cache_size, batch_size, shared_writes)
+            self.is_rendering = True
             return
 
-        self.total_frames_all = len(all_frames)  # Store the total number of frames to render
+        self.start_frame_threads(all_frames, num_threads, max_ram, cache_size, batch_render_enabled, batch_size,
+                                 coordinator, stages_per_thread, shared_writes, proxy=self.render_pass == 'proxy')
+        if self.render_pass == 'proxy':
+            self.overall_estimated_time_label.setText('Full-res pass: waiting for the proxy pass')
+        self.is_rendering = True
 
+    def start_frame_threads(self, all_frames, num_threads, max_ram, cache_size, batch_render_enabled, batch_size,
+                            coordinator=None, stages_per_thread=None, shared_writes=None, proxy=False):
+        """
+        Splits the frames over num_threads RenderThreads, or shares them as batches, and starts them.
+        """
         # Initialize shared data structures if batch rendering is enabled
         if batch_render_enabled:
             self.remaining_frames = all_frames.copy()  # Shared list of frames
@@ -420,22 +983,129 @@ class RenderProgressPanel(QtWidgets.QWidget):
             for idx, frame in enumerate(all_frames):
                 frames_per_thread[idx % num_threads].append(frame)
 
-        # Disable start button, enable pause and stop buttons
-        self.start_button.setEnabled(False)
-        self.pause_button.setEnabled(True)
-        self.stop_button.setEnabled(True)
-        self.threads_spinbox.setEnabled(False)
-        self.custom_frame_range_checkbox.setEnabled(False)
-        self.start_frame_spinbox.setEnabled(False)
-        self.end_frame_spinbox.setEnabled(False)
-        self.write_node_combo.setEnabled(False)
-        self.overwrite_checkbox.setEnabled(False)
-        self.memory_lineedit.setEnabled(False)
-        self.cache_lineedit.setEnabled(False)
-        self.batch_render_checkbox.setEnabled(False)
-        self.batch_size_spinbox.setEnabled(False)
+        # Start threads
+        for idx in range(num_threads):
+            thread_id = idx + 1
+            frames_to_render = frames_per_thread[idx] if not batch_render_enabled else None
+
+            render_thread = RenderThread(
+                self.write_node,
+                frames_to_render,
+                thread_id,
+                max_ram=max_ram,
+                cache_size=cache_size,
+                batch_render=batch_render_enabled,
+                batch_size=batch_size if batch_render_enabled else None,
+                remaining_frames=self.remaining_frames if batch_render_enabled else None,
+                remaining_frames_lock=self.remaining_frames_lock if batch_render_enabled else None,
+                coordinator=coordinator,
+                stages=stages_per_thread[idx] if stages_per_thread else None,
+                shared_writes=shared_writes,
+                proxy=proxy
+            )
+            self.add_render_thread(render_thread, f'Thread {thread_id} (proxy)' if proxy else f'Thread {thread_id}')
+
+    def start_full_pass(self):
+        """
+        Re-queues the range at full resolution once the proxy pass is complete.
+        """
+        options = self.full_pass
+        self.render_pass = 'full'
+        elapsed = time.time() - self.pass_start_time
+        self.proxy_progress_bar.setValue(100)
+        self.proxy_estimated_time_label.setText(f'Proxy pass: complete in {self.format_time(elapsed)}')
+        self.grouped_log_text_edit.append("Proxy pass complete. Starting the full-resolution pass.")
+        self.clear_render_threads()
+        self.total_frames_all = len(options['all_frames'])
+        self.completed_frames = set()
+        coordinator = render_engine.SpeculativeCoordinator() if options['speculative'] else None
+        self.start_frame_threads(options['all_frames'], options['num_threads'], options['max_ram'],
+                                 options['cache_size'], options['batch_render_enabled'], options['batch_size'],
+                                 coordinator, shared_writes=options['shared_writes'])
+
+    def prepare_pipeline(self, all_frames, producers):
+        """
+        Finds a precomp Write whose output this Write reads and maps every frame
+        to the precomp frames it needs. Returns a dict describing the pipeline,
+        or None when there is nothing to pipeline.
+        """
+        pairs = precomp_writes(self.write_node)
+        if not pairs:
+            logging.info(f"No precomp Write feeds {self.write_node.name()}; rendering it on its own.")
+            return None
+        read, precomp_write = pairs[0]
+        if len({write.name() for _, write in pairs}) > 1:
+            logging.warning(f"Several precomps feed {self.write_node.name()}; "
+                            f"only {precomp_write.name()} is pipelined.")
+        dependencies = pipeline_dependencies(self.write_node, all_frames, read, precomp_write)
+        precomp_frames = sorted(set().union(*dependencies.values()))
+
+        # Without overwrite, precomp frames already on disk count as written
+        existing = []
+        if not self.overwrite_checkbox.isChecked():
+            for frame in precomp_frames:
+                path = nuke.callbacks.filenameFilter(precomp_write['file'].evaluate(frame))
+                if os.path.exists(path):
+                    existing.append(frame)
+        precomp_frames = [frame for frame in precomp_frames if frame not in set(existing)]
+        frames = render_engine.PipelinedFrames(dependencies, producers, upstream_done=existing)
+        self.total_frames_all = len(all_frames) + len(precomp_frames)
+        logging.info(f"Pipelining {len(precomp_frames)} frames of {precomp_write.name()} "
+                     f"into {len(all_frames)} frames of {self.write_node.name()}.")
+        return {'write': precomp_write, 'frames': precomp_frames, 'source': frames, 'producers': producers}
+
+    def sequential_pipeline_stages(self, all_frames, shared_writes=None):
+        """
+        Returns the stages rendering the pipeline's precomp frames and then this
+        Write's frames in one instance, for when only one may run.
+        """
+        script_path = nuke.root().name()
+        precomp_write = self.pipeline['write']
+        write_name = self.write_node.name()
+        output_pattern = self.write_node['file'].value()
+        if shared_writes:
+            write_nodes = [self.write_node] + list(shared_writes)
+            write_name = [node.name() for node in write_nodes]
+            output_pattern = {node.name(): node['file'].value() for node in write_nodes}
+        logging.info(f"One instance: rendering {len(self.pipeline['frames'])} frames of {precomp_write.name()} "
+                     f"before {self.write_node.name()}.")
+        stages = [(script_path, write_name, output_pattern, all_frames)]
+        if self.pipeline['frames']:
+            stages.insert(0, (script_path, precomp_write.name(), precomp_write['file'].value(),
+                              self.pipeline['frames']))
+        return stages
+
+    def start_pipelined_threads(self, num_threads, max_ram, cache_size, batch_size, shared_writes):
+        """
+        Starts precomp threads and downstream threads that take frames as the precomp writes them.
+        """
+        pipeline = self.pipeline
+        precomp_remaining = list(pipeline['frames'])
+        precomp_lock = threading.Lock()
+        for idx in range(num_threads):
+            thread_id = idx + 1
+            is_precomp = idx < pipeline['producers']
+            render_thread = RenderThread(
+                pipeline['write'] if is_precomp else self.write_node,
+                None,
+                thread_id,
+                max_ram=max_ram,
+                cache_size=cache_size,
+                batch_render=True,
+                batch_size=batch_size,
+                remaining_frames=precomp_remaining if is_precomp else None,
+                remaining_frames_lock=precomp_lock if is_precomp else None,
+                shared_writes=None if is_precomp else shared_writes,
+                frame_source=None if is_precomp else pipeline['source'],
+                feeds=pipeline['source'] if is_precomp else None
+            )
+            name = pipeline['write'].name() if is_precomp else self.write_node.name()
+            self.add_render_thread(render_thread, f'Thread {thread_id} ({name})')
 
-        # Clear previous thread widgets
+    def clear_render_threads(self):
+        """
+        Removes the previous threads' widgets and resets the overall progress.
+        """
         for widget in self.thread_widgets.values():
             self.scroll_layout.removeWidget(widget)
             widget.deleteLater()
@@ -449,56 +1119,175 @@ class RenderProgressPanel(QtWidgets.QWidget):
 
         # Initialize total frames rendered
         self.total_frames_rendered = 0
+        self.pass_start_time = time.time()
 
-        # Start threads
+    def add_render_thread(self, render_thread, title):
+        """
+        Connects a RenderThread, gives it a progress widget and starts it on its own QThread.
+        """
+        thread_id = render_thread.thread_id
+        render_thread.profile_dir = self.profile_dir
+        render_thread.watch_output = self.watch_output_checkbox.isChecked()
+        render_thread.progress_updated.connect(self.update_progress)
+        render_thread.render_finished.connect(self.render_complete)
+        render_thread.render_stopped.connect(self.render_stopped)
+        render_thread.log_message.connect(self.update_log)
+        render_thread.batch_started.connect(self.reset_thread_progress)
+        render_thread.write_progress.connect(self.update_write_progress)
+        render_thread.render_hung.connect(self.record_hang)
+
+        # Create UI components for each thread without the log
+        thread_widget = QtWidgets.QGroupBox(title)
+        vbox = QtWidgets.QVBoxLayout()
+        progress_bar = QtWidgets.QProgressBar()
+        stats_label = QtWidgets.QLabel('Time per frame: N/A\nEstimated time remaining: N/A')
+        vbox.addWidget(progress_bar)
+        vbox.addWidget(stats_label)
+        thread_widget.setLayout(vbox)
+        self.scroll_layout.addWidget(thread_widget)
+        self.thread_widgets[thread_id] = thread_widget
+
+        # Store widgets for updating
+        render_thread.progress_bar = progress_bar
+        render_thread.stats_label = stats_label
+        self.render_threads.append(render_thread)
+
+        # Start the thread
+        thread = QtCore.QThread()
+        render_thread.moveToThread(thread)
+        thread.started.connect(render_thread.run)
+        thread.finished.connect(thread.deleteLater)
+        render_thread.thread = thread
+        self.threads.append(thread)
+        thread.start()
+
+    def prepare_tile_render(self, all_frames, bands, num_threads):
+        """
+        Writes the band and assembly scripts for the selected Write and spreads the
+        bands over the instances. Returns the stages for each thread, or None to abort.
+        """
+        if '.' in self.write_node.fullName():
+            nuke.message('Tile rendering needs a Write node at the top level of the script.')
+            return None
+        try:
+            tile = tile_render.prepare_tile_render(
+                nuke.root().name(), self.write_node.name(),
+                self.write_node.width(), self.write_node.height(), bands,
+                min(all_frames), max(all_frames), nuke.filename(self.write_node))
+        except (OSError, ValueError) as e:
+            nuke.message(f'Could not prepare tile render:\n{e}')
+            return None
+        self.tile_render = dict(tile, frames=all_frames, phase='bands')
+
+        # With more instances than bands, split each band's frames as well
+        chunks = max(1, -(-num_threads // len(tile['band_scripts'])))
+        chunk_size = -(-len(all_frames) // chunks)
+        units = []
+        for start in range(0, len(all_frames), chunk_size):
+            for script, band_path in zip(tile['band_scripts'], tile['band_paths']):
+                units.append((script, tile_render.BAND_WRITE, band_path, all_frames[start:start + chunk_size]))
+        stages_per_thread = [units[idx::num_threads] for idx in range(min(num_threads, len(units)))]
+        logging.info(f"Tile rendering {self.write_node.name()} as {len(tile['band_scripts'])} bands "
+                     f"in {tile['work_dir']}.")
+        return stages_per_thread
+
+    def start_tile_assembly(self):
+        """
+        Stitches the rendered bands into the final frames, split across the instances.
+        """
+        tile = self.tile_render
+        tile['phase'] = 'assemble'
+        frames = tile['frames']
+        num_threads = min(len(self.render_threads), len(frames))
+        self.grouped_log_text_edit.append(f"Assembling {len(tile['band_scripts'])} bands into {len(frames)} frames.")
+        self.clear_render_threads()
+        self.total_frames_all = len(frames)
+        output_pattern = self.write_node['file'].value()
         for idx in range(num_threads):
-            thread_id = idx + 1
-            frames_to_render = frames_per_thread[idx] if not batch_render_enabled else None
-
+            thread_frames = frames[idx::num_threads]
             render_thread = RenderThread(
-                self.write_node,
-                frames_to_render,
-                thread_id,
-                max_ram=max_ram,
-                cache_size=cache_size,
-                batch_render=batch_render_enabled,
-                batch_size=batch_size if batch_render_enabled else None,
-                remaining_frames=self.remaining_frames if batch_render_enabled else None,
-                remaining_frames_lock=self.remaining_frames_lock if batch_render_enabled else None
+                self.write_node, thread_frames, idx + 1,
+                max_ram=self.memory_lineedit.text().strip(),
+                cache_size=self.cache_lineedit.text().strip(),
+                stages=[(tile['assembly_script'], self.write_node.name(), output_pattern, thread_frames)]
             )
+            self.add_render_thread(render_thread, f'Thread {idx + 1} (assembly)')
 
-            render_thread.progress_updated.connect(self.update_progress)
-            render_thread.render_finished.connect(self.render_complete)
-            render_thread.render_stopped.connect(self.render_stopped)
-            render_thread.log_message.connect(self.update_log)
-            render_thread.batch_started.connect(self.reset_thread_progress)
-
-            # Create UI components for each thread without the log
-            thread_widget = QtWidgets.QGroupBox(f'Thread {thread_id}')
-            vbox = QtWidgets.QVBoxLayout()
-            progress_bar = QtWidgets.QProgressBar()
-            stats_label = QtWidgets.QLabel('Time per frame: N/A\nEstimated time remaining: N/A')
-            vbox.addWidget(progress_bar)
-            vbox.addWidget(stats_label)
-            thread_widget.setLayout(vbox)
-            self.scroll_layout.addWidget(thread_widget)
-            self.thread_widgets[thread_id] = thread_widget
-
-            # Store widgets for updating
-            render_thread.progress_bar = progress_bar
-            render_thread.stats_label = stats_label
-            self.render_threads.append(render_thread)
-
-            # Start the thread
-            thread = QtCore.QThread()
-            render_thread.moveToThread(thread)
-            thread.started.connect(render_thread.run)
-            thread.finished.connect(thread.deleteLater)
-            render_thread.thread = thread
-            self.threads.append(thread)
-            thread.start()
+    def submit_to_queue(self):
+        """
+        Queues the current render settings as a background job.
+        """
+        all_frames = self.prepare_frames()
+        if not all_frames:
+            return
+        fingerprints = None
+        if self.frame_fingerprints:
+            fingerprints = (self.fingerprint_dir, self.fingerprint_key, self.frame_fingerprints)
+            self.frame_fingerprints = None  # Saved by the daemon, not by this panel
+        try:
+            job_id = render_queue.submit_job(
+                nuke.root().name(),
+                self.write_node.name(),
+                all_frames,
+                workers=self.threads_spinbox.value(),
+                priority=self.priority_spinbox.value(),
+                nuke_executable=nuke.EXE_PATH,
+                max_ram=self.memory_lineedit.text().strip(),
+                cache_size=self.cache_lineedit.text().strip(),
+                batch_size=self.batch_size_spinbox.value(),
+                output_pattern=self.write_node['file'].value(),
+                fingerprints=fingerprints
+            )
+            render_queue.ensure_daemon(render_queue.python_command(nuke.EXE_PATH))
+        except Exception as e:
+            nuke.message(f"Could not queue render:\n{e}")
+            logging.error(f"Could not queue render: {e}")
+            return
+        self.grouped_log_text_edit.append(f"Queued job {job_id}: {self.write_node.name()}, {len(all_frames)} frames.")
+        self.collapsible_queue_group.toggle_button.setChecked(True)
+        self.refresh_queue_jobs()
 
-        self.is_rendering = True
+    def refresh_queue_jobs(self):
+        """
+        Shows active background jobs and the most recent finished ones.
+        """
+        jobs = render_queue.list_jobs()
+        active = [job for job in jobs if job['status'].get('state') in render_queue.ACTIVE_STATES]
+        recent = [job for job in jobs if job['status'].get('state') not in render_queue.ACTIVE_STATES][-10:]
+        selected = self.queue_tree.currentItem().text(0) if self.queue_tree.currentItem() else None
+        self.queue_tree.clear()
+        for job in active + recent:
+            status = job['status']
+            done = status.get('frames_done', 0)
+            total = job['frame_count']
+            eta = status.get('eta')
+            item = QtWidgets.QTreeWidgetItem([
+                job['id'],
+                job['write_node'],
+                status.get('state', render_queue.JOB_PENDING),
+                f"{done}/{total} ({int(done * 100 / total) if total else 0}%)",
+                self.format_time(eta) if eta is not None and status.get('state') == render_queue.JOB_RUNNING else '',
+            ])
+            item.setToolTip(0, job['source_script'])
+            if status.get('hangs'):
+                item.setToolTip(2, '\n'.join(
+                    f"Worker {event['worker']} hung on frame {event['frame']} after {event['waited']}s"
+                    + (f", gave up ({', '.join(event['dropped'])} not rendered)" if event.get('gave_up') else '')
+                    for event in status['hangs']))
+            self.queue_tree.addTopLevelItem(item)
+            if job['id'] == selected:
+                self.queue_tree.setCurrentItem(item)
+
+    def cancel_queue_job(self):
+        """
+        Cancels the background job selected in the jobs list.
+        """
+        item = self.queue_tree.currentItem()
+        if not item:
+            return
+        render_queue.cancel_job(item.text(0))
+        logging.info(f"Cancelled background job {item.text(0)}.")
+        self.refresh_queue_jobs()
 
     def pause_render(self):
         """
@@ -539,6 +1328,8 @@ class RenderProgressPanel(QtWidgets.QWidget):
         """
         render_thread = next((rt for rt in self.render_threads if rt.thread_id == thread_id), None)
         if render_thread:
+            render_thread.frames_rendered = 0
+            render_thread.total_frames = total_frames
             render_thread.progress_bar.setValue(0)
             render_thread.stats_label.setText('Time/frame: N/A\nETA: N/A')
             # Optionally, update the thread's group box title to reflect the new batch
@@ -546,7 +1337,7 @@ class RenderProgressPanel(QtWidgets.QWidget):
             if thread_widget:
                 thread_widget.setTitle(f'Thread {thread_id}: New Batch ({total_frames} frames)')
 
-    def update_progress(self, current_frame, total_frames, time_per_frame, thread_id):
+    def update_progress(self, current_frame, total_frames, time_per_frame, thread_id, is_output=True):
         """
         Updates the progress bars, statistics, and estimated time.
         """
@@ -555,6 +1346,10 @@ class RenderProgressPanel(QtWidgets.QWidget):
             if render_thread:
                 # Increment the frames rendered for the current thread
                 render_thread.frames_rendered += 1  # Each frame counts only when rendered
+                render_thread.total_frames_rendered += 1  # Not reset between batches
+                if render_thread.write_node is self.write_node and is_output and not render_thread.proxy and (
+                        not self.tile_render or self.tile_render['phase'] == 'assemble'):
+                    self.completed_frames.add(current_frame)  # Band and precomp frames are not this Write's output
                 total_frames_thread = render_thread.total_frames
 
                 # Update the progress bar for this specific thread
@@ -571,7 +1366,7 @@ class RenderProgressPanel(QtWidgets.QWidget):
                     )
 
                 # Now recalculate total frames rendered correctly
-                self.total_frames_rendered = sum(rt.frames_rendered for rt in self.render_threads)
+                self.total_frames_rendered = sum(rt.total_frames_rendered for rt in self.render_threads)
 
                 # Ensure total_frames_rendered doesn't exceed total_frames_all
                 if self.total_frames_rendered > self.total_frames_all:
@@ -581,7 +1376,14 @@ class RenderProgressPanel(QtWidgets.QWidget):
                 overall_progress = int((self.total_frames_rendered / self.total_frames_all) * 100)
                 if overall_progress > 100:  # Cap it at 100%
                     overall_progress = 100
-                self.overall_progress_bar.setValue(overall_progress)
+                # The proxy pass of a two-pass render has its own bar and ETA
+                if self.render_pass == 'proxy':
+                    pass_bar, pass_label, label_prefix = (
+                        self.proxy_progress_bar, self.proxy_estimated_time_label, 'Proxy pass: e')
+                else:
+                    pass_bar, pass_label, label_prefix = (
+                        self.overall_progress_bar, self.overall_estimated_time_label, 'E')
+                pass_bar.setValue(overall_progress)
 
                 # Calculate the overall estimated time remaining
                 estimated_times = [
@@ -591,9 +1393,25 @@ class RenderProgressPanel(QtWidgets.QWidget):
                 if estimated_times:
                     total_estimated_time_remaining = sum(estimated_times)
                     formatted_total_estimated_time = self.format_time(total_estimated_time_remaining)
-                    self.overall_estimated_time_label.setText(f'Estimated time remaining: {formatted_total_estimated_time}')
+                    pass_label.setText(f'{label_prefix}stimated time remaining: {formatted_total_estimated_time}')
                 else:
-                    self.overall_estimated_time_label.setText('Estimated time remaining: N/A')
+                    pass_label.setText(f'{label_prefix}stimated time remaining: N/A')
+
+    def update_write_progress(self, write_name, frame, thread_id):
+        """
+        Counts a frame written by one Write of a multi-Write render.
+        """
+        if write_name in self.write_progress:
+            self.write_progress[write_name].add(frame)
+            self.update_write_progress_label()
+
+    def update_write_progress_label(self):
+        """
+        Shows how many frames each Write of a multi-Write render has written.
+        """
+        total = self.total_frames_all
+        self.write_progress_label.setText('   '.join(
+            f'{name}: {len(frames)}/{total}' for name, frames in self.write_progress.items()))
 
     def format_time(self, seconds):
         """
@@ -631,6 +1449,14 @@ class RenderProgressPanel(QtWidgets.QWidget):
 
         # Check if all threads are done
         if all(not rt.is_running for rt in self.render_threads):
+            if self.tile_render and self.tile_render['phase'] == 'bands':
+                self.start_tile_assembly()
+                return
+            if self.render_pass == 'proxy':
+                self.start_full_pass()
+                return
+            if self.tile_render and self.tile_render['phase'] == 'assemble':
+                tile_render.remove_tile_files(self.tile_render['work_dir'])
             self.finish_rendering()
 
     def render_stopped(self, thread_id):
@@ -645,7 +1471,12 @@ class RenderProgressPanel(QtWidgets.QWidget):
             render_thread.thread.quit()
             render_thread.thread.wait()
             logging.warning(f'Thread {thread_id} render stopped.')
-        
+        if self.tile_render:
+            # Keep the bands on disk but never assemble a partial render
+            self.tile_render['phase'] = 'stopped'
+        if self.render_pass == 'proxy':
+            self.render_pass = 'stopped'  # Do not start the full-res pass
+
         # Check if all threads are done
         if all(not rt.is_running for rt in self.render_threads):
             self.finish_rendering()
@@ -655,6 +1486,35 @@ class RenderProgressPanel(QtWidgets.QWidget):
         Resets the UI elements after rendering is complete or stopped.
         """
         self.is_rendering = False
+        if self.throttle:
+            self.throttle.stop()
+            self.throttle = None
+        if self.artist_activity:
+            QtWidgets.QApplication.instance().removeEventFilter(self.artist_activity)
+            self.artist_activity = None
+        self.save_frame_fingerprints()
+        if self.profile_dir:
+            self.show_hot_nodes()
+        if self.hang_events:
+            message = (f"Watchdog restarted {len(self.hang_events)} hung instances: "
+                       + '; '.join(f"frame {event['frame']} after {event['waited']:.0f}s"
+                                   for event in self.hang_events))
+            dropped = [frames for event in self.hang_events if event.get('gave_up') for frames in event['dropped']]
+            if dropped:
+                message += f". Not rendered after repeated hangs: {', '.join(dropped)}"
+
+            self.grouped_log_text_edit.append(message)
+            logging.warning(message)
+            self.hang_events = []
+        if self.pipeline:
+            unreleased = self.pipeline['source'].unreleased()
+            if unreleased:
+                message = (f"{len(unreleased)} frames were not rendered because their "
+                           f"{self.pipeline['write'].name()} frames failed: "
+                           f"{', '.join(render_engine.frames_to_frame_ranges(unreleased))}")
+                self.grouped_log_text_edit.append(message)
+                logging.warning(message)
+            self.pipeline = None
         # Enable start button, disable pause and stop buttons
         self.start_button.setEnabled(True)
         self.pause_button.setEnabled(False)
@@ -666,19 +1526,87 @@ class RenderProgressPanel(QtWidgets.QWidget):
         self.end_frame_spinbox.setEnabled(self.custom_frame_range_checkbox.isChecked())
         self.write_node_combo.setEnabled(True)
         self.overwrite_checkbox.setEnabled(True)
+        self.preflight_checkbox.setEnabled(True)
+        self.changed_only_checkbox.setEnabled(True)
         self.memory_lineedit.setEnabled(True)
         self.cache_lineedit.setEnabled(True)
         self.batch_render_checkbox.setEnabled(True)
         self.batch_size_spinbox.setEnabled(self.batch_render_checkbox.isChecked())
+        self.speculative_checkbox.setEnabled(True)
+        self.tile_bands_spinbox.setEnabled(True)
+        self.shared_writes_checkbox.setEnabled(True)
+        self.pipeline_checkbox.setEnabled(True)
+        self.proxy_pass_checkbox.setEnabled(True)
+        self.profile_checkbox.setEnabled(True)
+        self.watch_output_checkbox.setEnabled(True)
+        self.throttle_checkbox.setEnabled(True)
         self.write_node_label.setText('Write Node:')
         logging.info('All rendering complete.')
 
+    def throttle_changed(self, interactive, paused):
+        """
+        Reports the throttle backing off or restoring speed. Called from the throttle's thread.
+        """
+        if interactive:
+            message = f"Throttled: artist active, {paused} instances paused, the rest at low priority."
+        else:
+            message = "Artist idle: instances back to full speed."
+        logging.info(message)
+        nuke.executeInMainThread(self.grouped_log_text_edit.append, args=(message,))
+
+    def show_hot_nodes(self, count=15):
+        """
+        Merges the performance profiles of every instance and batch and lists the slowest nodes.
+        """
+        paths = [os.path.join(self.profile_dir, name) for name in os.listdir(self.profile_dir)
+                 if name.endswith('.xml')]
+        profile = render_engine.aggregate_profiles(paths)
+        self.profile_tree.clear()
+        for row in render_engine.hot_nodes(profile, count):
+            self.profile_tree.addTopLevelItem(QtWidgets.QTreeWidgetItem([
+                row['name'],
+                row['class'],
+                f"{row['wall']:.2f}s",
+                f"{row['avg_wall']:.3f}s",
+                f"{row['cpu']:.2f}s",
+                str(row['calls']),
+                f"{row['memory_peak'] / 1024 ** 2:.0f} MB",
+                f"{row['avg_memory'] / 1024 ** 2:.0f} MB",
+            ]))
+        for column in range(self.profile_tree.columnCount()):
+            self.profile_tree.resizeColumnToContents(column)
+        message = f"Profiled {len(profile)} nodes from {len(paths)} profiles in {self.profile_dir}."
+        self.grouped_log_text_edit.append(message)
+        logging.info(message)
+        # Kept beside the script so the precomp extractor can estimate branch costs later
+        script_path = nuke.root().name()
+        try:
+            render_engine.save_node_profile(os.path.dirname(script_path), os.path.basename(script_path), profile)
+        except OSError as e:
+            logging.error(f"Could not save node profile: {e}")
+
+    def record_hang(self, event, thread_id):
+        """
+        Logs a watchdog kill and keeps it for the report at the end of the render.
+        """
+        self.hang_events.append(event)
+        message = (f"Thread {thread_id}: worker hung on frame {event['frame']}, killed after {event['waited']:.1f}s "
+                   f"(limit {event['timeout']:.1f}s); ")
+        if event.get('gave_up'):
+            message += f"gave up, frames {', '.join(event['dropped']) or 'none'} not rendered."
+        else:
+            message += f"frames {', '.join(event['frames']) or 'none'} will be restarted."
+        self.grouped_log_text_edit.append(message)
+
     def update_log(self, message, thread_id):
         """
-        Updates the grouped log text edit with only error messages and frame rendering progress.
+        Updates the grouped log text edit with only error messages, frame rendering progress,
+        speculative backup events and watchdog restarts. Hangs come through record_hang.
         """
         # Check if the log message is an error or contains frame rendering info
-        if 'Error' in message or 'ERROR' in message or 'Writing' in message:
+        if ('Error' in message or 'ERROR' in message or 'Writing' in message
+                or 'backup' in message or 'another worker' in message
+                or 'Restarting' in message):
             self.grouped_log_text_edit.append(f"Thread {thread_id}: {message}")
 
     def load_settings(self):
@@ -696,27 +1624,74 @@ class RenderProgressPanel(QtWidgets.QWidget):
         self.settings.setValue('num_threads', self.threads_spinbox.value())
         event.accept()
 
+class ArtistActivityFilter(QtCore.QObject):
+    """
+    Application-wide event filter recording when the artist last used the
+    mouse or keyboard in this Nuke session.
+    """
+    INPUT_EVENTS = {
+        QtCore.QEvent.KeyPress,
+        QtCore.QEvent.MouseButtonPress,
+        QtCore.QEvent.MouseMove,
+        QtCore.QEvent.Wheel,
+    }
+
+    def __init__(self, parent=None):
+        super(ArtistActivityFilter, self).__init__(parent)
+        self.last_input = 0.0
+
+    def eventFilter(self, watched, event):
+        if event.type() in self.INPUT_EVENTS:
+            self.last_input = time.time()
+        return False
+
+    def idle_seconds(self):
+        """
+        Seconds since the last input event. Read from the throttle's thread.
+        """
+        return time.time() - self.last_input
+
 class RenderThread(QtCore.QObject):
     """
     A render thread that runs a Nuke command-line render process.
+    The process handling lives in render_engine.RenderWorker; this class
+    only relays its callbacks as Qt signals.
     """
-    progress_updated = QtCore.Signal(int, int, float, int)  # current_frame, total_frames, time_per_frame, thread_id
+    # current_frame, total_frames, time_per_frame, thread_id, is_output (False for a precomp stage's frames)
+    progress_updated = QtCore.Signal(int, int, float, int, bool)
     render_finished = QtCore.Signal(float, int)  # total_duration, thread_id
     render_stopped = QtCore.Signal(int)  # thread_id
     log_message = QtCore.Signal(str, int)  # message, thread_id
     batch_started = QtCore.Signal(int, int)  # thread_id, total_frames
+    write_progress = QtCore.Signal(str, int, int)  # write_name, frame, thread_id
+    render_hung = QtCore.Signal(object, int)  # watchdog hang event, thread_id
 
     def __init__(self, write_node, frames_to_render, thread_id, max_ram=None, cache_size=None,
-                 batch_render=False, batch_size=None, remaining_frames=None, remaining_frames_lock=None):
+                 batch_render=False, batch_size=None, remaining_frames=None, remaining_frames_lock=None,
+                 coordinator=None, stages=None, shared_writes=None, frame_source=None, feeds=None, proxy=False):
         """
         Initializes the RenderThread with the specified parameters.
         """
         super(RenderThread, self).__init__()
         self.write_node = write_node
+        self.proxy = proxy  # Render with -p to the Write's proxy path
+        self.profile_dir = None  # Set by the panel when profiling
+        self.watch_output = False  # Set by the panel to count frames from written files too
+        file_knob = 'proxy' if proxy else 'file'
+        self.output_pattern = write_node[file_knob].value()  # Read on the main thread
+        self.write_node_name = write_node.name()
+        write_nodes = [write_node]
+        if shared_writes:
+            # One process renders them all with -X, so progress is matched per Write pattern
+            write_nodes = [write_node] + list(shared_writes)
+            self.write_node_name = [node.name() for node in write_nodes]
+            self.output_pattern = {node.name(): node[file_knob].value() for node in write_nodes}
+        # Evaluated here since TCL in the file knob cannot be resolved off the main thread
+        self.output_dirs = sorted({os.path.dirname(nuke.callbacks.filenameFilter(node[file_knob].evaluate()))
+                                   for node in write_nodes})
         self.frames_to_render = frames_to_render  # Now a list of frames
-        self.process = None
+        self.worker = None
         self.is_running = False
-        self.is_paused = False
         self.thread_id = thread_id
         self.progress_bar = None
         self.stats_label = None
@@ -727,14 +1702,27 @@ class RenderThread(QtCore.QObject):
         self.batch_size = batch_size
         self.remaining_frames = remaining_frames
         self.remaining_frames_lock = remaining_frames_lock
+        self.coordinator = coordinator  # Shared render_engine.SpeculativeCoordinator, if enabled
+        # Optional list of (script_path, write_name, output_pattern, frames) rendered in turn,
+        # used for tile bands and their assembly instead of the Write in the open script
+        self.stages = stages
+        self.stage_write = None  # Write name of the stage rendering now, set on the render thread
+        self.frame_source = frame_source  # render_engine.PipelinedFrames to take frames from
+        self.feeds = feeds  # render_engine.PipelinedFrames this thread's frames release
         self.time_per_frame = None
         self.frames_rendered = 0
         self.total_frames_rendered = 0  # Total frames rendered by this thread
         if self.batch_render:
             self.total_frames = 0  # Will be updated dynamically
+        elif self.stages:
+            self.total_frames = len(self.stages[0][3])  # Reset for each following stage
         else:
             self.total_frames = len(self.frames_to_render)
 
+    @property
+    def is_paused(self):
+        return bool(self.worker and self.worker.is_paused)
+
     def log(self, level, message):
         """
         Logs a message with the specified severity level.
@@ -745,317 +1733,119 @@ class RenderThread(QtCore.QObject):
         """
         Stops the render process.
         """
-        if self.process and self.is_running:
-            if os.name == 'nt':
-                self.process.terminate()
-            else:
-                self.process.terminate()
+        if self.worker and self.is_running:
+            self.worker.stop()
             self.is_running = False
-            self.log(logging.INFO, "Render process terminated by user.")
 
     def pause(self):
         """
         Pauses the render process.
         """
-        if self.process and self.is_running and not self.is_paused:
-            if os.name == 'nt':
-                # Windows does not support SIGSTOP, so we suspend the process
-                import psutil
-                process = psutil.Process(self.process.pid)
-                process.suspend()
-            else:
-                # Unix-like systems can use SIGSTOP
-                self.process.send_signal(signal.SIGSTOP)
-            self.is_paused = True
-            self.log(logging.INFO, "Render process paused by user.")
+        if self.worker and self.is_running:
+            self.worker.pause()
 
     def resume(self):
         """
         Resumes the render process.
         """
-        if self.process and self.is_running and self.is_paused:
-            if os.name == 'nt':
-                import psutil
-                process = psutil.Process(self.process.pid)
-                process.resume()
-            else:
-                self.process.send_signal(signal.SIGCONT)
-            self.is_paused = False
-            self.log(logging.INFO, "Render process resumed by user.")
+        if self.worker and self.is_running:
+            self.worker.resume()
+
+    def on_batch_started(self, total_frames):
+        self.batch_started.emit(self.thread_id, total_frames)
+
+    def on_error(self, message):
+        nuke.executeInMainThread(nuke.message, args=(message,))
 
     @QtCore.Slot()
     def run(self):
         """
         Executes the render process in a separate thread.
         """
-        import threading
-        import queue
-
         self.is_running = True
-        self.start_time = time.time()  # Start time before processing batches
 
-        nuke_executable = nuke.EXE_PATH
         script_path = nuke.root().name()
         if script_path == '':
             nuke.executeInMainThread(nuke.message, args=("Please save your script before rendering.",))
             self.log(logging.ERROR, "Script not saved.")
             self.is_running = False
+            if self.feeds:
+                self.feeds.producer_finished()
             self.render_stopped.emit(self.thread_id)
             return
 
-        write_node_name = self.write_node.name()
-
-        if not self.batch_render:
-            # Non-batch rendering logic
-            if not self.frames_to_render:
-                self.log_message.emit("No frames to render. Skipping.", self.thread_id)
-                self.is_running = False
-                self.render_finished.emit(0.0, self.thread_id)
-                return
-            self.total_frames = len(self.frames_to_render)
-        else:
-            # Batch rendering
-            self.frames_to_render = []
-
-        # Initialize counters
-        self.frames_rendered = 0
-        self.total_frames_rendered = 0
-
-        while self.is_running:
-            if self.is_paused:
-                time.sleep(0.1)
-                continue
-
-            if self.batch_render:
-                # Get next batch of frames
-                with self.remaining_frames_lock:
-                    if not self.remaining_frames:
-                        break  # No more frames to render
-                    batch_frames = self.remaining_frames[:self.batch_size]
-                    del self.remaining_frames[:self.batch_size]
-                self.frames_to_render = batch_frames
-                self.total_frames = len(self.frames_to_render)
-                self.frames_rendered = 0  # Reset for new batch
-
-                if not self.frames_to_render:
-                    break
-
-                # Emit signal to reset progress bar
-                self.batch_started.emit(self.thread_id, self.total_frames)
-            else:
-                if not self.frames_to_render:
-                    break  # No frames to render
-
-            # Start batch timer
-            self.batch_start_time = time.time()
-
-            # Build command for the current batch
-            frame_ranges = self.frames_to_frame_ranges(self.frames_to_render)
-            cmd = [
-                nuke_executable,
-                '-V',            # Suppress Nuke version banner
-                '-x',            # Render mode
-            ]
-
-            # Add -m and -c options if specified
-            if self.max_ram:
-                cmd.extend(['-m', self.max_ram])
-            if self.cache_size:
-                cmd.extend(['-c', self.cache_size])
-
-            # Add frame ranges
-            for frame_range in frame_ranges:
-                cmd.extend(['-F', frame_range])
-
-            cmd.extend([
-                '-X',
-                write_node_name,
-                script_path
-            ])
-
-            self.log(logging.INFO, f"Command: {' '.join(cmd)}")
-            self.log_message.emit(f"Executing command: {' '.join(cmd)}", self.thread_id)
-
-            # Start process
-            try:
-                self.process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    bufsize=1,
-                    universal_newlines=True
-                )
-            except Exception as e:
-                error_msg = f"Failed to start render process:\n{e}"
-                nuke.executeInMainThread(nuke.message, args=(error_msg,))
-                self.log(logging.ERROR, error_msg)
-                self.is_running = False
-                self.render_stopped.emit(self.thread_id)
-                return
-
-            # Start threads to read stdout and stderr
-            stdout_queue = queue.Queue()
-            stderr_queue = queue.Queue()
-
-            stdout_thread = threading.Thread(target=self.read_stream, args=(self.process.stdout, stdout_queue))
-            stderr_thread = threading.Thread(target=self.read_stream, args=(self.process.stderr, stderr_queue))
-
-            stdout_thread.start()
-            stderr_thread.start()
-
-            while self.is_running:
-                if self.is_paused:
-                    time.sleep(0.1)
-                    continue
-
-                # Process stdout
-                try:
-                    line = stdout_queue.get_nowait()
-                except queue.Empty:
-                    line = None
-
-                if line:
-                    self.log_message.emit(line.strip(), self.thread_id)
-                    if 'Writing' in line:
-                        # Parse current frame
-                        match = re.search(r'Writing.*?(\d+)', line)
-                        if match:
-                            current_frame = int(match.group(1))
-                            elapsed_time = time.time() - self.batch_start_time
-                            self.frames_rendered += 1
-                            self.total_frames_rendered += 1
-                            if self.frames_rendered > 0:
-                                time_per_frame = elapsed_time / self.frames_rendered
-                                self.progress_updated.emit(current_frame, self.total_frames, time_per_frame, self.thread_id)
-                else:
-                    # No new stdout line
-                    pass
-
-                # Process stderr
-                try:
-                    err_line = stderr_queue.get_nowait()
-                except queue.Empty:
-                    err_line = None
-
-                if err_line:
-                    self.log_message.emit(err_line.strip(), self.thread_id)
-                    if 'Error' in err_line or 'ERROR' in err_line:
-                        self.log(logging.ERROR, err_line.strip())
-                else:
-                    # No new stderr line
-                    pass
-
-                # Check if process has finished
-                if self.process.poll() is not None:
-                    break
-
-                # Sleep briefly to prevent busy-waiting
-                time.sleep(0.1)
-
-            stdout_thread.join()
-            stderr_thread.join()
-            self.process.wait()
-
-            if self.is_running:
-                if self.process.returncode != 0:
-                    # Render process failed unexpectedly
-                    error_msg = f"Render process failed with return code {self.process.returncode}."
-                    nuke.executeInMainThread(nuke.message, args=(error_msg,))
-                    self.log(logging.ERROR, error_msg)
-                    self.render_stopped.emit(self.thread_id)
-                    self.is_running = False  # Exit the loop
-                    return
-                else:
-                    # Batch completed successfully
-                    self.log(logging.INFO, f"Batch completed.")
-            else:
-                # Render was stopped by the user
-                self.log(logging.INFO, f"Render process was terminated by the user. Return code: {self.process.returncode}")
-                self.render_stopped.emit(self.thread_id)
-                self.is_running = False  # Exit the loop
-                return
-
-            if not self.batch_render:
-                break  # Exit loop if not batch rendering
+        stages = self.stages
+        if stages is None:
+            stages = [(script_path, self.write_node_name, self.output_pattern, self.frames_to_render)]
+        try:
+            state, total_duration = self.run_stages(stages)
+        finally:
+            # Downstream threads stop waiting once every precomp thread is done
+            if self.feeds:
+                self.feeds.producer_finished()
+        self.is_running = False
 
-        # After all batches have been processed
-        if self.is_running:
-            total_duration = time.time() - self.start_time
+        if state == render_engine.RENDER_FINISHED:
             self.render_finished.emit(total_duration, self.thread_id)
             self.log(logging.INFO, f"Thread {self.thread_id} completed all batches in {total_duration:.2f}s.")
-            self.is_running = False
+        else:
+            self.render_stopped.emit(self.thread_id)
+
+    def on_progress(self, frame, total, time_per_frame):
+        if self.feeds:
+            self.feeds.upstream_done(frame)  # Release downstream frames straight from the worker thread
+        is_output = self.stage_write is None or self.stage_write == self.write_node_name
+        self.progress_updated.emit(frame, total, time_per_frame, self.thread_id, is_output)
 
-    def read_stream(self, stream, queue):
+    def run_stages(self, stages):
         """
-        Reads lines from a stream and puts them into a queue.
+        Renders each (script_path, write_name, output_pattern, frames) stage in turn.
+        Returns the final state and the total duration.
         """
-        while True:
-            line = stream.readline()
-            if not line:
+        state, total_duration = render_engine.RENDER_FINISHED, 0.0
+        for index, (stage_script, write_name, output_pattern, frames) in enumerate(stages):
+            if not self.is_running:
+                state = render_engine.RENDER_STOPPED
                 break
-            queue.put(line)
-        stream.close()
-
-    def frames_to_frame_ranges(self, frames):
-        """
-        Converts a list of frames into a list of contiguous frame ranges.
-        For example, [1,2,3,5,6,7,9] becomes ['1-3', '5-7', '9']
-        """
-        if not frames:
-            return []
-        frames = sorted(set(frames))
-        ranges = []
-        start = prev = frames[0]
-        for frame in frames[1:]:
-            if frame == prev + 1:
-                prev = frame
-            else:
-                if start == prev:
-                    ranges.append(f"{start}")
-                else:
-                    ranges.append(f"{start}-{prev}")
-                start = prev = frame
-        # Add the last range
-        if start == prev:
-            ranges.append(f"{start}")
-        else:
-            ranges.append(f"{start}-{prev}")
-        return ranges
-
-class CollapsibleWidget(QtWidgets.QWidget):
-    """
-    A custom widget that can be collapsed or expanded.
-    """
-    def __init__(self, title='', parent=None):
-        super(CollapsibleWidget, self).__init__(parent)
-        self.toggle_button = QtWidgets.QToolButton(text=title, checkable=True, checked=False)
-        self.toggle_button.setStyleSheet("QToolButton { border: none; }")
-        self.toggle_button.setToolButtonStyle(QtCore.Qt.ToolButtonTextBesideIcon)
-        self.toggle_button.setArrowType(QtCore.Qt.RightArrow)
-        self.toggle_button.setChecked(False)
-
-        self.content_widget = QtWidgets.QWidget()
-        self.content_layout = QtWidgets.QVBoxLayout(self.content_widget)
-        self.content_widget.setVisible(False)
-
-        self.main_layout = QtWidgets.QVBoxLayout(self)
-        self.main_layout.addWidget(self.toggle_button)
-        self.main_layout.addWidget(self.content_widget)
-        self.main_layout.setContentsMargins(0, 0, 0, 0)
-        self.main_layout.setSpacing(0)
-
-        self.toggle_button.toggled.connect(self.on_toggled)
-
-    def on_toggled(self, checked):
-        self.content_widget.setVisible(checked)
-        if checked:
-            self.toggle_button.setArrowType(QtCore.Qt.DownArrow)
-        else:
-            self.toggle_button.setArrowType(QtCore.Qt.RightArrow)
-
-    def add_widget(self, widget):
-        self.content_layout.addWidget(widget)
+            if index:
+                self.on_batch_started(len(frames))
+            # Frames of a stage rendering another Write are not this thread's output
+            self.stage_write = write_name if self.stages else None
+            watch_dirs = None
+            if self.watch_output:
+                # Stage scripts write plain paths; the open script's Writes were evaluated up front
+                watch_dirs = render_engine.output_directories(output_pattern) if self.stages else self.output_dirs
+            self.worker = render_engine.RenderWorker(
+                nuke.EXE_PATH,
+                stage_script,
+                write_name,
+                frames,
+                self.thread_id,
+                max_ram=self.max_ram,
+                cache_size=self.cache_size,
+                batch_render=self.batch_render,
+                batch_size=self.batch_size,
+                remaining_frames=self.remaining_frames,
+                remaining_frames_lock=self.remaining_frames_lock,
+                output_pattern=output_pattern,
+                coordinator=self.coordinator,
+                proxy=self.proxy,
+                profile_dir=self.profile_dir,
+                on_progress=self.on_progress,
+                on_log=lambda message: self.log_message.emit(message, self.thread_id),
+                on_batch_started=self.on_batch_started,
+                on_error=self.on_error,
+                on_write_progress=lambda write_name, frame: self.write_progress.emit(
+                    write_name, frame, self.thread_id),
+                on_hang=lambda event: self.render_hung.emit(event, self.thread_id),
+                frame_source=self.frame_source,
+                watch_dirs=watch_dirs
+            )
+            state, duration = self.worker.run()
+            total_duration += duration
+            if state != render_engine.RENDER_FINISHED:
+                break
+        return state, total_duration
 
 # Register the panel to make it dockable
 def render_progress_panel():
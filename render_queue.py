@@ -0,0 +1,513 @@
+# Filename: render_queue.py
+"""
+Persistent background render queue for the Render Progress Panel.
+
+Jobs are written to a queue directory (default ~/.nuke/render_queue) and
+executed by a standalone daemon process that keeps running after Nuke
+exits. The daemon uses the same render_engine.RenderWorker command
+construction as the panel, and writes each job's progress to status.json
+so the panel can reattach to it.
+
+Queue layout:
+    <queue_dir>/daemon.pid
+    <queue_dir>/jobs/<job_id>/job.json     job definition
+    <queue_dir>/jobs/<job_id>/script.nk    snapshot of the Nuke script, as submitted
+    <queue_dir>/jobs/<job_id>/status.json  progress written by the daemon
+    <queue_dir>/jobs/<job_id>/render.log   render output
+    <queue_dir>/jobs/<job_id>/cancel       present when a cancel was requested
+
+The job renders a copy of the snapshot saved beside the source script
+(.<script>.<job_id>.nk) with root.name pinned to the source script, so
+[value root.name], [file dirname [value root.name]] and paths relative to
+the script's directory resolve as they do in an interactive render. The
+copy is removed when the job ends.
+
+Command line (no Nuke needed):
+    python render_queue.py daemon [--queue-dir DIR] [--idle-exit SECONDS]
+    python render_queue.py list
+    python render_queue.py cancel JOB_ID
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import shutil
+import signal
+import logging
+import argparse
+import threading
+import subprocess
+
+import render_engine
+
+QUEUE_DIR = os.path.join(os.path.expanduser('~'), '.nuke', 'render_queue')
+
+# Job states
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_INTERRUPTED = 'interrupted'
+JOB_FINISHED = 'finished'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+ACTIVE_STATES = (JOB_PENDING, JOB_RUNNING, JOB_INTERRUPTED)
+
+# Minimum seconds between status.json writes while a job renders
+STATUS_INTERVAL = 0.5
+
+
+def _jobs_dir(queue_dir):
+    return os.path.join(queue_dir, 'jobs')
+
+
+def _read_json(path, default=None):
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return default
+
+
+# Top-level node blocks of a .nk script; a block ends at a "}" line in column 0
+NODE_BLOCK_RE = re.compile(r'^(\w+) \{\n(.*?)^\}$', re.MULTILINE | re.DOTALL)
+
+
+def snapshot_text(text, script_path, enable_writes=()):
+    """
+    Returns the .nk text with root.name pinned to script_path and the
+    'disable' knob removed from the Writes named in enable_writes.
+    """
+    enable_writes = set(enable_writes)
+
+    def rewrite(match):
+        node_class, body = match.group(1), match.group(2)
+        if node_class == 'Root':
+            name = script_path.replace('\\', '/')
+            name_line = f' name "{name}"\n' if ' ' in name else f" name {name}\n"
+            body, count = re.subn(r'^ name .*\n', lambda _: name_line, body, count=1, flags=re.MULTILINE)
+            if not count:
+                body = name_line + body
+        elif enable_writes:
+            name = re.search(r'^ name (\S+)$', body, re.MULTILINE)
+            if name and name.group(1) in enable_writes:
+                body = re.sub(r'^ disable \S+\n', '', body, flags=re.MULTILINE)
+        return f"{node_class} {{\n{body}}}"
+
+    return NODE_BLOCK_RE.sub(rewrite, text)
+
+
+def render_script_path(script_path, job_id):
+    """
+    Returns where a job's render copy of script_path is saved: beside it.
+    """
+    directory, name = os.path.split(script_path)
+    return os.path.join(directory, f".{os.path.splitext(name)[0]}.{job_id}.nk")
+
+
+def remove_render_script(job):
+    """
+    Deletes a job's render copy of the script, if it is not the snapshot itself.
+    """
+    if job.get('script') and job['script'] != job.get('snapshot'):
+        try:
+            os.remove(job['script'])
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.warning(f"Could not remove {job['script']}: {e}")
+
+
+def submit_job(script_path, write_node_name, frames, workers=1, priority=50, nuke_executable=None,
+               max_ram=None, cache_size=None, batch_size=10, output_pattern=None, fingerprints=None,
+               enable_writes=(), queue_dir=QUEUE_DIR):
+    """
+    Snapshots the script and adds a render job to the queue. Returns the job id.
+    Higher priority jobs run first; equal priorities run in submission order.
+    fingerprints is an optional (directory, key, {frame: fingerprint}) tuple
+    saved for the rendered frames when the job ends. Writes named in
+    enable_writes are enabled in the rendered copy only.
+    """
+    job_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    job_dir = os.path.join(_jobs_dir(queue_dir), job_id)
+    os.makedirs(job_dir)
+    snapshot_path = os.path.join(job_dir, 'script.nk')
+    shutil.copy2(script_path, snapshot_path)
+    with open(snapshot_path) as handle:
+        text = snapshot_text(handle.read(), script_path, enable_writes)
+
+    # Rendered beside the source so paths relative to the script resolve the same
+    render_path = render_script_path(script_path, job_id)
+    try:
+        with open(render_path, 'w') as handle:
+            handle.write(text)
+    except OSError as e:
+        logging.warning(f"Cannot save the render copy beside {script_path} ({e}); "
+                        "rendering from the queue directory, where script-relative paths may differ.")
+        render_path = os.path.join(job_dir, 'render.nk')
+        with open(render_path, 'w') as handle:
+            handle.write(text)
+    job = {
+        'id': job_id,
+        'script': render_path,
+        'snapshot': snapshot_path,
+        'source_script': script_path,
+        'write_node': write_node_name,
+        'frames': render_engine.frames_to_frame_ranges(frames),
+        'frame_count': len(set(frames)),
+        'workers': max(1, int(workers)),
+        'priority': int(priority),
+        'nuke_executable': nuke_executable,
+        'max_ram': max_ram or None,
+        'cache_size': cache_size or None,
+        'batch_size': max(1, int(batch_size)),
+        'output_pattern': output_pattern,
+        'submitted': time.time(),
+    }
+    if fingerprints:
+        directory, key, frame_fingerprints = fingerprints
+        job['fingerprints'] = {'directory': directory, 'key': key,
+                               'ranges': render_engine.fingerprints_to_ranges(frame_fingerprints)}
+    render_engine.write_json_atomic(os.path.join(job_dir, 'job.json'), job)
+    logging.info(f"Queued render job {job_id} for {write_node_name}.")
+    return job_id
+
+
+def list_jobs(queue_dir=QUEUE_DIR):
+    """
+    Returns every job as a dict with its current 'status' merged in.
+    """
+    jobs = []
+    jobs_dir = _jobs_dir(queue_dir)
+    if not os.path.isdir(jobs_dir):
+        return jobs
+    for job_id in sorted(os.listdir(jobs_dir)):
+        job = _read_json(os.path.join(jobs_dir, job_id, 'job.json'))
+        if not job:
+            continue
+        job['status'] = _read_json(os.path.join(jobs_dir, job_id, 'status.json'), {'state': JOB_PENDING})
+        jobs.append(job)
+    return jobs
+
+
+def cancel_job(job_id, queue_dir=QUEUE_DIR):
+    """
+    Asks the daemon to stop a job. Pending jobs are cancelled straight away.
+    """
+    job_dir = os.path.join(_jobs_dir(queue_dir), job_id)
+    open(os.path.join(job_dir, 'cancel'), 'w').close()
+    status_path = os.path.join(job_dir, 'status.json')
+    status = _read_json(status_path, {'state': JOB_PENDING})
+    if status.get('state') == JOB_PENDING:
+        status['state'] = JOB_CANCELLED
+        render_engine.write_json_atomic(status_path, status)
+        remove_render_script(_read_json(os.path.join(job_dir, 'job.json'), {}))
+
+
+def pid_alive(pid):
+    """
+    Returns True if a process with this pid is running.
+    """
+    if os.name == 'nt':
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def daemon_pid(queue_dir=QUEUE_DIR):
+    """
+    Returns the pid of the running daemon, or None.
+    """
+    try:
+        with open(os.path.join(queue_dir, 'daemon.pid')) as handle:
+            pid = int(handle.read().strip())
+    except (OSError, ValueError):
+        return None
+    return pid if pid_alive(pid) else None
+
+
+def python_command(nuke_executable):
+    """
+    Returns the interpreter command used to launch the daemon.
+    A system Python is preferred so the daemon does not hold a Nuke licence;
+    otherwise Nuke runs it in terminal mode.
+    """
+    python = os.environ.get('RENDER_QUEUE_PYTHON') or shutil.which('python3') or shutil.which('python')
+    if python:
+        return [python]
+    return [nuke_executable, '-t']
+
+
+def ensure_daemon(python_command, queue_dir=QUEUE_DIR):
+    """
+    Starts the daemon detached from the calling process unless one is running.
+    python_command is a list such as ['/usr/bin/python3'] or [nuke_exe, '-t'].
+    """
+    pid = daemon_pid(queue_dir)
+    if pid:
+        return pid
+    os.makedirs(queue_dir, exist_ok=True)
+    cmd = list(python_command) + [os.path.abspath(__file__), 'daemon', '--queue-dir', queue_dir]
+    kwargs = {}
+    if os.name == 'nt':
+        kwargs['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        # A new session keeps the daemon alive when Nuke exits
+        kwargs['start_new_session'] = True
+    with open(os.path.join(queue_dir, 'daemon.log'), 'a') as log_handle:
+        process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=log_handle, stderr=log_handle,
+                                   close_fds=True, cwd=queue_dir, **kwargs)
+    logging.info(f"Started render queue daemon (pid {process.pid}).")
+    return process.pid
+
+
+class RenderQueueDaemon(object):
+    """
+    Executes queued jobs one at a time, highest priority first.
+    """
+
+    def __init__(self, queue_dir=QUEUE_DIR, poll_interval=2.0, idle_exit=600.0):
+        self.queue_dir = queue_dir
+        self.poll_interval = poll_interval
+        self.idle_exit = idle_exit
+        self.running = False
+        self.pid_path = os.path.join(queue_dir, 'daemon.pid')
+
+    def acquire(self):
+        """
+        Takes the single-daemon lock. Returns False if another daemon is alive.
+        """
+        os.makedirs(_jobs_dir(self.queue_dir), exist_ok=True)
+        for _ in range(2):
+            try:
+                fd = os.open(self.pid_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if daemon_pid(self.queue_dir):
+                    return False
+                # Stale pid file from a daemon that died
+                os.remove(self.pid_path)
+                continue
+            with os.fdopen(fd, 'w') as handle:
+                handle.write(str(os.getpid()))
+            return True
+        return False
+
+    def release(self):
+        try:
+            os.remove(self.pid_path)
+        except OSError:
+            pass
+
+    def stop(self, *args):
+        self.running = False
+
+    def next_job(self):
+        """
+        Returns the highest-priority job that still has work to do.
+        Interrupted jobs left by a previous daemon are resumed.
+        """
+        active = [job for job in list_jobs(self.queue_dir)
+                  if job['status'].get('state') in ACTIVE_STATES
+                  and not os.path.exists(os.path.join(_jobs_dir(self.queue_dir), job['id'], 'cancel'))]
+        active.sort(key=lambda job: (-job['priority'], job['submitted']))
+        return active[0] if active else None
+
+    def run(self):
+        """
+        Runs until stopped, or until idle for idle_exit seconds.
+        """
+        if not self.acquire():
+            logging.info("Another render queue daemon is already running.")
+            return
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        idle_since = time.time()
+        try:
+            while self.running:
+                job = self.next_job()
+                if job:
+                    JobRunner(job, os.path.join(_jobs_dir(self.queue_dir), job['id']), self).run()
+                    idle_since = time.time()
+                elif self.idle_exit and time.time() - idle_since > self.idle_exit:
+                    break
+                else:
+                    time.sleep(self.poll_interval)
+        finally:
+            self.release()
+
+
+class JobRunner(object):
+    """
+    Renders one queued job with a pool of RenderWorkers pulling batches.
+    """
+
+    def __init__(self, job, job_dir, daemon):
+        self.job = job
+        self.job_dir = job_dir
+        self.daemon = daemon
+        self.status_path = os.path.join(job_dir, 'status.json')
+        self.lock = threading.Lock()
+        self.status = job.get('status') or {}
+        self.completed = set(render_engine.frame_ranges_to_frames(self.status.get('completed', [])))
+        self.worker_stats = {}
+        self.last_write = 0.0
+        self.log_handle = None
+
+    def write_status(self, force=False):
+        now = time.time()
+        if not force and now - self.last_write < STATUS_INTERVAL:
+            return
+        self.last_write = now
+        with self.lock:
+            self.status['completed'] = render_engine.frames_to_frame_ranges(sorted(self.completed))
+            self.status['frames_done'] = len(self.completed)
+            self.status['workers'] = {str(key): dict(value) for key, value in self.worker_stats.items()}
+            self.status['updated'] = now
+            self.status['daemon_pid'] = os.getpid()
+            times = [stats['time_per_frame'] for stats in self.worker_stats.values() if stats.get('time_per_frame')]
+            remaining = self.job['frame_count'] - len(self.completed)
+            if times:
+                self.status['eta'] = remaining * (sum(times) / len(times)) / max(1, len(self.worker_stats))
+            render_engine.write_json_atomic(self.status_path, self.status)
+
+    def on_progress(self, worker_id, frame, total_frames, time_per_frame):
+        with self.lock:
+            self.completed.add(frame)
+            stats = self.worker_stats[worker_id]
+            stats['frames_rendered'] += 1
+            stats['time_per_frame'] = time_per_frame
+        self.write_status()
+
+    def on_log(self, worker_id, message):
+        with self.lock:
+            self.log_handle.write(f"Worker {worker_id}: {message}\n")
+
+    def on_error(self, worker_id, message):
+        with self.lock:
+            self.status.setdefault('errors', []).append(f"Worker {worker_id}: {message}")
+            self.log_handle.write(f"Worker {worker_id}: {message}\n")
+
+    def on_hang(self, event):
+        with self.lock:
+            self.status.setdefault('hangs', []).append(event)
+        self.write_status(force=True)
+
+    def save_fingerprints(self):
+        """
+        Records the upstream fingerprints of the frames this job rendered.
+        """
+        fingerprints = self.job.get('fingerprints')
+        if not fingerprints or not self.completed:
+            return
+        frame_fingerprints = render_engine.ranges_to_fingerprints(fingerprints['ranges'])
+        rendered = {frame: frame_fingerprints[frame] for frame in self.completed if frame in frame_fingerprints}
+        try:
+            render_engine.save_fingerprints(fingerprints['directory'], fingerprints['key'], rendered)
+        except OSError as e:
+            logging.error(f"Could not save frame fingerprints: {e}")
+
+    def run(self):
+        job = self.job
+        frames = render_engine.frame_ranges_to_frames(job['frames'])
+        remaining = [frame for frame in frames if frame not in self.completed]
+        remaining_lock = threading.Lock()
+        self.status.update({'state': JOB_RUNNING, 'frames_total': job['frame_count'],
+                            'started': self.status.get('started', time.time())})
+        nuke_executable = job.get('nuke_executable')
+        self.log_handle = open(os.path.join(self.job_dir, 'render.log'), 'a', buffering=1)
+
+        workers = []
+        for idx in range(job['workers']):
+            worker_id = idx + 1
+            self.worker_stats[worker_id] = {'frames_rendered': 0, 'time_per_frame': None}
+            workers.append(render_engine.RenderWorker(
+                nuke_executable, job['script'], job['write_node'], None, worker_id,
+                max_ram=job.get('max_ram'), cache_size=job.get('cache_size'),
+                batch_render=True, batch_size=job['batch_size'],
+                remaining_frames=remaining, remaining_frames_lock=remaining_lock,
+                output_pattern=job.get('output_pattern'),
+                on_progress=lambda frame, total, tpf, worker_id=worker_id: self.on_progress(worker_id, frame, total, tpf),
+                on_log=lambda message, worker_id=worker_id: self.on_log(worker_id, message),
+                on_error=lambda message, worker_id=worker_id: self.on_error(worker_id, message),
+                on_hang=self.on_hang,
+            ))
+        self.write_status(force=True)
+
+        results = {}
+        threads = [threading.Thread(target=lambda worker=worker: results.update({worker.worker_id: worker.run()}))
+                   for worker in workers]
+        for thread in threads:
+            thread.start()
+
+        cancel_path = os.path.join(self.job_dir, 'cancel')
+        state = None
+        while any(thread.is_alive() for thread in threads):
+            if os.path.exists(cancel_path):
+                state = JOB_CANCELLED
+            elif not self.daemon.running:
+                state = JOB_INTERRUPTED
+            if state:
+                for worker in workers:
+                    worker.stop()
+            time.sleep(0.2)
+            self.write_status()
+        for thread in threads:
+            thread.join()
+        self.log_handle.close()
+
+        if state is None:
+            failed = any(result[0] != render_engine.RENDER_FINISHED for result in results.values())
+            state = JOB_FAILED if failed or len(self.completed) < job['frame_count'] else JOB_FINISHED
+        self.status['state'] = state
+        self.status['ended'] = time.time()
+        self.write_status(force=True)
+        self.save_fingerprints()
+        if state != JOB_INTERRUPTED:
+            remove_render_script(job)
+        logging.info(f"Render job {job['id']} {state}.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Background render queue for the Render Progress Panel.')
+    parser.add_argument('--queue-dir', default=QUEUE_DIR)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    daemon_parser = subparsers.add_parser('daemon', help='run the queue daemon')
+    daemon_parser.add_argument('--queue-dir', default=argparse.SUPPRESS)
+    daemon_parser.add_argument('--idle-exit', type=float, default=600.0,
+                               help='exit after this many idle seconds (0 = never)')
+    subparsers.add_parser('list', help='list jobs')
+    cancel_parser = subparsers.add_parser('cancel', help='cancel a job')
+    cancel_parser.add_argument('job_id')
+    args = parser.parse_args(argv)
+
+    if args.command == 'daemon':
+        logging.basicConfig(format='%(asctime)s [%(levelname)s]: %(message)s', level=logging.INFO)
+        RenderQueueDaemon(args.queue_dir, idle_exit=args.idle_exit).run()
+    elif args.command == 'list':
+        for job in list_jobs(args.queue_dir):
+            status = job['status']
+            hangs = f"  hangs: {len(status['hangs'])}" if status.get('hangs') else ''
+            print(f"{job['id']}  {status.get('state', JOB_PENDING):<11} p{job['priority']:<3} "
+                  f"{status.get('frames_done', 0)}/{job['frame_count']}  {job['write_node']}  {job['source_script']}"
+                  + hangs)
+    elif args.command == 'cancel':
+        cancel_job(args.job_id, args.queue_dir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
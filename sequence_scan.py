@@ -0,0 +1,991 @@
+# Filename: sequence_scan.py
+"""
+Nuke-free image sequence scanning, used by proxy2file's FileScanner and
+usable headless through scan_sequences() or the command line.
+
+File names are parsed once into a FramePattern, which formats and matches
+frame numbers without re-parsing the name on every probe.
+
+A directory is listed once per operation into a DirectoryIndex, so any
+number of Reads and their proxies pointing into the same directory are
+answered from one listing. Each pattern's frames are found in one regex pass
+over the listing and kept as a FrameSet of runs: exact first and last frames
+whatever the padding, with no sort of the names and no sampling.
+
+Scanned ranges persist across sessions in a RangeCache, a small SQLite file
+under ~/.nuke. An entry is only reused while its directory's mtime and inode
+are unchanged, since adding or removing a frame file changes the mtime.
+
+Directories that cannot be listed, or list too slowly, are searched with a
+FrameProber instead, which needs only existence checks.
+
+A DirectoryWatcher keeps scanned directories' indexes between operations.
+On Linux, inotify keeps them up to date as frames land or are deleted, so
+scanning again while a render writes is answered from memory. Past the watch
+limit, or without inotify, a kept index is reused while the directory's mtime
+is unchanged.
+
+Command line (no Nuke needed, also under nuke -t):
+    python sequence_scan.py /shots/sh010/comp/sh010_comp.%04d.exr /shots/sh020/plate.####.dpx
+    python sequence_scan.py --workers 16 --no-bytes --no-cache PATH...
+prints a JSON list with first, last, present ranges, gaps and bytes per path.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import errno
+import bisect
+import argparse
+import ctypes
+import ctypes.util
+import select
+import struct
+import functools
+import logging
+import sqlite3
+import threading
+import concurrent.futures
+
+RANGE_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.nuke', 'sequence_range_cache.sqlite')
+RANGE_CACHE_MAX_ENTRIES = 5000
+
+# Frame sets spanning at most this many frames per frame are compacted by
+# walking the span instead of sorting
+DENSE_SPAN_FACTOR = 4
+
+# Frame number tokens: %04d / %d, #### and @@@ (one digit of padding per
+# character), Houdini's $F4 / $F, and Mari's <UDIM> (four-digit tile numbers)
+FRAME_TOKEN = re.compile(r'%0?(\d*)d|#+|@+|\$F(\d*)|<UDIM>')
+
+# Seconds a scanner waits for a directory listing before probing instead
+LISTING_TIMEOUT = 10.0
+
+# Sequences scan_sequences() scans at once
+SCAN_WORKERS = 8
+
+# Existence checks in flight at once, shared by every FrameProber
+PROBE_WORKERS = 16
+# Missing frames past an apparent end that a probe still looks beyond
+PROBE_GAP_TOLERANCE = 128
+# Where a probe looks first when no frame of the sequence is known
+PROBE_SEEDS = (1001, 1, 0, 1000, 101, 100, 10001, 100001, 1000001, -1)
+
+# Directories a DirectoryWatcher keeps indexed, and how many of them inotify
+# watches; the rest are checked against their mtime when reused
+LIVE_DIRECTORY_LIMIT = 512
+MAX_WATCHES = 256
+# Seconds between reads of queued inotify events
+WATCH_POLL_INTERVAL = 1.0
+
+# inotify(7)
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0x800
+INOTIFY_EVENT = struct.Struct('iIII')
+
+_probe_pool = None
+_probe_pool_lock = threading.Lock()
+
+
+class FrameSet(object):
+    """
+    Frames stored as sorted, non-overlapping (first, last) runs.
+    """
+
+    def __init__(self, runs=()):
+        self.runs = list(runs)
+        self.count = sum(last - first + 1 for first, last in self.runs)
+
+    @classmethod
+    def from_frames(cls, frames):
+        """
+        Compacts a set of frames. Dense sets (any real sequence, gaps and
+        all) are walked from min to max in one pass without a sort; only
+        sparse sets are sorted.
+        """
+        if not frames:
+            return cls()
+        first, last = min(frames), max(frames)
+        runs = []
+        if last - first < DENSE_SPAN_FACTOR * len(frames):
+            start = None
+            for frame in range(first, last + 2):
+                if frame in frames:
+                    if start is None:
+                        start = frame
+                elif start is not None:
+                    runs.append((start, frame - 1))
+                    start = None
+        else:
+            for frame in sorted(frames):
+                if runs and runs[-1][1] == frame - 1:
+                    runs[-1] = (runs[-1][0], frame)
+                else:
+                    runs.append((frame, frame))
+        return cls(runs)
+
+    @property
+    def first(self):
+        return self.runs[0][0] if self.runs else None
+
+    @property
+    def last(self):
+        return self.runs[-1][1] if self.runs else None
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return bool(self.runs)
+
+    def __contains__(self, frame):
+        index = bisect.bisect_right(self.runs, (frame, float('inf'))) - 1
+        return index >= 0 and self.runs[index][0] <= frame <= self.runs[index][1]
+
+    def gaps(self):
+        """
+        Returns the missing (first, last) runs between the first and last frame.
+        """
+        return [(previous[1] + 1, following[0] - 1) for previous, following in zip(self.runs, self.runs[1:])]
+
+    def missing_count(self):
+        return sum(last - first + 1 for first, last in self.gaps())
+
+    def added(self, frame):
+        """
+        Returns a FrameSet that also holds frame. FrameSets handed out are
+        never changed in place.
+        """
+        if frame in self:
+            return self
+        runs = list(self.runs)
+        index = bisect.bisect_left(runs, (frame,))
+        joins_previous = index > 0 and runs[index - 1][1] == frame - 1
+        joins_next = index < len(runs) and runs[index][0] == frame + 1
+        if joins_previous and joins_next:
+            runs[index - 1:index + 1] = [(runs[index - 1][0], runs[index][1])]
+        elif joins_previous:
+            runs[index - 1] = (runs[index - 1][0], frame)
+        elif joins_next:
+            runs[index] = (frame, runs[index][1])
+        else:
+            runs.insert(index, (frame, frame))
+        return FrameSet(runs)
+
+    def removed(self, frame):
+        """
+        Returns a FrameSet without frame.
+        """
+        if frame not in self:
+            return self
+        runs = list(self.runs)
+        index = bisect.bisect_right(runs, (frame, float('inf'))) - 1
+        first, last = runs[index]
+        runs[index:index + 1] = [run for run in ((first, frame - 1), (frame + 1, last)) if run[0] <= run[1]]
+        return FrameSet(runs)
+
+
+def format_ranges(runs):
+    """
+    Formats (first, last) runs as "1001-1010, 1012, 1015-1020".
+    """
+    return ', '.join(str(first) if first == last else f'{first}-{last}' for first, last in runs)
+
+
+class FramePattern(object):
+    """
+    A file name with one frame number token, parsed once. format() and
+    match() are the only per-frame work: a string format and a precompiled
+    regex match.
+    """
+
+    def __init__(self, prefix, suffix, padding=0, token='%d'):
+        self.prefix = prefix
+        self.suffix = suffix
+        self.padding = padding
+        self.token = token
+        self.spec = f'0{padding}d' if padding else 'd'
+        digits = r'\d{4}' if token == '<UDIM>' else r'-?\d+'
+        self.regex = re.compile(f"{re.escape(prefix)}({digits}){re.escape(suffix)}")
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def parse(name):
+        """
+        Returns the FramePattern of name, split at its last frame token, or
+        None if name has no token. Results are cached per name.
+        """
+        tokens = list(FRAME_TOKEN.finditer(name))
+        if not tokens:
+            return None
+        token = tokens[-1]
+        text = token.group(0)
+        if text.startswith('%'):
+            padding = int(token.group(1) or 0)
+        elif text.startswith('$F'):
+            padding = int(token.group(2) or 0)
+        elif text == '<UDIM>':
+            padding = 4
+        else:
+            padding = len(text)
+        return FramePattern(name[:token.start()], name[token.end():], padding, text)
+
+    def format(self, frame):
+        """
+        Returns the name of frame, padded as the token asks.
+        """
+        return self.prefix + format(frame, self.spec) + self.suffix
+
+    def match(self, name):
+        """
+        Returns the frame number in name, with any padding, or None if name is
+        not in this sequence.
+        """
+        match = self.regex.fullmatch(name)
+        return int(match.group(1)) if match else None
+
+    def render_regex(self):
+        """
+        Returns a compiled regex for names a render writes from this pattern,
+        with the frame captured. TCL expressions such as [value root.name] and
+        %V views in the prefix or suffix match anything. A padded token needs
+        at least that many digits, and the sign counts towards the padding:
+        -5 as %04d is "-005".
+        """
+        if self.token == '<UDIM>':
+            digits = r'\d{4}'
+        elif self.padding > 1:
+            digits = f'-\\d+|\\d{{{self.padding},}}'
+        else:
+            digits = r'-?\d+'
+
+        def literal(text):
+            parts = re.split(r'(\[[^\]]*\]|%[Vv])', text)
+            return ''.join('.*?' if index % 2 else re.escape(part) for index, part in enumerate(parts))
+
+        return re.compile(f'^{literal(self.prefix)}({digits}){literal(self.suffix)}$')
+
+    def __repr__(self):
+        return f'FramePattern({self.prefix + self.token + self.suffix!r})'
+
+
+class DirectoryIndex(object):
+    """
+    One listing of a directory, kept as a single newline-joined string so
+    each frame pattern is answered by one precompiled regex pass in C
+    (findall) rather than a Python loop over the names. Results are kept per
+    (prefix, suffix) as FrameSets, so every Read and proxy with the same
+    pattern reuses them.
+
+    A DirectoryWatcher reports files created and deleted after the listing
+    through file_created() and file_deleted(), which update the FrameSets
+    already found; the text is only rebuilt if a new pattern is asked for.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with os.scandir(directory) as entries:
+            names = [entry.name for entry in entries if entry.is_file()]
+        self.count = len(names)
+        self.text = '\n'.join(name for name in names if '\n' not in name)
+        self.names = None  # Set of names, built on the first change
+        self.frame_sets = {}  # (prefix, suffix) -> FrameSet
+        self.patterns = {}  # (prefix, suffix) -> compiled pattern of one name
+        self.lock = threading.Lock()
+
+    def frames(self, prefix, suffix):
+        """
+        Returns the FrameSet of the files named prefix + frame + suffix, with
+        any padding and an optional minus sign.
+        """
+        key = (prefix, suffix)
+        with self.lock:
+            frame_set = self.frame_sets.get(key)
+            if frame_set is None:
+                if self.text is None:
+                    self.text = '\n'.join(self.names)
+                pattern = re.compile(f"^{re.escape(prefix)}(-?\\d+){re.escape(suffix)}$", re.MULTILINE)
+                frame_set = self.frame_sets[key] = FrameSet.from_frames(set(map(int, pattern.findall(self.text))))
+                self.patterns[key] = pattern
+            return frame_set
+
+    def file_created(self, name):
+        self.changed(name, True)
+
+    def file_deleted(self, name):
+        self.changed(name, False)
+
+    def changed(self, name, present):
+        with self.lock:
+            if self.names is None:
+                self.names = set(self.text.split('\n')) if self.text else set()
+            if (name in self.names) == present or '\n' in name:
+                return
+            if present:
+                self.names.add(name)
+            else:
+                self.names.discard(name)
+            self.count = len(self.names)
+            self.text = None
+            for key, pattern in self.patterns.items():
+                match = pattern.fullmatch(name)
+                if match:
+                    frame = int(match.group(1))
+                    frame_set = self.frame_sets[key]
+                    self.frame_sets[key] = frame_set.added(frame) if present else frame_set.removed(frame)
+
+
+class ScanSession(object):
+    """
+    Directory indexes for one operation. Each directory is listed at most once,
+    however many scanners ask for it, including scanners on other threads that
+    ask while it is still being listed. With a DirectoryWatcher, indexes kept
+    from earlier operations are reused instead of listing again.
+    """
+
+    def __init__(self, watcher=None):
+        self.indexes = {}  # normalised directory -> (Future of its DirectoryIndex, start time)
+        self.watcher = watcher
+        self.lock = threading.Lock()
+
+    def index(self, directory, timeout=None):
+        """
+        Returns the DirectoryIndex of directory, listing it on first use.
+        Raises OSError if the directory cannot be listed, and TimeoutError once
+        the listing has run for timeout seconds; it carries on in the
+        background, so later callers still get it when it completes.
+        """
+        key = os.path.normcase(os.path.abspath(directory))
+        with self.lock:
+            entry = self.indexes.get(key)
+            if entry is None:
+                entry = self.indexes[key] = (concurrent.futures.Future(), time.monotonic())
+                threading.Thread(target=self.list_directory, args=(directory, entry[0]), daemon=True).start()
+        future, started = entry
+        remaining = None if timeout is None else max(0.0, started + timeout - time.monotonic())
+        try:
+            return future.result(remaining)
+        except concurrent.futures.TimeoutError:
+            raise TimeoutError(f"Listing {directory} took longer than {timeout}s")
+
+    def list_directory(self, directory, future):
+        try:
+            future.set_result(self.watcher.index(directory) if self.watcher else DirectoryIndex(directory))
+        except OSError as e:
+            future.set_exception(e)
+
+
+class WatchedDirectory(object):
+    """
+    A DirectoryWatcher entry: the index, and either its inotify watch or the
+    directory stat it was listed at.
+    """
+
+    def __init__(self, key, wd=None, stat=None):
+        self.key = key
+        self.wd = wd
+        self.stat = stat
+        self.index = None
+        self.pending = []  # (name, present) reported while the index is being listed
+        self.stale = False
+
+
+class DirectoryWatcher(object):
+    """
+    Keeps the DirectoryIndexes of scanned directories between operations.
+
+    On Linux the first max_watches directories are watched with inotify, and
+    files created, deleted or moved are applied to their indexes, so a kept
+    index is always current. Queued events are read by a background thread
+    and again before any index is handed out, so a scan never misses a file
+    created before it started. The watch is added before the directory is
+    listed, and events that arrive during the listing are replayed onto it.
+    If the event queue overflows, every watched index is listed again on its
+    next use.
+
+    Directories beyond the watch limit, or every directory without inotify,
+    are polled instead: a kept index is reused while the directory's mtime
+    and inode are unchanged, and listed again otherwise. The least recently
+    used directories beyond max_directories are dropped.
+    """
+
+    def __init__(self, max_watches=MAX_WATCHES, max_directories=LIVE_DIRECTORY_LIMIT,
+                 interval=WATCH_POLL_INTERVAL):
+        self.max_watches = max_watches
+        self.max_directories = max_directories
+        self.interval = interval
+        self.entries = {}  # normalised directory -> WatchedDirectory, least recently used first
+        self.watches = {}  # watch descriptor -> WatchedDirectory
+        self.lock = threading.RLock()
+        self.libc = None
+        self.fd = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        if sys.platform.startswith('linux') and max_watches > 0:
+            self.fd = self.inotify_init()
+
+    def inotify_init(self):
+        """
+        Returns a non-blocking inotify file descriptor, or None.
+        """
+        try:
+            self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            fd = self.libc.inotify_init1(IN_NONBLOCK)
+        except (OSError, AttributeError) as e:
+            logging.info(f"inotify is not available ({e}); scanned directories are checked by mtime instead.")
+            return None
+        if fd < 0:
+            logging.info(f"inotify_init1 failed ({os.strerror(ctypes.get_errno())}); "
+                         "scanned directories are checked by mtime instead.")
+            return None
+        return fd
+
+    def index(self, directory):
+        """
+        Returns an up to date DirectoryIndex of directory, from memory if it
+        is kept and still valid, else by listing it.
+        Raises OSError if the directory cannot be listed.
+        """
+        key = os.path.normcase(os.path.abspath(directory))
+        with self.lock:
+            self.read_events()
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.entries[key] = entry
+                if entry.index is not None and not entry.stale:
+                    if entry.wd is not None or entry.stat == RangeCache.stat(directory):
+                        return entry.index
+            entry = self.watch(key, entry)
+
+        # The watch is in place before the listing starts, so nothing is missed
+        try:
+            index = DirectoryIndex(directory)
+        except OSError:
+            with self.lock:
+                self.forget(entry, remove_watch=True)
+            raise
+        with self.lock:
+            self.read_events()
+            for name, present in entry.pending:
+                index.changed(name, present)
+            entry.pending = []
+            entry.index = index
+        return index
+
+    def watch(self, key, entry):
+        """
+        Returns a new entry for key, with an inotify watch while under the
+        limit, else with the directory stat to poll.
+        """
+        wd = entry.wd if entry is not None else None
+        if wd is None and self.fd is not None and len(self.watches) < self.max_watches:
+            wd = self.libc.inotify_add_watch(
+                self.fd, os.fsencode(key),
+                IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF)
+            if wd < 0:
+                if ctypes.get_errno() == errno.ENOSPC:
+                    logging.info("inotify watch limit reached; further scanned directories are checked by mtime.")
+                    self.max_watches = len(self.watches)
+                wd = None
+        entry = WatchedDirectory(key, wd, None if wd is not None else RangeCache.stat(key))
+        if wd is not None:
+            self.watches[wd] = entry
+            self.start()
+        self.entries.pop(key, None)
+        self.entries[key] = entry
+        while len(self.entries) > self.max_directories:
+            self.forget(next(iter(self.entries.values())), remove_watch=True)
+        return entry
+
+    def forget(self, entry, remove_watch=False):
+        if self.entries.get(entry.key) is entry:
+            del self.entries[entry.key]
+        if entry.wd is not None and self.watches.get(entry.wd) is entry:
+            del self.watches[entry.wd]
+            if remove_watch:
+                self.libc.inotify_rm_watch(self.fd, entry.wd)
+
+    def read_events(self):
+        """
+        Applies every queued inotify event. Called with the lock held.
+        """
+        if self.fd is None:
+            return
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    for entry in self.watches.values():
+                        entry.stale = True
+                    continue
+                entry = self.watches.get(wd)
+                if entry is None:
+                    continue
+                if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                    self.forget(entry)
+                elif name and not mask & IN_ISDIR:
+                    present = bool(mask & (IN_CREATE | IN_MOVED_TO))
+                    if entry.index is None:
+                        entry.pending.append((name, present))
+                    else:
+                        entry.index.changed(name, present)
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name='directory_watcher', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        # Keeps the kernel queue short between scans while renders are writing
+        while not self.stop_event.is_set():
+            readable, _, _ = select.select([self.fd], [], [], self.interval)
+            if readable:
+                with self.lock:
+                    self.read_events()
+
+
+def probe_pool():
+    """
+    Returns the thread pool FrameProbers run their existence checks on.
+    """
+    global _probe_pool
+    with _probe_pool_lock:
+        if _probe_pool is None:
+            _probe_pool = concurrent.futures.ThreadPoolExecutor(max_workers=PROBE_WORKERS,
+                                                                thread_name_prefix='frame_probe')
+        return _probe_pool
+
+
+class FrameProber(object):
+    """
+    Finds a sequence's first and last frames from existence checks alone.
+
+    Every round sends a batch of checks to the shared pool at once, so on a
+    network share a round costs about one round-trip instead of one per frame.
+    From a present frame the search gallops outwards (offsets 1, 2, 4, ... in
+    one batch) to the first missing frame, then narrows that boundary with a
+    k-ary search, a batch of evenly spaced checks per round. Before an end is
+    accepted, frames up to PROBE_GAP_TOLERANCE past it are checked so short
+    gaps are stepped over. Frames may be negative and have no upper limit.
+    """
+
+    def __init__(self, path_for_frame, batch=PROBE_WORKERS, gap_tolerance=PROBE_GAP_TOLERANCE):
+        self.path_for_frame = path_for_frame
+        self.batch = batch
+        self.gap_offsets = [1 + (1 << k) for k in range(gap_tolerance.bit_length())]
+        self.probes = 0
+        self.rounds = 0
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def exists(self, frames):
+        """
+        Checks frames concurrently in one round. Returns {frame: present}.
+        """
+        frames = list(dict.fromkeys(frames))
+        self.probes += len(frames)
+        self.rounds += 1
+        paths = [self.path_for_frame(frame) for frame in frames]
+        return dict(zip(frames, probe_pool().map(os.path.exists, paths)))
+
+    def find_range(self, seeds=PROBE_SEEDS):
+        """
+        Returns (first, last) of the sequence around the present seeds, or
+        (None, None) if no seed exists or the prober was stopped.
+        """
+        present = [frame for frame, exists in self.exists(seeds).items() if exists]
+        if not present:
+            return None, None
+        first = self.find_end(min(present), -1)
+        last = self.find_end(max(present), 1)
+        if not self.running:
+            return None, None
+        return first, last
+
+    def find_end(self, frame, direction):
+        """
+        Returns the furthest present frame reached from the present frame in
+        direction (1 or -1).
+        """
+        offsets = [1 << k for k in range(self.batch)]
+        while self.running:
+            present = self.exists(frame + direction * offset for offset in offsets)
+            missing = next((offset for offset in offsets if not present[frame + direction * offset]), None)
+            if missing is None:
+                # Still present at the largest offset: gallop on from there
+                frame += direction * offsets[-1]
+                offsets = [offsets[-1] << k for k in range(1, self.batch + 1)]
+                continue
+            earlier = [offset for offset in offsets if offset < missing]
+            frame += direction * self.narrow(frame, direction, earlier[-1] if earlier else 0, missing)
+
+            # Look past a short gap before accepting this end
+            present = self.exists(frame + direction * offset for offset in self.gap_offsets)
+            beyond = [offset for offset in self.gap_offsets if present[frame + direction * offset]]
+            if not beyond:
+                return frame
+            frame += direction * beyond[-1]
+            offsets = [1 << k for k in range(self.batch)]
+        return frame
+
+    def narrow(self, frame, direction, low, high):
+        """
+        Given offset low present and offset high missing, returns the offset of
+        the last present frame before the first missing one.
+        """
+        while high - low > 1 and self.running:
+            step = -(-(high - low) // (self.batch + 1))
+            offsets = list(range(low + step, high, step))
+            present = self.exists(frame + direction * offset for offset in offsets)
+            for offset in offsets:
+                if not present[frame + direction * offset]:
+                    high = offset
+                    break
+                low = offset
+        return low
+
+
+class RangeCache(object):
+    """
+    Persistent LRU cache of sequence ranges keyed on (directory, pattern),
+    with the present frames as runs when the range came from a listing.
+
+    get() costs one stat of the directory; an entry whose stored directory
+    mtime or inode differs is dropped. The least recently used entries beyond
+    max_entries are evicted on put(). SQLite errors are logged and treated as
+    misses, so a broken cache file never stops a scan.
+    """
+
+    def __init__(self, path=RANGE_CACHE_PATH, max_entries=RANGE_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.connection = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        if self.connection is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.connection = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS sequences ('
+                'directory TEXT, pattern TEXT, mtime_ns INTEGER, inode INTEGER, '
+                'first INTEGER, last INTEGER, runs TEXT, used REAL, PRIMARY KEY (directory, pattern))')
+            self.connection.commit()
+        return self.connection
+
+    @staticmethod
+    def key(directory):
+        return os.path.normcase(os.path.abspath(directory))
+
+    @staticmethod
+    def stat(directory):
+        """
+        Returns the (mtime_ns, inode) a cached range is validated against, or None.
+        Take it before listing, so files landing during the scan invalidate the entry.
+        """
+        try:
+            stat = os.stat(directory)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_ino
+
+    def get(self, directory, pattern):
+        """
+        Returns the cached (first, last, FrameSet or None) if the directory is
+        unchanged, else None.
+        """
+        stat = self.stat(directory)
+        if stat is None:
+            return None
+        key = self.key(directory)
+        try:
+            with self.lock:
+                connection = self.connect()
+                row = connection.execute(
+                    'SELECT mtime_ns, inode, first, last, runs FROM sequences WHERE directory = ? AND pattern = ?',
+                    (key, pattern)).fetchone()
+                if row is None:
+                    return None
+                if (row[0], row[1]) != stat:
+                    connection.execute('DELETE FROM sequences WHERE directory = ? AND pattern = ?', (key, pattern))
+                    connection.commit()
+                    return None
+                connection.execute('UPDATE sequences SET used = ? WHERE directory = ? AND pattern = ?',
+                                   (time.time(), key, pattern))
+                connection.commit()
+                frame_set = FrameSet(tuple(run) for run in json.loads(row[4])) if row[4] else None
+                return row[2], row[3], frame_set
+        except (sqlite3.Error, ValueError) as e:
+            logging.warning(f"Sequence range cache {self.path} unavailable: {e}")
+            return None
+
+    def put(self, directory, pattern, first, last, stat, frame_set=None):
+        """
+        Stores a range scanned while the directory had the given stat(), and
+        its FrameSet if the range came from a listing.
+        """
+        if stat is None:
+            return
+        runs = json.dumps(frame_set.runs) if frame_set is not None else None
+        try:
+            with self.lock:
+                connection = self.connect()
+                connection.execute(
+                    'INSERT OR REPLACE INTO sequences VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (self.key(directory), pattern, stat[0], stat[1], first, last, runs, time.time()))
+                connection.execute(
+                    'DELETE FROM sequences WHERE rowid IN '
+                    '(SELECT rowid FROM sequences ORDER BY used DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+                connection.commit()
+        except sqlite3.Error as e:
+            logging.warning(f"Could not store range in {self.path}: {e}")
+
+
+class ScanResult(object):
+    """
+    The frames found for one sequence path. first and last are None if
+    nothing was found; frame_set is None unless the frames came from a
+    listing. source is 'cache', 'listing', 'probe', 'file' (a path without a
+    frame token) or None.
+    """
+
+    def __init__(self, path, first=None, last=None, frame_set=None, source=None):
+        self.path = path
+        self.first = first
+        self.last = last
+        self.frame_set = frame_set
+        self.source = source
+        self.bytes = None
+        self.error = None
+
+    def as_dict(self):
+        """
+        Returns the result as plain JSON types.
+        """
+        frame_set = self.frame_set
+        return {
+            'path': self.path,
+            'first': self.first,
+            'last': self.last,
+            'frames': len(frame_set) if frame_set is not None else None,
+            'ranges': [list(run) for run in frame_set.runs] if frame_set is not None else None,
+            'gaps': [list(run) for run in frame_set.gaps()] if frame_set is not None else None,
+            'missing': frame_set.missing_count() if frame_set is not None else None,
+            'bytes': self.bytes,
+            'source': self.source,
+            'error': self.error,
+        }
+
+
+class SequenceScanner(object):
+    """
+    Finds the frames of one sequence path: from the RangeCache if its
+    directory is unchanged, else from the directory's index, else by probing
+    when the directory cannot be listed or lists too slowly.
+
+    seeds are frames likely to exist, tried first when probing.
+    on_progress(percent, message) is called from the scanning thread.
+    """
+
+    def __init__(self, path, session=None, cache=None, seeds=(), on_progress=None,
+                 listing_timeout=LISTING_TIMEOUT):
+        self.path = path
+        self.session = session or ScanSession()
+        self.cache = cache
+        self.seeds = seeds
+        self.listing_timeout = listing_timeout
+        self.on_progress = on_progress
+        self.prober = None
+        self.running = False
+
+    def progress(self, percent, message):
+        if self.on_progress:
+            self.on_progress(percent, message)
+
+    def stop(self):
+        self.running = False
+        prober = self.prober
+        if prober is not None:
+            prober.stop()
+
+    def scan(self):
+        """
+        Returns the ScanResult of the path.
+        """
+        self.running = True
+        try:
+            return self.find()
+        finally:
+            self.running = False
+
+    def find(self):
+        directory = os.path.dirname(self.path)
+        basename = os.path.basename(self.path)
+
+        # One stat of the directory validates a cached entry
+        if self.cache is not None:
+            cached = self.cache.get(directory, basename)
+            if cached is not None:
+                return ScanResult(self.path, *cached, source='cache')
+            directory_stat = self.cache.stat(directory)
+
+        # The name is parsed once for the whole scan
+        pattern = FramePattern.parse(basename)
+        if pattern is None:
+            return ScanResult(self.path, source='file')
+
+        self.progress(0, "Analyzing file pattern...")
+        result = self.list_frames(directory, pattern)
+        if result is None and self.running:
+            result = self.probe_frames()
+        if result is None:
+            return ScanResult(self.path)
+        if self.cache is not None and self.running:
+            self.cache.put(directory, basename, result.first, result.last, directory_stat, result.frame_set)
+        return result
+
+    def list_frames(self, directory, pattern):
+        """
+        Returns the ScanResult from the shared directory index, or None.
+        """
+        if not os.path.exists(directory):
+            return None
+
+        # Every Read and proxy in this directory shares one listing
+        self.progress(20, "Listing files in directory...")
+        try:
+            frames = self.session.index(directory, self.listing_timeout).frames(pattern.prefix, pattern.suffix)
+        except TimeoutError:
+            self.progress(40, "Directory listing too slow, probing instead...")
+            return None
+        except PermissionError:
+            self.progress(40, "Directory cannot be listed, probing instead...")
+            return None
+        except OSError as e:
+            self.progress(40, f"Error listing directory: {e}")
+            return None
+        if not frames or not self.running:
+            return None
+        self.progress(90, f"Found range: {frames.first}-{frames.last}")
+        return ScanResult(self.path, frames.first, frames.last, frames, 'listing')
+
+    def probe_frames(self):
+        """
+        Returns the ScanResult found by concurrent existence checks, or None.
+        """
+        self.progress(50, "Probing for frames...")
+
+        # Parsed from the whole path so each probe is a single format()
+        path_pattern = FramePattern.parse(self.path)
+        self.prober = FrameProber(path_pattern.format)
+        try:
+            first, last = self.prober.find_range(list(self.seeds) + list(PROBE_SEEDS))
+        except OSError as e:
+            self.progress(90, f"Probe scan failed: {e}")
+            return None
+        finally:
+            probes = self.prober.probes
+            self.prober = None
+        if first is None or not self.running:
+            return None
+        self.progress(95, f"Found range: {first}-{last} in {probes} checks")
+        return ScanResult(self.path, first, last, source='probe')
+
+
+def file_size(path):
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def sequence_bytes(result):
+    """
+    Returns the total size of the present frames of a ScanResult, stat()ing
+    them concurrently, or None if its frames are not known.
+    """
+    if result.source == 'file':
+        return file_size(result.path) if os.path.isfile(result.path) else None
+    if result.frame_set is None:
+        return None
+    pattern = FramePattern.parse(result.path)
+    paths = (pattern.format(frame) for first, last in result.frame_set.runs for frame in range(first, last + 1))
+    return sum(probe_pool().map(file_size, paths, chunksize=256))
+
+
+def scan_sequences(paths, workers=SCAN_WORKERS, session=None, cache=None, sizes=False, watcher=None,
+                   listing_timeout=LISTING_TIMEOUT):
+    """
+    Scans many sequence paths in parallel and returns their ScanResults in
+    the same order. Paths in the same directory share one listing, or the
+    kept index of an optional DirectoryWatcher. cache is an optional
+    RangeCache; sizes adds the total bytes of each sequence. Errors are
+    reported in each result's error rather than raised.
+    """
+    paths = list(paths)
+    session = session or ScanSession(watcher)
+
+    def scan(path):
+        try:
+            result = SequenceScanner(path, session, cache, listing_timeout=listing_timeout).scan()
+            if sizes:
+                result.bytes = sequence_bytes(result)
+        except Exception as e:
+            result = ScanResult(path)
+            result.error = str(e)
+        return result
+
+    if not paths:
+        return []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as executor:
+        return list(executor.map(scan, paths))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Find the frames of image sequences and print them as JSON. '
+                    'Paths take %04d, %d, ####, @@@, $F4 or <UDIM> frame tokens.')
+    parser.add_argument('paths', nargs='+', help='sequence paths, e.g. /shots/sh010/comp.%%04d.exr')
+    parser.add_argument('--workers', type=int, default=SCAN_WORKERS, help='sequences scanned at once')
+    parser.add_argument('--no-bytes', action='store_true', help='skip totalling the size of each sequence')
+    parser.add_argument('--no-cache', action='store_true', help=f'do not read or update {RANGE_CACHE_PATH}')
+    parser.add_argument('--listing-timeout', type=float, default=LISTING_TIMEOUT,
+                        help='seconds to wait for a directory listing before probing instead')
+    args = parser.parse_args(argv)
+
+    cache = None if args.no_cache else RangeCache()
+    results = scan_sequences(args.paths, workers=args.workers, cache=cache, sizes=not args.no_bytes,
+                             listing_timeout=args.listing_timeout)
+    json.dump([result.as_dict() for result in results], sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    return 0 if all(result.first is not None or result.source == 'file' for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
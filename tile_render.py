@@ -0,0 +1,202 @@
+# Filename: tile_render.py
+"""
+Tile-split rendering for the Render Progress Panel.
+
+Giant LL180 frames (16K/18K) can need more RAM than one Nuke process should
+use, so the frame is rendered as horizontal bands instead. Every band gets a
+copy of the script with a Crop and a float EXR Write appended behind the
+original Write's input, so each worker only computes its band's rows. An
+assembly script then reads the bands back, adds them together and writes the
+final file through a copy of the original Write node.
+
+Everything here works on the .nk text, so it runs without Nuke.
+"""
+
+import os
+import re
+import shutil
+
+# Band scripts and band images live next to the final output
+BAND_DIR = '.tile_bands'
+BAND_WRITE = 'TileBandWrite'
+SOURCE_VAR = 'TileBandSource'
+
+NODE_START_RE = re.compile(r'^(\w+) \{\s*$')
+
+
+def band_boxes(width, height, bands):
+    """
+    Splits a width x height format into horizontal bands.
+    Returns Crop boxes (x, y, r, t) from the bottom up, in Nuke's y-up coordinates.
+    """
+    bands = max(1, min(bands, height))
+    edges = [height * index // bands for index in range(bands + 1)]
+    return [(0, edges[index], width, edges[index + 1]) for index in range(bands)]
+
+
+def quote(value):
+    """
+    Quotes a string knob value for a .nk script.
+    """
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def find_node_block(script_text, node_class, name=None):
+    """
+    Returns (start, end) character offsets of a top-level node block such as
+    "Write {\\n ... name Write1\\n}\\n", or None if there is no such node.
+    Nodes inside Groups are not top-level and are never matched.
+    """
+    lines = script_text.splitlines(True)
+    offset = 0
+    depth = 0  # Group nesting
+    block_start = None
+    block_class = None
+    for line in lines:
+        stripped = line.rstrip('\r\n')
+        if block_start is None:
+            match = NODE_START_RE.match(stripped)
+            if match:
+                block_start = offset
+                block_class = match.group(1)
+            elif stripped == 'end_group':
+                depth -= 1
+        elif stripped == '}':
+            block = script_text[block_start:offset + len(line)]
+            if depth == 0 and block_class == node_class and (name is None or re.search(
+                    r'^ name ' + re.escape(name) + r'\s*$', block, re.MULTILINE)):
+                return block_start, offset + len(line)
+            if block_class == 'Group':
+                depth += 1  # Its nodes follow until end_group
+            block_start = None
+        offset += len(line)
+    return None
+
+
+def set_knob(block, knob, value):
+    """
+    Sets a knob line in a node block, adding it before the name line if missing.
+    """
+    line = f' {knob} {value}'
+    pattern = re.compile(r'^ ' + re.escape(knob) + r' .*$', re.MULTILINE)
+    if pattern.search(block):
+        return pattern.sub(lambda match: line, block, count=1)
+    return re.sub(r'^( name .*)$', lambda match: line + '\n' + match.group(1), block, count=1, flags=re.MULTILINE)
+
+
+def band_path(work_dir, write_name, band):
+    return os.path.join(work_dir, f'{write_name}_band{band:02d}.%04d.exr').replace('\\', '/')
+
+
+def band_script(script_text, write_name, box, output_path):
+    """
+    Returns the script with a Crop of the Write's input to box and a float EXR
+    Write (BAND_WRITE) rendering it to output_path.
+    """
+    span = find_node_block(script_text, 'Write', write_name)
+    if span is None:
+        raise ValueError(f"No top-level Write node named {write_name} in the script.")
+    start, _ = span
+    x, y, r, t = box
+    # The stack top before the Write block is its input
+    text = script_text[:start] + f'set {SOURCE_VAR} [stack 0]\n' + script_text[start:]
+    if not text.endswith('\n'):
+        text += '\n'
+    return text + (
+        f'push ${SOURCE_VAR}\n'
+        'Crop {\n'
+        f' box {{{x} {y} {r} {t}}}\n'
+        ' name TileBandCrop\n'
+        '}\n'
+        'Write {\n'
+        ' channels all\n'
+        f' file {quote(output_path)}\n'
+        ' raw true\n'
+        ' file_type exr\n'
+        ' datatype "32 bit float"\n'
+        ' autocrop false\n'
+        ' create_directories true\n'
+        f' name {BAND_WRITE}\n'
+        '}\n'
+    )
+
+
+def assembly_script(script_text, write_name, band_paths, first_frame, last_frame, output_path):
+    """
+    Returns a script that adds the band images back together and writes them
+    through a copy of the original Write node, with its file set to output_path.
+    """
+    span = find_node_block(script_text, 'Write', write_name)
+    root = find_node_block(script_text, 'Root')
+    if span is None:
+        raise ValueError(f"No top-level Write node named {write_name} in the script.")
+    # Keep the header and Root so formats, colour management and plugins match
+    header = script_text[:root[1]] if root else ''
+    parts = [header]
+    for index, path in enumerate(band_paths):
+        parts.append(
+            'Read {\n'
+            f' file {quote(path)}\n'
+            f' first {first_frame}\n'
+            f' last {last_frame}\n'
+            f' origfirst {first_frame}\n'
+            f' origlast {last_frame}\n'
+            ' raw true\n'
+            ' on_error black\n'
+            f' name TileBandRead{index}\n'
+            '}\n'
+        )
+        if index:
+            # Bands never overlap, so plus puts every pixel back unchanged
+            parts.append(
+                'Merge2 {\n'
+                ' inputs 2\n'
+                ' operation plus\n'
+                ' also_merge all\n'
+                f' name TileBandMerge{index}\n'
+                '}\n'
+            )
+    write_block = set_knob(script_text[span[0]:span[1]], 'file', quote(output_path))
+    write_block = re.sub(r'^ inputs \d+\n', '', write_block, flags=re.MULTILINE)
+    parts.append(write_block)
+    return ''.join(parts)
+
+
+def prepare_tile_render(script_path, write_name, width, height, bands, first_frame, last_frame, output_path):
+    """
+    Writes the band and assembly scripts for a Write node.
+
+    Returns a dict with work_dir, boxes, band_scripts, band_paths and assembly_script.
+    """
+    with open(script_path) as handle:
+        script_text = handle.read()
+    work_dir = os.path.join(os.path.dirname(output_path), BAND_DIR, write_name)
+    os.makedirs(work_dir, exist_ok=True)
+    script_base = os.path.splitext(os.path.basename(script_path))[0]
+    boxes = band_boxes(width, height, bands)
+    band_scripts = []
+    band_paths = []
+    for index, box in enumerate(boxes):
+        path = band_path(work_dir, write_name, index)
+        band_script_path = os.path.join(work_dir, f'{script_base}_band{index:02d}.nk')
+        with open(band_script_path, 'w') as handle:
+            handle.write(band_script(script_text, write_name, box, path))
+        band_scripts.append(band_script_path)
+        band_paths.append(path)
+    assembly_path = os.path.join(work_dir, f'{script_base}_assemble.nk')
+    with open(assembly_path, 'w') as handle:
+        handle.write(assembly_script(script_text, write_name, band_paths, first_frame, last_frame, output_path))
+    return {
+        'work_dir': work_dir,
+        'boxes': boxes,
+        'band_scripts': band_scripts,
+        'band_paths': band_paths,
+        'assembly_script': assembly_path,
+    }
+
+
+def remove_tile_files(work_dir):
+    """
+    Deletes the band scripts and images once the frames are assembled.
+    """
+    shutil.rmtree(work_dir, ignore_errors=True)